@@ -0,0 +1,120 @@
+# File: agents/candidate_agent.py
+import torch
+import torch.nn as nn
+import numpy as np
+import random
+from typing import Optional, Sequence
+import logging
+
+from .dqn_agent import DQNAgent
+
+logger = logging.getLogger(__name__)
+
+class PairScoringDQN(nn.Module):
+    """Q-сеть, оценивающая пару (запрос, статья).
+
+    На вход подается конкатенация [s, e_a, s * e_a], на выходе — одно число,
+    поэтому размер сети не зависит от количества статей в корпусе.
+    """
+    def __init__(self, state_dim: int, article_dim: int, hidden_dim: int = 256):
+        super(PairScoringDQN, self).__init__()
+        if state_dim != article_dim:
+            raise ValueError(f"state_dim ({state_dim}) must match article_dim ({article_dim})")
+        self.network = nn.Sequential(
+            nn.Linear(state_dim * 3, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, hidden_dim // 2),
+            nn.ReLU(),
+            nn.Linear(hidden_dim // 2, 1)
+        )
+
+    def forward(self, states: torch.Tensor, articles: torch.Tensor) -> torch.Tensor:
+        """states: (B, S), articles: (B, K, S) -> Q values (B, K)"""
+        states = states.unsqueeze(1).expand(-1, articles.shape[1], -1)
+        features = torch.cat([states, articles, states * articles], dim=-1)
+        return self.network(features).squeeze(-1)
+
+class CandidateDQNAgent(DQNAgent):
+    """DQN с пространством действий, обусловленным поиском.
+
+    Сначала векторный индекс ArticleDatabase отбирает top-K кандидатов,
+    затем агент оценивает только пары (запрос, кандидат). Стоимость запроса
+    ограничена K и не растет вместе с корпусом; новые статьи не требуют
+    перестройки сети.
+    """
+    def __init__(self, state_dim: int, article_db, config):
+        self.article_db = article_db
+        self.candidate_k = config.candidate_k
+        super().__init__(state_dim, len(article_db.get_all_articles()), config)
+
+    def _build_network(self, state_dim: int, action_dim: int) -> nn.Module:
+        article_dim = self.article_db.article_embeddings.shape[1]
+        return PairScoringDQN(state_dim, article_dim, self.config.hidden_dim)
+
+    def add_articles(self, article_ids: np.ndarray, embeddings: np.ndarray):
+        """Новые статьи видны через векторный индекс, сеть не меняется"""
+        self.action_dim = max(self.action_dim, int(np.max(article_ids)) + 1)
+
+    def retrieve_candidates(self, states: np.ndarray) -> np.ndarray:
+        """Top-K статей для батча состояний (состояние — нормализованный эмбеддинг запроса)"""
+        k = min(self.candidate_k, len(self.article_db.index))
+        candidates, _ = self.article_db.index.search_batch(np.asarray(states, dtype=np.float32), k)
+        return candidates
+
+    def _article_tensor(self, article_ids: np.ndarray) -> torch.Tensor:
+        """Эмбеддинги статей для массива id произвольной формы"""
+        embeddings = np.asarray(self.article_db.article_embeddings[article_ids.reshape(-1)], dtype=np.float32)
+        return torch.from_numpy(embeddings).reshape(*article_ids.shape, -1).to(self.device)
+
+    def select_action(self, state: np.ndarray, training: bool = True,
+                      candidates: Optional[Sequence[int]] = None) -> int:
+        """Выбор статьи среди кандидатов (epsilon-greedy)"""
+        if candidates is None:
+            candidates = self.retrieve_candidates(state.reshape(1, -1))[0]
+        candidates = np.asarray(candidates, dtype=np.int64)
+        candidates = candidates[candidates >= 0]
+
+        if training and random.random() < self.epsilon:
+            # Случайный кандидат (exploration)
+            action = int(random.choice(candidates))
+            logger.debug(f"Random candidate action: {action}, epsilon: {self.epsilon:.3f}")
+        else:
+            state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0).to(self.device)
+            with torch.no_grad():
+                q_values = self.policy_net(state_tensor, self._article_tensor(candidates[None, :]))[0]
+                best = q_values.argmax().item()
+                action = int(candidates[best])
+                logger.debug(f"Network action: {action}, max_q: {q_values[best].item():.3f}")
+
+        return action
+
+    def select_actions(self, states: np.ndarray, training: bool = False) -> np.ndarray:
+        """Выбор для батча: один поиск кандидатов и один forward на (B, K) пар
+        (при training — случайный кандидат с вероятностью epsilon)"""
+        states = np.asarray(states, dtype=np.float32)
+        candidates = self.retrieve_candidates(states)
+        valid = torch.from_numpy(candidates >= 0).to(self.device)
+        with torch.no_grad():
+            q_values = self.policy_net(
+                torch.from_numpy(states).to(self.device),
+                self._article_tensor(np.maximum(candidates, 0))
+            ).masked_fill(~valid, float('-inf'))
+        best = q_values.argmax(1).cpu().numpy()
+        if training:
+            explore = np.random.random(len(best)) < self.epsilon
+            if explore.any():
+                # Случайная позиция среди валидных кандидатов строки
+                counts = (candidates[explore] >= 0).sum(1)
+                best[explore] = (np.random.random(int(explore.sum())) * counts).astype(np.int64)
+        return candidates[np.arange(len(candidates)), best]
+
+    def _current_q_values(self, states: torch.Tensor, actions: torch.Tensor) -> torch.Tensor:
+        articles = self._article_tensor(actions.cpu().numpy())
+        return self.policy_net(states, articles)
+
+    def _next_q_values(self, next_states: torch.Tensor) -> torch.Tensor:
+        candidates = self.retrieve_candidates(next_states.cpu().numpy())
+        valid = torch.from_numpy(candidates >= 0).to(self.device)
+        q_values = self.target_net(next_states, self._article_tensor(np.maximum(candidates, 0)))
+        q_values = q_values.masked_fill(~valid, float('-inf'))
+        return q_values.max(1)[0].unsqueeze(1)
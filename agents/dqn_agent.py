@@ -3,11 +3,13 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
+import copy
 import random
-from collections import deque
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 import logging
 
+from .experience_replay import create_replay_buffer
+
 logger = logging.getLogger(__name__)
 
 class SimpleDQN(nn.Module):
@@ -35,25 +37,54 @@ class DQNAgent:
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         logger.info(f"Using device: {self.device}")
         
-        # Networks
-        self.policy_net = SimpleDQN(state_dim, action_dim, config.hidden_dim).to(self.device)
-        self.target_net = SimpleDQN(state_dim, action_dim, config.hidden_dim).to(self.device)
-        self.target_net.load_state_dict(self.policy_net.state_dict())
-        
-        # Optimizer
-        self.optimizer = optim.Adam(self.policy_net.parameters(), lr=config.learning_rate)
+        # Networks and optimizer
+        self.state_dim = state_dim
+        self._init_networks()
         
         # Experience replay
-        self.memory = deque(maxlen=1000)
+        self.memory = create_replay_buffer(config, state_dim)
         
         # Training state
         self.steps_done = 0
         
         logger.info(f"DQN Agent initialized: state_dim={state_dim}, action_dim={action_dim}")
     
+    def _init_networks(self):
+        """Создание policy/target сетей и оптимизатора"""
+        self.policy_net = self._build_network(self.state_dim, self.action_dim).to(self.device)
+        self.target_net = self._build_network(self.state_dim, self.action_dim).to(self.device)
+        self.target_net.load_state_dict(self.policy_net.state_dict())
+        self.optimizer = optim.Adam(self.policy_net.parameters(), lr=self.config.learning_rate)
+    
+    def _build_network(self, state_dim: int, action_dim: int) -> nn.Module:
+        """Создание Q-сети (переопределяется в наследниках)"""
+        return SimpleDQN(state_dim, action_dim, self.config.hidden_dim)
+    
+    def add_articles(self, article_ids: np.ndarray, embeddings: np.ndarray):
+        """Расширить выходной слой под новые статьи (id дописываются в конец).
+        
+        Веса существующих действий сохраняются, новые строки инициализируются
+        как в свежем nn.Linear. Оптимизатор пересоздается: моменты Adam
+        привязаны к форме параметров.
+        """
+        action_dim = max(self.action_dim, int(np.max(article_ids)) + 1)
+        if action_dim == self.action_dim:
+            return
+        old_layer = self.policy_net.network[-1]
+        grown = nn.Linear(old_layer.in_features, action_dim).to(self.device)
+        for net in (self.policy_net, self.target_net):
+            layer = copy.deepcopy(grown)
+            with torch.no_grad():
+                layer.weight[:self.action_dim] = net.network[-1].weight
+                layer.bias[:self.action_dim] = net.network[-1].bias
+            net.network[-1] = layer
+        self.optimizer = optim.Adam(self.policy_net.parameters(), lr=self.config.learning_rate)
+        logger.info(f"Expanded action space from {self.action_dim} to {action_dim}")
+        self.action_dim = action_dim
+    
     def select_action(self, state: np.ndarray, training: bool = True) -> int:
         """Выбор действия с использованием epsilon-greedy стратегии"""
-        state_tensor = torch.FloatTensor(state).unsqueeze(0).to(self.device)
+        state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0).to(self.device)
         
         if training and random.random() < self.epsilon:
             # Случайное действие (exploration)
@@ -68,37 +99,64 @@ class DQNAgent:
         
         return action
     
+    def select_actions(self, states: np.ndarray, training: bool = False) -> np.ndarray:
+        """Выбор действий для батча состояний одним forward-проходом
+        (жадный; при training — epsilon-greedy независимо для каждой строки)"""
+        states_tensor = torch.as_tensor(np.asarray(states, dtype=np.float32)).to(self.device)
+        with torch.no_grad():
+            q_values = self.policy_net(states_tensor)
+        actions = q_values.argmax(1).cpu().numpy()
+        return self._explore(actions) if training else actions
+    
+    def _explore(self, actions: np.ndarray) -> np.ndarray:
+        """Замена части действий на случайные с вероятностью epsilon"""
+        explore = np.random.random(len(actions)) < self.epsilon
+        if explore.any():
+            actions = actions.copy()
+            actions[explore] = np.random.randint(0, self.action_dim, int(explore.sum()))
+        return actions
+    
     def store_transition(self, state: np.ndarray, action: int, reward: float, 
                         next_state: np.ndarray, done: bool):
         """Сохранить переход в memory"""
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.push(state, action, reward, next_state, done)
+    
+    def store_transitions(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                          next_states: np.ndarray, dones: np.ndarray):
+        """Сохранить батч переходов одной записью в memory"""
+        self.memory.push_batch(states, actions, rewards, next_states, dones)
     
     def learn(self, batch_size: int = 32):
         """Обучение на batch из memory"""
         if len(self.memory) < batch_size:
             return
         
-        # Выборка batch
-        batch = random.sample(self.memory, batch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
-        
-        # Конвертация в тензоры
-        states = torch.FloatTensor(states).to(self.device)
-        actions = torch.LongTensor(actions).unsqueeze(1).to(self.device)
-        rewards = torch.FloatTensor(rewards).unsqueeze(1).to(self.device)
-        next_states = torch.FloatTensor(next_states).to(self.device)
-        dones = torch.BoolTensor(dones).unsqueeze(1).to(self.device)
+        # Выборка batch и конвертация в тензоры (без копирования)
+        batch = self.memory.sample(batch_size)
+        states, actions, rewards, next_states, dones = self.memory.to_tensors(batch, self.device)
         
         # Текущие Q values
-        current_q_values = self.policy_net(states).gather(1, actions)
+        current_q_values = self._current_q_values(states, actions)
         
         # Next Q values
         with torch.no_grad():
-            next_q_values = self.target_net(next_states).max(1)[0].unsqueeze(1)
+            next_q_values = self._next_q_values(next_states)
             target_q_values = rewards + (self.config.gamma * next_q_values * ~dones)
         
         # Loss
-        loss = nn.MSELoss()(current_q_values, target_q_values)
+        target_q_values = target_q_values.expand_as(current_q_values)
+        if 'weights' in batch:
+            # Prioritized replay: loss взвешивается importance sampling,
+            # приоритеты переходов обновляются по новым TD-ошибкам
+            weights = torch.from_numpy(batch['weights']).unsqueeze(1).to(self.device)
+            loss = (weights * (current_q_values - target_q_values).pow(2)).mean()
+            # Приоритет — TD-ошибка Q выбранной статьи: последний столбец (у плоского
+            # агента он единственный, у иерархического это голова статей; столбец
+            # кластера — общее значение кластера, а не конкретного действия)
+            td_errors = (target_q_values - current_q_values).detach()[:, -1].abs()
+            self.memory.update_priorities(batch['indices'], td_errors.cpu().numpy())
+        else:
+            loss = nn.MSELoss()(current_q_values, target_q_values)
         
         # Optimization
         self.optimizer.zero_grad()
@@ -121,21 +179,37 @@ class DQNAgent:
         if self.steps_done % 50 == 0:
             logger.info(f"Training step {self.steps_done}, loss: {loss.item():.4f}, epsilon: {self.epsilon:.3f}")
     
-    def save(self, filepath: str):
-        """Сохранение модели"""
-        torch.save({
+    def _current_q_values(self, states: torch.Tensor, actions: torch.Tensor) -> torch.Tensor:
+        """Q(s, a) для выбранных действий, форма (B, 1)"""
+        return self.policy_net(states).gather(1, actions)
+    
+    def _next_q_values(self, next_states: torch.Tensor) -> torch.Tensor:
+        """max_a' Q_target(s', a'), форма (B, 1)"""
+        return self.target_net(next_states).max(1)[0].unsqueeze(1)
+    
+    def _checkpoint(self) -> Dict:
+        """Состояние агента для сохранения"""
+        return {
             'policy_net_state_dict': self.policy_net.state_dict(),
             'target_net_state_dict': self.target_net.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'epsilon': self.epsilon,
             'steps_done': self.steps_done
-        }, filepath)
+        }
     
-    def load(self, filepath: str):
-        """Загрузка модели"""
-        checkpoint = torch.load(filepath, map_location=self.device)
+    def _restore(self, checkpoint: Dict):
+        """Восстановление состояния агента из checkpoint"""
         self.policy_net.load_state_dict(checkpoint['policy_net_state_dict'])
         self.target_net.load_state_dict(checkpoint['target_net_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         self.epsilon = checkpoint['epsilon']
-        self.steps_done = checkpoint['steps_done']
\ No newline at end of file
+        self.steps_done = checkpoint['steps_done']
+    
+    def save(self, filepath: str):
+        """Сохранение модели"""
+        torch.save(self._checkpoint(), filepath)
+    
+    def load(self, filepath: str):
+        """Загрузка модели"""
+        checkpoint = torch.load(filepath, map_location=self.device)
+        self._restore(checkpoint)
\ No newline at end of file
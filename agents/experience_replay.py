@@ -0,0 +1,203 @@
+# File: agents/experience_replay.py
+import numpy as np
+import torch
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ReplayBuffer:
+    """Кольцевой буфер переходов на предвыделенных numpy-массивах.
+
+    Состояния хранятся непрерывными float32-матрицами, остальные поля —
+    отдельными столбцами. Выборка — один векторный fancy-index по всем
+    столбцам; тензоры создаются через torch.from_numpy без копирования.
+    """
+    def __init__(self, capacity: int, state_dim: int, seed: Optional[int] = None):
+        self.capacity = capacity
+        self.state_dim = state_dim
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, state: np.ndarray, action: int, reward: float,
+             next_state: np.ndarray, done: bool) -> int:
+        """Добавить переход (самый старый перезаписывается); возвращает его индекс"""
+        index = self.position
+        self.states[index] = state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_states[index] = next_state
+        self.dones[index] = done
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return index
+
+    def push_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                   next_states: np.ndarray, dones: np.ndarray) -> np.ndarray:
+        """Добавить батч переходов одной записью по индексам; возвращает их индексы"""
+        count = len(actions)
+        indices = (self.position + np.arange(count)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.position = int((self.position + count) % self.capacity)
+        self.size = min(self.size + count, self.capacity)
+        return indices
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Равномерная выборка индексов без возвращения"""
+        return self.rng.choice(self.size, size=batch_size, replace=False)
+
+    def gather(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Столбцы переходов по индексам (непрерывные копии)"""
+        return {
+            'states': self.states[indices],
+            'actions': self.actions[indices],
+            'rewards': self.rewards[indices],
+            'next_states': self.next_states[indices],
+            'dones': self.dones[indices]
+        }
+
+    def sample(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """Случайный батч; индексы переходов возвращаются в batch['indices']"""
+        indices = self.sample_indices(batch_size)
+        batch = self.gather(indices)
+        batch['indices'] = indices
+        return batch
+
+    @staticmethod
+    def to_tensors(batch: Dict[str, np.ndarray], device: torch.device) -> Tuple[torch.Tensor, ...]:
+        """(states, actions, rewards, next_states, dones); actions/rewards/dones формы (B, 1)"""
+        return (
+            torch.from_numpy(batch['states']).to(device),
+            torch.from_numpy(batch['actions']).unsqueeze(1).to(device),
+            torch.from_numpy(batch['rewards']).unsqueeze(1).to(device),
+            torch.from_numpy(batch['next_states']).to(device),
+            torch.from_numpy(batch['dones']).unsqueeze(1).to(device)
+        )
+
+    def save(self, path: str):
+        """Сохранение заполненной части буфера в .npz (в порядке от старых к новым)"""
+        order = (self.position - self.size + np.arange(self.size)) % self.capacity
+        np.savez(path, capacity=self.capacity, **self.gather(order))
+        logger.info(f"Replay buffer saved: {self.size} transitions -> {path}")
+
+    def load(self, path: str):
+        """Загрузка переходов из .npz (при меньшей емкости остаются самые новые)"""
+        with np.load(path) as data:
+            count = min(len(data['actions']), self.capacity)
+            if count:
+                self.push_batch(data['states'][-count:], data['actions'][-count:], data['rewards'][-count:],
+                                data['next_states'][-count:], data['dones'][-count:])
+        logger.info(f"Replay buffer loaded: {count} transitions from {path}")
+
+class SumTree:
+    """Двоичное дерево сумм приоритетов в одном массиве.
+
+    Листья — приоритеты переходов, каждый внутренний узел — сумма детей;
+    корень tree[1] — сумма всех приоритетов. Выборка пропорционально
+    приоритету и обновление — O(log N), оба векторизованы по батчу.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.leaf_offset = 2 ** self.depth
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[self.leaf_offset + np.asarray(indices)]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        """Записать приоритеты листьев и пересчитать суммы на пути к корню"""
+        nodes = self.leaf_offset + np.asarray(indices, dtype=np.int64)
+        self.tree[nodes] = priorities
+        # Повторяющиеся родители безопасны: в них пишется одна и та же сумма
+        for _ in range(self.depth):
+            nodes //= 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Индексы листьев, в чьи отрезки префиксных сумм попадают values"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaf_offset
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Prioritized experience replay (пропорциональный вариант) поверх ReplayBuffer.
+
+    P(i) ~ p_i^alpha; смещение компенсируется весами importance sampling
+    (N * P(i))^-beta, нормированными на максимум в батче; beta растет до 1.
+    Новые переходы получают максимальный приоритет, чтобы быть выбранными хотя бы раз.
+    """
+    def __init__(self, capacity: int, state_dim: int, alpha: float = 0.6, beta: float = 0.4,
+                 beta_increment: float = 0.001, epsilon: float = 1e-3, seed: Optional[int] = None):
+        super().__init__(capacity, state_dim, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def push(self, state: np.ndarray, action: int, reward: float,
+             next_state: np.ndarray, done: bool) -> int:
+        index = super().push(state, action, reward, next_state, done)
+        self.tree.update(np.array([index]), np.array([self.max_priority ** self.alpha]))
+        return index
+
+    def push_batch(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+                   next_states: np.ndarray, dones: np.ndarray) -> np.ndarray:
+        indices = super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, np.full(len(indices), self.max_priority ** self.alpha))
+        return indices
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Стратифицированная выборка: по одному значению из каждого из batch_size отрезков"""
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        # Защита от ошибок округления на правой границе
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def sample(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """Батч с весами importance sampling в batch['weights']"""
+        batch = super().sample(batch_size)
+        probabilities = self.tree.get(batch['indices']) / self.tree.total
+        weights = (self.size * probabilities) ** -self.beta
+        batch['weights'] = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
+        """Батчевое обновление приоритетов по TD-ошибкам |delta| + epsilon"""
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+def create_replay_buffer(config, state_dim: int) -> ReplayBuffer:
+    """Replay-буфер по ModelConfig.replay_type ("uniform" или "prioritized")"""
+    if config.replay_type == "prioritized":
+        return PrioritizedReplayBuffer(config.memory_size, state_dim, alpha=config.per_alpha,
+                                       beta=config.per_beta, beta_increment=config.per_beta_increment)
+    if config.replay_type == "uniform":
+        return ReplayBuffer(config.memory_size, state_dim)
+    raise ValueError(f"Unknown replay type: {config.replay_type}")
@@ -0,0 +1,16 @@
+# File: agents/factory.py
+from .dqn_agent import DQNAgent
+from .candidate_agent import CandidateDQNAgent
+from .hierarchical_agent import HierarchicalDQNAgent
+
+def create_agent(config, state_dim: int, action_dim: int, article_db) -> DQNAgent:
+    """Агент по ModelConfig.action_mode"""
+    if config.action_mode == "candidates":
+        # Агент оценивает только top-K кандидатов из векторного индекса
+        return CandidateDQNAgent(state_dim, article_db, config)
+    if config.action_mode == "hierarchical":
+        # Двухуровневый выбор: кластер статей, затем статья внутри кластера
+        return HierarchicalDQNAgent(state_dim, article_db, config)
+    if config.action_mode == "flat":
+        return DQNAgent(state_dim, action_dim, config)
+    raise ValueError(f"Unknown action mode: {config.action_mode}")
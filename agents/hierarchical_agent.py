@@ -0,0 +1,197 @@
+# File: agents/hierarchical_agent.py
+import torch
+import torch.nn as nn
+import numpy as np
+import random
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from database.vector_index import assign_to_centroids, train_centroids
+from .dqn_agent import DQNAgent
+
+logger = logging.getLogger(__name__)
+
+class ArticleClusters:
+    """Офлайн-кластеризация статей для двухуровневой политики (кластер -> статья)"""
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int64)
+        self._members = self._group_members(self.assignments)
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, n_clusters: int = 0,
+              iters: int = 10, seed: int = 0) -> "ArticleClusters":
+        """k-means по эмбеддингам статей; по умолчанию ~sqrt(N) кластеров"""
+        n_clusters = n_clusters or max(1, int(np.sqrt(len(embeddings))))
+        centroids = train_centroids(embeddings, n_clusters, iters, seed)
+        clusters = cls(centroids, assign_to_centroids(embeddings, centroids))
+        logger.info(f"Built {clusters.n_clusters} article clusters for {len(embeddings)} articles")
+        return clusters
+
+    def _group_members(self, assignments: np.ndarray) -> List[np.ndarray]:
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def members(self, cluster_id: int) -> np.ndarray:
+        """id статей кластера"""
+        return self._members[cluster_id]
+
+    def add(self, article_ids: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """Вставка новых статей в ближайшие существующие кластеры (без переобучения головы)"""
+        article_ids = np.asarray(article_ids, dtype=np.int64)
+        assignments = assign_to_centroids(np.asarray(embeddings, dtype=np.float32), self.centroids)
+
+        size = max(len(self.assignments), int(article_ids.max()) + 1)
+        if size > len(self.assignments):
+            grown = np.full(size, -1, dtype=np.int64)
+            grown[:len(self.assignments)] = self.assignments
+            self.assignments = grown
+        self.assignments[article_ids] = assignments
+
+        for cluster_id in np.unique(assignments):
+            self._members[cluster_id] = np.concatenate(
+                [self._members[cluster_id], article_ids[assignments == cluster_id]]
+            )
+        return assignments
+
+    def memory_bytes(self) -> int:
+        """Память, занимаемая центроидами и списками членов"""
+        return (self.centroids.nbytes + self.assignments.nbytes +
+                sum(members.nbytes for members in self._members))
+
+class HierarchicalDQN(nn.Module):
+    """Двухуровневая Q-сеть.
+
+    cluster_head выдает Q для каждого кластера, article_query — вектор запроса,
+    скалярное произведение которого с эмбеддингом статьи дает Q статьи внутри
+    кластера. Параметры не зависят от числа статей, только от числа кластеров.
+    """
+    def __init__(self, state_dim: int, n_clusters: int, article_dim: int, hidden_dim: int = 256):
+        super(HierarchicalDQN, self).__init__()
+        self.trunk = nn.Sequential(
+            nn.Linear(state_dim, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, hidden_dim // 2),
+            nn.ReLU()
+        )
+        self.cluster_head = nn.Linear(hidden_dim // 2, n_clusters)
+        self.article_query = nn.Linear(hidden_dim // 2, article_dim)
+
+    def forward(self, state: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        hidden = self.trunk(state)
+        return self.cluster_head(hidden), self.article_query(hidden)
+
+def greedy_hierarchical_actions(network: HierarchicalDQN, clusters: ArticleClusters,
+                                article_embeddings: np.ndarray,
+                                states: torch.Tensor) -> Tuple[List[int], List[float]]:
+    """Жадный выбор для батча: лучший кластер, затем лучшая статья внутри него.
+
+    Сеть вызывается один раз на весь батч. Стоимость на состояние O(C + N/C)
+    вместо O(N); при C ~ sqrt(N) это O(sqrt(N)).
+    """
+    cluster_q, article_query = network(states)
+    ranked_clusters = torch.argsort(cluster_q, dim=1, descending=True).cpu().numpy()
+
+    actions, q_values = [], []
+    for row, ranking in enumerate(ranked_clusters):
+        for cluster_id in ranking:
+            members = clusters.members(cluster_id)
+            if len(members) > 0:
+                break
+        embeddings = torch.from_numpy(np.asarray(article_embeddings[members], dtype=np.float32))
+        article_q = embeddings.to(article_query.device) @ article_query[row]
+        best = article_q.argmax().item()
+        actions.append(int(members[best]))
+        q_values.append(article_q[best].item())
+    return actions, q_values
+
+class HierarchicalDQNAgent(DQNAgent):
+    """DQN с иерархическим выбором действия (кластер -> статья) для больших корпусов"""
+    def __init__(self, state_dim: int, article_db, config, clusters: Optional[ArticleClusters] = None):
+        self.article_db = article_db
+        self.clusters = clusters or ArticleClusters.build(
+            np.asarray(article_db.article_embeddings, dtype=np.float32), config.n_clusters
+        )
+        super().__init__(state_dim, len(article_db.get_all_articles()), config)
+
+    def _build_network(self, state_dim: int, action_dim: int) -> nn.Module:
+        article_dim = self.article_db.article_embeddings.shape[1]
+        return HierarchicalDQN(state_dim, self.clusters.n_clusters, article_dim, self.config.hidden_dim)
+
+    def add_articles(self, article_ids: np.ndarray, embeddings: np.ndarray):
+        """Добавить новые статьи в существующие кластеры"""
+        self.clusters.add(article_ids, embeddings)
+        self.action_dim = max(self.action_dim, int(np.max(article_ids)) + 1)
+
+    def select_action(self, state: np.ndarray, training: bool = True) -> int:
+        """Выбор действия с использованием epsilon-greedy стратегии"""
+        if training and random.random() < self.epsilon:
+            action = random.randint(0, self.action_dim - 1)
+            logger.debug(f"Random action: {action}, epsilon: {self.epsilon:.3f}")
+            return action
+
+        state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0).to(self.device)
+        with torch.no_grad():
+            actions, q_values = greedy_hierarchical_actions(
+                self.policy_net, self.clusters, self.article_db.article_embeddings, state_tensor
+            )
+        logger.debug(f"Network action: {actions[0]}, q: {q_values[0]:.3f}")
+        return actions[0]
+
+    def select_actions(self, states: np.ndarray, training: bool = False) -> np.ndarray:
+        """Выбор действий для батча состояний (при training — epsilon-greedy)"""
+        states_tensor = torch.as_tensor(np.asarray(states, dtype=np.float32)).to(self.device)
+        with torch.no_grad():
+            actions, _ = greedy_hierarchical_actions(
+                self.policy_net, self.clusters, self.article_db.article_embeddings, states_tensor
+            )
+        actions = np.asarray(actions, dtype=np.int64)
+        return self._explore(actions) if training else actions
+
+    def _current_q_values(self, states: torch.Tensor, actions: torch.Tensor) -> torch.Tensor:
+        """Q кластера и Q статьи для выбранных действий, форма (B, 2)"""
+        article_ids = actions.cpu().numpy().reshape(-1)
+        cluster_ids = torch.from_numpy(self.clusters.assignments[article_ids]).unsqueeze(1).to(self.device)
+        embeddings = torch.from_numpy(
+            np.asarray(self.article_db.article_embeddings[article_ids], dtype=np.float32)
+        ).to(self.device)
+
+        cluster_q, article_query = self.policy_net(states)
+        cluster_values = cluster_q.gather(1, cluster_ids)
+        article_values = (article_query * embeddings).sum(dim=1, keepdim=True)
+        return torch.cat([cluster_values, article_values], dim=1)
+
+    def _next_q_values(self, next_states: torch.Tensor) -> torch.Tensor:
+        """Q_target статьи, которую выбрал бы жадный иерархический выбор, форма (B, 1).
+
+        Цель общая для обеих голов, но бутстрап идет от Q статьи, а не от max Q
+        кластера: иначе голова статей учится лишь повторять значение кластера.
+        """
+        _, q_values = greedy_hierarchical_actions(
+            self.target_net, self.clusters, self.article_db.article_embeddings, next_states
+        )
+        return torch.tensor(q_values, dtype=torch.float32, device=self.device).unsqueeze(1)
+
+    def _checkpoint(self) -> Dict:
+        """Checkpoint хранит и кластеризацию: голова кластеров привязана к ней"""
+        checkpoint = super()._checkpoint()
+        checkpoint['clusters'] = {
+            'centroids': torch.from_numpy(self.clusters.centroids),
+            'assignments': torch.from_numpy(self.clusters.assignments)
+        }
+        return checkpoint
+
+    def _restore(self, checkpoint: Dict):
+        if 'clusters' in checkpoint:
+            self.clusters = ArticleClusters(
+                checkpoint['clusters']['centroids'].cpu().numpy(),
+                checkpoint['clusters']['assignments'].cpu().numpy()
+            )
+            # Число кластеров могло измениться — пересоздаем сети под него
+            self._init_networks()
+        super()._restore(checkpoint)
@@ -0,0 +1,101 @@
+# File: agents/inference_export.py
+import json
+import os
+import threading
+import warnings
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .dqn_agent import SimpleDQN
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = "metadata.json"
+
+def supports_export(agent) -> bool:
+    """Экспортируется только плоская Q-голова SimpleDQN (кандидатный и
+    иерархический агенты обращаются к базе статей при выборе действия)"""
+    return isinstance(getattr(agent, 'policy_net', None), SimpleDQN)
+
+def export_policy(agent, path: str, quantize: bool = False, metadata: Optional[Dict] = None):
+    """Сохранить политику агента как TorchScript-артефакт только для инференса.
+
+    Сеть копируется в eval-режиме на CPU; при quantize Linear-слои
+    квантуются динамически в int8 (веса int8, активации квантуются на лету).
+    Модуль замораживается (веса становятся константами графа) и
+    оптимизируется для инференса; оптимизатор и target-сеть не сохраняются.
+    """
+    if not supports_export(agent):
+        raise ValueError(f"Inference export is not supported for {type(agent).__name__}")
+
+    network = SimpleDQN(agent.state_dim, agent.action_dim, agent.config.hidden_dim)
+    network.load_state_dict({k: v.cpu() for k, v in agent.policy_net.state_dict().items()})
+    network.eval()
+
+    with warnings.catch_warnings():
+        # torch.jit и eager-квантование помечены deprecated, но поддерживаются
+        warnings.simplefilter("ignore")
+        if quantize:
+            network = torch.ao.quantization.quantize_dynamic(network, {nn.Linear}, dtype=torch.qint8)
+        scripted = torch.jit.freeze(torch.jit.script(network))
+        if not quantize:
+            scripted = torch.jit.optimize_for_inference(scripted)
+
+        info = dict(metadata or {}, state_dim=agent.state_dim, action_dim=agent.action_dim,
+                    quantized=quantize, format="torchscript")
+        tmp_path = f"{path}.tmp"
+        torch.jit.save(scripted, tmp_path, _extra_files={METADATA_FILE: json.dumps(info)})
+    os.replace(tmp_path, path)
+    logger.info(f"Exported {'int8 ' if quantize else ''}inference policy to {path}")
+    return info
+
+class InferencePolicy:
+    """Политика для сервинга из TorchScript-артефакта export_policy.
+
+    Интерфейс совпадает с жадной частью DQNAgent (select_action /
+    select_actions), поэтому InferenceEngine работает с ней без изменений.
+    Входные данные копируются в заранее выделенный буфер, forward идет под
+    torch.inference_mode; число потоков intra-op задается явно.
+    """
+    def __init__(self, path: str, num_threads: int = 0, max_batch_size: int = 64):
+        extra_files = {METADATA_FILE: ""}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.module = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+        self.module.eval()
+        self.metadata: Dict = json.loads(extra_files[METADATA_FILE])
+        self.state_dim = self.metadata['state_dim']
+        self.action_dim = self.metadata['action_dim']
+        self.quantized = self.metadata['quantized']
+        self.epsilon = 0.0
+
+        if num_threads > 0:
+            # Настройка процесса целиком — как EncoderConfig.num_threads
+            torch.set_num_threads(num_threads)
+        self._input = torch.zeros((max_batch_size, self.state_dim), dtype=torch.float32)
+        self._lock = threading.Lock()
+        logger.info(f"Inference policy loaded from {path}: state_dim={self.state_dim}, "
+                    f"action_dim={self.action_dim}, quantized={self.quantized}, "
+                    f"threads={torch.get_num_threads()}")
+
+    def q_values(self, states: np.ndarray) -> np.ndarray:
+        """Q-значения для батча состояний (B, action_dim)"""
+        states = np.asarray(states, dtype=np.float32).reshape(-1, self.state_dim)
+        count = len(states)
+        with self._lock, torch.inference_mode():
+            if count > len(self._input):
+                self._input = torch.zeros((count, self.state_dim), dtype=torch.float32)
+            batch = self._input[:count]
+            batch.copy_(torch.from_numpy(states))
+            return self.module(batch).numpy()
+
+    def select_actions(self, states: np.ndarray, training: bool = False) -> np.ndarray:
+        """Жадный выбор для батча состояний (training игнорируется — политика только для сервинга)"""
+        return self.q_values(states).argmax(1)
+
+    def select_action(self, state: np.ndarray, training: bool = False) -> int:
+        return int(self.select_actions(state)[0])
@@ -1,35 +1,72 @@
 # File: api/app.py
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
-from typing import Dict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi import Depends, Form
 from fastapi.security import OAuth2PasswordRequestForm
 import os
 from security import create_access_token, get_current_user, TokenData
-from auth.user_db import UserDatabase
-from .schemas import QuestionRequest, RecommendationResponse, SessionStatsResponse
+from auth.user_db import UserDatabase, hash_password, verify_password
+from config.settings import Config
+from models.encoder_registry import registry_memory_usage
+from .corpus_reload import CorpusSnapshot
+from .executors import ExecutionLayer, ExecutorSaturatedError
+from .inference_engine import EngineOverloadedError, InferenceEngine
+from .schemas import HistoryPageResponse, QuestionRequest, RecommendationResponse, SessionStatsResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RecommendationAPI:
-    def __init__(self, article_db, session_manager, env, agent, response_generator):
-        self.article_db = article_db
+    def __init__(self, article_db, session_manager, env, agent, response_generator,
+                 inference_engine=None, executors=None, user_db=None, background_trainer=None,
+                 corpus_reloader=None):
+        # База статей, среда и генератор ответов подменяются вместе (горячая перезагрузка корпуса)
+        self.snapshot = CorpusSnapshot(article_db, env, response_generator)
         self.session_manager = session_manager
-        self.env = env
+        # Число сессий для /health: считается один раз при старте и растет, когда
+        # add_interaction в /ask создает сессию, чтобы /health не ждал блокировку менеджера и диск
+        self.sessions_count = session_manager.session_count()
         self.agent = agent
-        self.response_generator = response_generator
-        self.user_db = UserDatabase()
+        self.corpus_reloader = corpus_reloader
+        # Пока политика обучается в фоне, /ask отвечает поиском по схожести
+        self.background_trainer = background_trainer
+        self.policy_ready = background_trainer is None
+        # Микро-батчинг encode + forward для конкурентных /ask
+        self.inference_engine = inference_engine or InferenceEngine(
+            env.state_encoder, agent, Config.inference
+        )
+        self.inference_engine.start()
+        # Блокирующая работа (CPU, argon2, диск) выполняется вне event loop
+        self.executors = executors or ExecutionLayer(Config.execution)
+        self.user_db = user_db or UserDatabase(Config.USERS_PATH)
         if not self.user_db.get_user("admin"):
             self.user_db.create_user("admin", "admin")
-        self.app = FastAPI(title="RL Recommendation System API")
+        self.app = FastAPI(title="RL Recommendation System API", lifespan=self.lifespan)
         self.setup_middleware()
+        self.setup_exception_handlers()
         self.setup_routes()
         self.setup_static_files()
 
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        """Жизненный цикл приложения: запуск фонового обучения, остановка фоновых потоков при завершении"""
+        if self.background_trainer is not None:
+            self.background_trainer.start(on_ready=self.swap_agent)
+        if self.corpus_reloader is not None:
+            self.corpus_reloader.start(on_swap=self.swap_corpus, is_busy=self._reload_blocker)
+        yield
+        if self.corpus_reloader is not None:
+            self.corpus_reloader.stop()
+        self.inference_engine.stop()
+        self.executors.shutdown()
+        self.session_manager.close()
+
     def setup_middleware(self):
         """Настройка CORS middleware"""
         self.app.add_middleware(
@@ -40,6 +77,19 @@ class RecommendationAPI:
             allow_headers=["*"],
         )
     
+    def setup_exception_handlers(self):
+        """Переполненные очереди исполнителей -> 503"""
+        async def overloaded_handler(request, exc):
+            logger.warning(f"Request rejected: {exc}")
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is overloaded, try again later"},
+                headers={"Retry-After": "1"}
+            )
+        
+        self.app.add_exception_handler(ExecutorSaturatedError, overloaded_handler)
+        self.app.add_exception_handler(EngineOverloadedError, overloaded_handler)
+    
     def setup_static_files(self):
         """Настройка статических файлов для фронтенда"""
         # Создаем директорию frontend если не существует
@@ -48,17 +98,100 @@ class RecommendationAPI:
         # Mount static files
         self.app.mount("/static", StaticFiles(directory="frontend"), name="static")
     
+    @property
+    def article_db(self):
+        return self.snapshot.article_db
+
+    @property
+    def env(self):
+        return self.snapshot.env
+
+    @property
+    def response_generator(self):
+        return self.snapshot.response_generator
+
+    def swap_corpus(self, snapshot: CorpusSnapshot, agent):
+        """Атомарная подмена корпуса и политики (из потока CorpusReloader).
+
+        Снимок подменяется раньше агента: новые статьи получают id в конце,
+        поэтому любой id, выбранный старым или новым агентом, есть в базе,
+        которую /ask читает после выбора. Запросы в полете дорабатывают на
+        тех объектах, ссылки на которые уже взяли.
+        """
+        self.snapshot = snapshot
+        self.agent = agent
+        self.inference_engine.swap_agent(agent)
+        logger.info(f"Serving corpus of {len(snapshot.article_db.get_all_articles())} articles")
+
+    def _require_reload_admin(self, current_user: TokenData):
+        """Доступ к /admin/reload: только настроенный Config.reload.admin_user"""
+        admin_user = Config.reload.admin_user
+        if self.corpus_reloader is None or admin_user is None:
+            raise HTTPException(status_code=404, detail="Corpus reload is disabled")
+        if current_user.user_id != admin_user:
+            raise HTTPException(status_code=403, detail="Access forbidden")
+
+    def _reload_blocker(self) -> Optional[str]:
+        """Причина отложить перезагрузку корпуса или None"""
+        if not self.policy_ready:
+            return "policy is still training in the background"
+        return None
+
+    def swap_agent(self, agent, full_agent=None):
+        """Атомарная подмена политики обученной копией (из потока BackgroundTrainer).
+
+        agent отвечает на /ask (может быть инференс-артефактом), full_agent —
+        обученный полный агент, от которого расширяется политика при перезагрузке корпуса.
+        """
+        full_agent = full_agent or agent
+        if self.corpus_reloader is not None and hasattr(full_agent, 'add_articles'):
+            self.corpus_reloader.agent = full_agent
+        self.agent = agent
+        self.inference_engine.swap_agent(agent)
+        self.policy_ready = True
+        logger.info("Trained policy is now serving /ask")
+
+    def _retrieve_article_id(self, question: str) -> int:
+        """Fallback до готовности политики: ближайшая статья из векторного индекса"""
+        results = self.article_db.search_similar_articles(question, top_k=1)
+        return results[0]['id'] if results else -1
+
+    def readiness(self) -> Dict:
+        """Фаза готовности для балансировщиков: ready — ответы дает обученная политика"""
+        status = self.background_trainer.status() if self.background_trainer is not None else {'phase': 'ready'}
+        return {
+            'ready': self.policy_ready,
+            'phase': 'ready' if self.policy_ready else status['phase'],
+            'serving': 'policy' if self.policy_ready else 'similarity_search',
+            'training': status
+        }
+
+    def _score_and_answer(self, snapshot: CorpusSnapshot, question: str, article: Dict):
+        """CPU-часть обработки /ask после выбора статьи"""
+        reward = snapshot.env.calculate_reward_for_query(question, article)
+        response_data = snapshot.response_generator.generate_answer(question, article)
+        return reward, response_data
+
     def setup_routes(self):
         @self.app.post("/register")
         async def register(form_data: OAuth2PasswordRequestForm = Depends()):
-            success = self.user_db.create_user(form_data.username, form_data.password)
+            # С SQLite-бэкендом get_user — запрос к БД, поэтому вне event loop
+            if await self.executors.persistence.run(self.user_db.get_user, form_data.username):
+                raise HTTPException(status_code=400, detail="Username already exists")
+            hashed = await self.executors.hashing.run(hash_password, form_data.password)
+            success = await self.executors.persistence.run(
+                self.user_db.add_user, form_data.username, hashed
+            )
             if not success:
                 raise HTTPException(status_code=400, detail="Username already exists")
             return {"message": "User created successfully"}
 
         @self.app.post("/login")
         async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-            if not self.user_db.authenticate_user(form_data.username, form_data.password):
+            user = await self.executors.persistence.run(self.user_db.get_user, form_data.username)
+            if not user or not await self.executors.hashing.run(
+                verify_password, form_data.password, user["hashed_password"]
+            ):
                 raise HTTPException(status_code=401, detail="Invalid credentials")
             token = create_access_token(data={"sub": form_data.username})
             return {"access_token": token, "token_type": "bearer"}
@@ -66,7 +199,7 @@ class RecommendationAPI:
         @self.app.get("/users")
         async def get_all_users(current_user: TokenData = Depends(get_current_user)):
             """Получение списка всех пользователей (только имена)"""
-            usernames = list(self.user_db.users.keys())
+            usernames = await self.executors.persistence.run(self.user_db.list_usernames)
             return {"users": usernames, "total": len(usernames)}
 
         @self.app.get("/")
@@ -81,32 +214,31 @@ class RecommendationAPI:
             """Основной endpoint для вопросов"""
             try:
                 user_id = current_user.user_id
-                # Создаем или получаем сессию
-                if user_id not in self.session_manager.sessions:
-                    self.session_manager.create_session(user_id)
-                
-                # Получаем состояние на основе вопроса
-                state = self.env.reset(request.question)
-                
-                # Агент выбирает статью
-                article_id = self.agent.select_action(state, training=False)
-                recommended_article = self.article_db.get_article(article_id)
+                if self.policy_ready:
+                    # Кодирование вопроса и выбор статьи агентом — батчем
+                    # вместе с другими конкурентными запросами
+                    article_id = await asyncio.wrap_future(self.inference_engine.submit(request.question))
+                else:
+                    article_id = await self.executors.inference.run(self._retrieve_article_id, request.question)
+                # Снимок корпуса берется после выбора статьи и не меняется до конца запроса
+                snapshot = self.snapshot
+                recommended_article = snapshot.article_db.get_article(article_id)
                 
                 if not recommended_article:
                     raise HTTPException(status_code=404, detail="Article not found")
                 
-                # Вычисляем reward (в продакшене это делал бы пользователь)
-                reward = self.env._calculate_reward(recommended_article)
-                
-                # Сохраняем взаимодействие
-                self.session_manager.add_interaction(
-                    user_id, request.question, recommended_article, reward
+                # Reward (в продакшене его давал бы пользователь) и текст ответа
+                reward, response_data = await self.executors.inference.run(
+                    self._score_and_answer, snapshot, request.question, recommended_article
                 )
                 
-                # Генерируем ответ
-                response_data = self.response_generator.generate_answer(
-                    request.question, recommended_article
+                # Сохраняем взаимодействие; сессия создается атомарно вместе с первым ходом
+                created = await self.executors.persistence.run(
+                    self.session_manager.add_interaction,
+                    user_id, request.question, recommended_article, reward
                 )
+                if created:
+                    self.sessions_count += 1
                 
                 return RecommendationResponse(
                     answer=response_data["answer"],
@@ -116,6 +248,8 @@ class RecommendationAPI:
                     confidence=response_data["recommended_article"]["confidence"]
                 )
                 
+            except (HTTPException, EngineOverloadedError, ExecutorSaturatedError):
+                raise
             except Exception as e:
                 logger.error(f"Error processing question: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -129,10 +263,29 @@ class RecommendationAPI:
                 raise HTTPException(status_code=403, detail="Access forbidden")
 
             """Получение статистики сессии"""
-            stats = self.session_manager.get_session_stats(user_id)
+            stats = await self.executors.persistence.run(self.session_manager.get_session_stats, user_id)
             if not stats:
                 raise HTTPException(status_code=404, detail="Session not found")
             return SessionStatsResponse(**stats)
+
+        @self.app.get("/session/{user_id}/history", response_model=HistoryPageResponse)
+        async def get_session_history(
+            user_id: str,
+            cursor: Optional[int] = None,
+            limit: int = 20,
+            current_user: TokenData = Depends(get_current_user)
+        ):
+            """История сессии постранично, от новых ходов к старым"""
+            if current_user.user_id != user_id:
+                raise HTTPException(status_code=403, detail="Access forbidden")
+            if not 1 <= limit <= 100:
+                raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+            # Старые страницы читаются из архива на диске — вне event loop
+            page = await self.executors.persistence.run(
+                self.session_manager.get_history_page, user_id, cursor, limit
+            )
+            return HistoryPageResponse(user_id=user_id, **page)
         
         @self.app.get("/articles")
         async def get_articles():
@@ -145,9 +298,29 @@ class RecommendationAPI:
             """Health check endpoint"""
             return {
                 "status": "healthy",
+                "readiness": self.readiness(),
+                "corpus": self.corpus_reloader.status() if self.corpus_reloader is not None else None,
                 "articles_count": len(self.article_db.get_all_articles()),
-                "sessions_count": len(self.session_manager.sessions)
+                "sessions_count": self.sessions_count,
+                "encoders": registry_memory_usage(),
+                "query_cache": self.env.state_encoder.query_cache.stats(),
+                "inference": self.inference_engine.stats(),
+                "executors": self.executors.stats()
             }
+        @self.app.post("/admin/reload", status_code=202)
+        async def reload_corpus(current_user: TokenData = Depends(get_current_user)):
+            """Перезагрузка корпуса в фоне (новые статьи из ARTICLES_PATH)"""
+            self._require_reload_admin(current_user)
+            refused = self.corpus_reloader.trigger(reason=f"requested by {current_user.user_id}")
+            if refused:
+                raise HTTPException(status_code=409, detail=refused)
+            return self.corpus_reloader.status()
+        
+        @self.app.get("/admin/reload")
+        async def reload_status(current_user: TokenData = Depends(get_current_user)):
+            self._require_reload_admin(current_user)
+            return self.corpus_reloader.status()
+        
         @self.app.get("/chat")
         async def chat_interface():
             """Serve the chat interface"""
@@ -0,0 +1,211 @@
+# File: api/corpus_reload.py
+import copy
+import os
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Фазы перезагрузки корпуса (отдаются в /health и /admin/reload)
+PHASE_IDLE = "idle"            # сервинг на текущем снимке
+PHASE_RELOADING = "reloading"  # новый снимок строится в фоне
+PHASE_FAILED = "failed"        # последняя перезагрузка не удалась, сервинг на прежнем снимке
+
+
+class CorpusSnapshot:
+    """Согласованный набор объектов, завязанных на корпус статей.
+
+    Подменяется одной операцией присваивания: запрос, взявший ссылку на
+    снимок, работает с одной версией базы, среды и генератора ответов.
+    """
+    __slots__ = ('article_db', 'env', 'response_generator')
+
+    def __init__(self, article_db, env, response_generator):
+        self.article_db = article_db
+        self.env = env
+        self.response_generator = response_generator
+
+
+class CorpusReloader:
+    """Горячая перезагрузка корпуса в работающем сервере.
+
+    Новый ArticleDatabase строится в фоновом потоке из ARTICLES_PATH (кэш
+    эмбеддингов content-addressed, поэтому кодируются только новые статьи).
+    Id статей должны сохраниться (новые — в конце, как после database.ingest).
+    Политика переносится на расширенный корпус: совместимый checkpoint
+    загружается, иначе переносится checkpoint прежнего корпуса (add_articles
+    расширяет выходной слой с сохранением весов), иначе расширяется копия
+    текущего агента. Готовые снимок и агент передаются в on_swap.
+
+    Запуск — вручную (trigger, POST /admin/reload) или опросом времени
+    изменения файла статей (watch).
+    """
+    def __init__(self, snapshot: CorpusSnapshot, agent, state_encoder, config,
+                 checkpoints=None):
+        self.snapshot = snapshot
+        self.agent = agent  # полный агент (не инференс-артефакт) для расширения
+        self.state_encoder = state_encoder
+        self.config = config
+        self.checkpoints = checkpoints
+        self.on_swap: Optional[Callable[[CorpusSnapshot, object], None]] = None
+        self.is_busy: Callable[[], Optional[str]] = lambda: None
+
+        self.phase = PHASE_IDLE
+        self.error: Optional[str] = None
+        self.reloads = 0
+        self.last_result: Dict = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._loaded_mtime = self._articles_mtime()
+
+    def start(self, on_swap: Callable[[CorpusSnapshot, object], None],
+              is_busy: Optional[Callable[[], Optional[str]]] = None):
+        """Подключить подмену снимка и, если включено, наблюдение за файлом.
+
+        is_busy возвращает причину отложить перезагрузку (например, политика
+        еще обучается в фоне) или None.
+        """
+        self.on_swap = on_swap
+        if is_busy is not None:
+            self.is_busy = is_busy
+        if self.config.reload.watch and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="corpus-watcher", daemon=True)
+            self._watcher.start()
+            logger.info(f"Watching {self.config.ARTICLES_PATH} for corpus changes")
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        self.join()
+
+    def join(self, timeout: Optional[float] = None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def trigger(self, reason: str = "manual") -> Optional[str]:
+        """Запустить перезагрузку в фоне; причина отказа или None, если запущена"""
+        busy = self.is_busy()
+        if busy:
+            return busy
+        with self._lock:
+            if self.phase == PHASE_RELOADING:
+                return "reload already in progress"
+            self.phase = PHASE_RELOADING
+            self.error = None
+            self._thread = threading.Thread(target=self._run, args=(reason,), name="corpus-reload", daemon=True)
+            self._thread.start()
+        logger.info(f"Corpus reload started ({reason})")
+        return None
+
+    def _articles_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config.ARTICLES_PATH)
+        except OSError:
+            return None
+
+    def _watch(self):
+        """Опрос времени изменения файла статей; перезагрузка, когда файл
+        перестал меняться на settle_s секунд"""
+        settings = self.config.reload
+        while not self._stop.wait(settings.poll_interval_s):
+            mtime = self._articles_mtime()
+            if mtime is None or mtime == self._loaded_mtime or self.phase == PHASE_RELOADING:
+                continue
+            if time.time() - mtime < settings.settle_s:
+                continue
+            if self.trigger(reason="file changed") is None:
+                self._loaded_mtime = mtime
+
+    def _check_stable_ids(self, old_db, new_db):
+        """Новый корпус обязан продолжать старый: те же URL под теми же id"""
+        old_articles, new_articles = old_db.get_all_articles(), new_db.get_all_articles()
+        if len(new_articles) < len(old_articles):
+            raise ValueError(f"Corpus shrank from {len(old_articles)} to {len(new_articles)} articles")
+        moved = [i for i, (old, new) in enumerate(zip(old_articles, new_articles))
+                 if old.get('url') != new.get('url')]
+        if moved:
+            raise ValueError(f"Article ids changed for {len(moved)} articles (first: {moved[0]}), "
+                             f"restart the server instead")
+
+    def _load_policy(self, new_db, added_ids: np.ndarray):
+        """Полный агент и агент для сервинга под новый корпус"""
+        from agents.factory import create_agent
+        from database.ingest import carry_over_checkpoint
+        from training.checkpoints import checkpoint_metadata
+
+        old_db = self.snapshot.article_db
+        state_dim = self.state_encoder.get_state_dimension()
+        agent = create_agent(self.config.model, state_dim, len(new_db.get_all_articles()), new_db)
+        metadata = checkpoint_metadata(agent, new_db)
+        if self.checkpoints is not None:
+            if self.checkpoints.find_compatible(metadata) is None:
+                # Корпус изменен без database.ingest — переносим checkpoint здесь
+                carry_over_checkpoint(new_db, self.config, old_db.corpus_hash,
+                                      len(old_db.get_all_articles()), added_ids, store=self.checkpoints)
+            if self.checkpoints.load_latest(agent, metadata) is not None:
+                serving_agent = self.checkpoints.load_inference_policy(
+                    metadata, self.config.inference.policy_threads, self.config.inference.max_batch_size
+                )
+                return agent, serving_agent or agent
+
+        # Checkpoint'а нет: расширяем копию текущего агента (сервинг ее не видит).
+        # Он обучен: main.py загружает его из checkpoint'а, а до конца фонового
+        # обучения перезагрузка отклоняется (is_busy)
+        agent = copy.deepcopy(self.agent, memo={id(old_db): new_db})
+        if len(added_ids):
+            agent.add_articles(added_ids, np.asarray(new_db.article_embeddings[added_ids], dtype=np.float32))
+        return agent, agent
+
+    def _run(self, reason: str):
+        from database.article_db import ArticleDatabase
+        from models.response_generator import ResponseGenerator
+        from rl_environment.env import RecommendationEnv
+
+        start = time.time()
+        try:
+            old_db = self.snapshot.article_db
+            new_db = ArticleDatabase(self.config.ARTICLES_PATH, cache_dir=self.config.EMBEDDINGS_CACHE_DIR,
+                                     encoder=old_db.encoder, index_config=old_db.index_config)
+            if new_db.corpus_hash == old_db.corpus_hash:
+                self.last_result = {'reason': reason, 'changed': False, 'articles': len(new_db.get_all_articles())}
+                logger.info("Corpus reload: articles are unchanged, keeping the current snapshot")
+                return
+            self._check_stable_ids(old_db, new_db)
+
+            added_ids = np.arange(len(old_db.get_all_articles()), len(new_db.get_all_articles()))
+            agent, serving_agent = self._load_policy(new_db, added_ids)
+            env = RecommendationEnv(new_db, self.state_encoder, self.config.environment)
+            snapshot = CorpusSnapshot(new_db, env, ResponseGenerator(new_db))
+
+            self.state_encoder.article_db = new_db
+            self.on_swap(snapshot, serving_agent)
+            self.snapshot, self.agent = snapshot, agent
+            self.reloads += 1
+            self.last_result = {'reason': reason, 'changed': True, 'articles': len(new_db.get_all_articles()),
+                                'added': len(added_ids), 'seconds': round(time.time() - start, 2)}
+            logger.info(f"Corpus reloaded: {self.last_result}")
+        except Exception as e:
+            self.error = str(e)
+            self.phase = PHASE_FAILED
+            logger.error(f"Corpus reload failed, keeping the current snapshot: {e}")
+        finally:
+            with self._lock:
+                if self.phase == PHASE_RELOADING:
+                    self.phase = PHASE_IDLE
+
+    def status(self) -> Dict:
+        return {
+            'phase': self.phase,
+            'error': self.error,
+            'reloads': self.reloads,
+            'last_result': self.last_result,
+            'watching': self._watcher is not None
+        }
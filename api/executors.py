@@ -0,0 +1,100 @@
+# File: api/executors.py
+import asyncio
+import functools
+import multiprocessing
+import threading
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class ExecutorSaturatedError(RuntimeError):
+    """Очередь исполнителя заполнена — запрос отклоняется с 503"""
+
+class BoundedExecutor:
+    """Исполнитель с ограниченной очередью.
+
+    max_pending ограничивает число задач (выполняющихся и ожидающих); при
+    переполнении run() сразу бросает ExecutorSaturatedError, а не копит очередь.
+    """
+    def __init__(self, name: str, executor: Executor, max_pending: int):
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Выполнить fn в исполнителе, не блокируя event loop"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self.executor.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        # Слот освобождается, когда задача реально завершилась,
+        # даже если ожидающий запрос был отменен
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class ExecutionLayer:
+    """Выделенные исполнители для блокирующей работы API:
+
+    - inference — CPU-работа вокруг модели (reward, формирование ответа);
+    - hashing — argon2 в пуле процессов (хэширование не отпускает GIL надолго);
+    - persistence — запись сессий и пользователей на диск.
+    """
+    def __init__(self, config):
+        self.inference = BoundedExecutor(
+            "inference",
+            ThreadPoolExecutor(config.inference_workers, thread_name_prefix="inference"),
+            config.inference_queue_size
+        )
+        # spawn: форк процесса с уже запущенными потоками torch небезопасен
+        self.hashing = BoundedExecutor(
+            "hashing",
+            ProcessPoolExecutor(config.hashing_workers, mp_context=multiprocessing.get_context("spawn")),
+            config.hashing_queue_size
+        )
+        self.persistence = BoundedExecutor(
+            "persistence",
+            ThreadPoolExecutor(config.persistence_workers, thread_name_prefix="persistence"),
+            config.persistence_queue_size
+        )
+
+    def stats(self) -> Dict:
+        return {
+            'inference': self.inference.stats(),
+            'hashing': self.hashing.stats(),
+            'persistence': self.persistence.stats()
+        }
+
+    def shutdown(self):
+        for executor in (self.inference, self.hashing, self.persistence):
+            executor.shutdown()
+        logger.info("Execution layer shut down")
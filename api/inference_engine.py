@@ -0,0 +1,164 @@
+# File: api/inference_engine.py
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EngineOverloadedError(RuntimeError):
+    """Очередь движка переполнена — запрос нужно отклонить (503)"""
+
+class Histogram:
+    """Потокобезопасная гистограмма с фиксированными границами корзин"""
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = list(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = {f"le_{bound:g}": count for bound, count in zip(self.buckets, self._counts)}
+            buckets["inf"] = self._counts[-1]
+            return {
+                'buckets': buckets,
+                'count': self._count,
+                'sum': self._sum,
+                'mean': self._sum / self._count if self._count > 0 else 0.0
+            }
+
+class _Request:
+    __slots__ = ('query', 'future', 'enqueued_at')
+
+    def __init__(self, query: str):
+        self.query = query
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+class InferenceEngine:
+    """Динамический микро-батчинг запросов /ask.
+
+    Конкурентные запросы собираются в батч (до max_batch_size или пока не
+    истечет max_wait_ms с момента прихода первого), затем выполняются один
+    батчевый encode и один батчевый forward политики; результаты раздаются
+    ожидающим вызывающим через Future.
+    """
+    def __init__(self, state_encoder, agent, config):
+        self.state_encoder = state_encoder
+        self.agent = agent
+        self.max_batch_size = config.max_batch_size
+        self.max_wait = config.max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue(maxsize=config.max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+        self.batch_size_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_histogram = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250])
+
+    def start(self):
+        """Запуск рабочего потока"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+            self._thread.start()
+            logger.info(f"Inference engine started: max_batch_size={self.max_batch_size}, "
+                        f"max_wait_ms={self.max_wait * 1000:.1f}")
+
+    def stop(self):
+        """Остановка рабочего потока (уже поставленные запросы дообрабатываются)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def swap_agent(self, agent):
+        """Подмена политики: следующий батч пойдет через нового агента"""
+        self.agent = agent
+
+    def submit(self, query: str) -> Future:
+        """Поставить запрос в очередь; Future вернет id рекомендованной статьи"""
+        request = _Request(query)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            raise EngineOverloadedError("Inference queue is full")
+        return request.future
+
+    def recommend(self, query: str, timeout: Optional[float] = None) -> int:
+        """Синхронный вариант submit"""
+        return self.submit(query).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+
+            try:
+                self._process(batch)
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} requests failed: {e}")
+            if stop:
+                return
+
+    def _process(self, batch: List[_Request]):
+        """Один батчевый encode и один батчевый выбор действий на весь батч"""
+        # Отмененные запросы (клиент отключился) выбрасываются из батча; у
+        # оставшихся Future переходит в running и больше не может быть отменен
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started_at = time.monotonic()
+        self.batch_size_histogram.observe(len(batch))
+        for request in batch:
+            self.queue_wait_histogram.observe((started_at - request.enqueued_at) * 1000)
+
+        try:
+            states = np.stack(self.state_encoder.encode_queries([r.query for r in batch]))
+            agent = self.agent  # одна ссылка на весь батч — подмена атомарна
+            actions = agent.select_actions(states)
+        except Exception as e:
+            logger.error(f"Error in batched inference: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        for request, action in zip(batch, actions):
+            request.future.set_result(int(action))
+
+    def stats(self) -> Dict:
+        """Гистограммы размера батча и времени ожидания в очереди (мс)"""
+        return {
+            'queue_size': self._queue.qsize(),
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_ms': self.queue_wait_histogram.snapshot()
+        }
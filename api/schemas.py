@@ -20,6 +20,11 @@ class SessionStatsResponse(BaseModel):
     total_reward: float
     avg_reward: float
 
+class HistoryPageResponse(BaseModel):
+    user_id: str
+    items: List[Dict]
+    next_cursor: Optional[int] = None
+
 class TrainingResponse(BaseModel):
     status: str
     episodes_completed: int
@@ -0,0 +1,50 @@
+# File: auth/sqlite_user_db.py
+from typing import Dict, List, Optional
+
+from database.sqlite_store import SQLiteConnections
+from .user_db import hash_password, verify_password
+
+class SQLiteUserDatabase:
+    """UserDatabase поверх SQLite (таблица users) с теми же методами"""
+    def __init__(self, db_path: str, connections: Optional[SQLiteConnections] = None):
+        self.db_path = db_path
+        self.connections = connections or SQLiteConnections(db_path)
+
+    def get_user(self, username: str) -> Optional[dict]:
+        row = self.connections.get().execute(
+            "SELECT username, hashed_password FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"username": row[0], "hashed_password": row[1]}
+
+    def create_user(self, username: str, password: str) -> bool:
+        if self.get_user(username):
+            return False
+        return self.add_user(username, hash_password(password))
+
+    def add_user(self, username: str, hashed_password: str) -> bool:
+        """Добавление пользователя с уже вычисленным хэшем пароля"""
+        with self.connections.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, hashed_password) VALUES (?, ?)",
+                (username, hashed_password)
+            )
+            return cursor.rowcount == 1
+
+    def import_users(self, users: Dict[str, dict]):
+        """Массовая загрузка пользователей в формате JSON-бэкенда"""
+        with self.connections.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (username, hashed_password) VALUES (?, ?)",
+                ((username, user["hashed_password"]) for username, user in users.items())
+            )
+
+    def list_usernames(self) -> List[str]:
+        return [row[0] for row in self.connections.get().execute("SELECT username FROM users ORDER BY username")]
+
+    def authenticate_user(self, username: str, password: str) -> bool:
+        user = self.get_user(username)
+        if not user:
+            return False
+        return verify_password(password, user["hashed_password"])
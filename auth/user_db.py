@@ -1,10 +1,18 @@
 import json
 import os
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+def hash_password(password: str) -> str:
+    """Хэширование пароля (функция уровня модуля — можно выполнять в пуле процессов)"""
+    return pwd_context.hash(password)
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """Проверка пароля по хэшу"""
+    return pwd_context.verify(password, hashed_password)
+
 class UserDatabase:
     def __init__(self, users_file: str = "data/users.json"):
         self.users_file = users_file
@@ -31,16 +39,24 @@ class UserDatabase:
     def create_user(self, username: str, password: str) -> bool:
         if username in self.users:
             return False
-        hashed = pwd_context.hash(password)
+        return self.add_user(username, hash_password(password))
+    
+    def add_user(self, username: str, hashed_password: str) -> bool:
+        """Добавление пользователя с уже вычисленным хэшем пароля"""
+        if username in self.users:
+            return False
         self.users[username] = {
             "username": username,
-            "hashed_password": hashed
+            "hashed_password": hashed_password
         }
         self._save_users()
         return True
     
+    def list_usernames(self) -> List[str]:
+        return list(self.users.keys())
+    
     def authenticate_user(self, username: str, password: str) -> bool:
         user = self.get_user(username)
         if not user:
             return False
-        return pwd_context.verify(password, user["hashed_password"])
+        return verify_password(password, user["hashed_password"])
@@ -0,0 +1,136 @@
+# File: benchmarks/bench_article_fetcher.py
+"""Бенчмарк загрузки страниц статей: последовательный requests.get с паузой
+0.1 с (прежний ExcelArticleLoader) против ArticleFetcher.
+
+Страницы отдает локальный HTTP-сервер-заглушка на нескольких портах (каждый
+порт — отдельный «хост» со своими лимитами): задержка ответа, поддержка
+ETag/If-None-Match и доля ответов 503 для проверки повторов. ArticleFetcher
+запускается дважды: с пустым HTTP-кэшем и повторно, когда сервер отвечает 304.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_article_fetcher --pages 300 --hosts 3 --latency-ms 50
+"""
+import argparse
+import dataclasses
+import hashlib
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from config.settings import Config
+from database.article_fetcher import ArticleFetcher
+
+
+def page_body(path: str) -> bytes:
+    return (f"<html><head><title>Статья {path}</title></head><body>"
+            f"<p>{'Текст статьи ' * 200}{path}</p></body></html>").encode('utf-8')
+
+
+def make_handler(latency: float, failure_rate: float, rng: random.Random):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            time.sleep(latency)
+            if rng.random() < failure_rate:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = page_body(self.path)
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_servers(n_hosts: int, latency: float, failure_rate: float):
+    """Серверы-заглушки на свободных портах локального хоста"""
+    rng = random.Random(0)
+    servers = []
+    for _ in range(n_hosts):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency, failure_rate, rng))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def fetch_sequential(urls):
+    """Прежний способ: отдельный requests.get на URL и пауза 0.1 с"""
+    ok = 0
+    for url in urls:
+        try:
+            ok += requests.get(url, timeout=10).status_code == 200
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--hosts", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=Config.fetcher.max_workers)
+    parser.add_argument("--per-host", type=int, default=Config.fetcher.per_host_concurrency)
+    parser.add_argument("--rate", type=float, default=20.0, help="запросов в секунду на хост")
+    parser.add_argument("--sequential-pages", type=int, default=50,
+                        help="сколько страниц загрузить последовательно (время экстраполируется)")
+    args = parser.parse_args()
+
+    servers = start_servers(args.hosts, args.latency_ms / 1000, args.failure_rate)
+    urls = [f"http://127.0.0.1:{servers[i % args.hosts].server_address[1]}/article/{i}"
+            for i in range(args.pages)]
+    config = dataclasses.replace(Config.fetcher, max_workers=args.workers, per_host_concurrency=args.per_host,
+                                 per_host_rate=args.rate, backoff_base=0.05, backoff_max=1.0)
+
+    print(f"pages={args.pages} hosts={args.hosts} latency={args.latency_ms}ms failure_rate={args.failure_rate} "
+          f"workers={args.workers} per_host={args.per_host} rate={args.rate}/s")
+    print(f"{'mode':<22}{'seconds':>10}{'pages/s':>10}{'ok':>6}{'304':>6}{'retries':>9}{'errors':>8}")
+
+    sample = urls[:args.sequential_pages]
+    start = time.perf_counter()
+    ok = fetch_sequential(sample)
+    seconds = (time.perf_counter() - start) * len(urls) / len(sample)
+    print(f"{'sequential (est.)':<22}{seconds:>10.1f}{len(urls) / seconds:>10.1f}"
+          f"{round(ok * len(urls) / len(sample)):>6}{'-':>6}{'-':>9}{'-':>8}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in ("fetcher (cold cache)", "fetcher (warm cache)"):
+            with ArticleFetcher(config, cache_dir=cache_dir) as fetcher:
+                start = time.perf_counter()
+                results = fetcher.fetch_many(urls)
+                seconds = time.perf_counter() - start
+            ok = sum(result['content'] == page_body(url[url.index('/', 7):])
+                     for url, result in zip(urls, results))
+            stats = fetcher.stats
+            print(f"{name:<22}{seconds:>10.2f}{len(urls) / seconds:>10.1f}{ok:>6}"
+                  f"{stats['not_modified']:>6}{stats['retries']:>9}{stats['errors']:>8}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
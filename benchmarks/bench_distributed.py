@@ -0,0 +1,95 @@
+# File: benchmarks/bench_distributed.py
+"""Бенчмарк масштабирования обучения actor/learner по числу ядер.
+
+Для каждого числа акторов измеряются шаги сред в секунду (переходы,
+принятые learner'ом) и шаги обучения в секунду; для сравнения —
+однопроцессный RLTrainer.train_vectorized. Корпус и запросы синтетические,
+таблицы схожести строятся напрямую, поэтому модель эмбеддингов не нужна.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_distributed --actors 1 2 4 8 --episodes 20000
+"""
+import argparse
+import dataclasses
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from agents.dqn_agent import DQNAgent
+from benchmarks.bench_vector_index import make_corpus, make_queries
+from config.settings import Config
+from database.embedding_store import EmbeddingStore
+from training.distributed import DistributedTrainer
+from training.similarity_tables import SimilarityTables
+from training.trainer import RLTrainer
+
+
+def make_setup(n_articles: int, n_queries: int, dim: int):
+    """Синтетические корпус, таблицы схожести и запросы (вместо ArticleDatabase и StateEncoder)"""
+    corpus = make_corpus(n_articles, dim, n_topics=max(1, n_articles // 20))
+    query_embeddings = make_queries(corpus, n_queries)
+    queries = [f"query {i}" for i in range(n_queries)]
+    tables = SimilarityTables(queries, query_embeddings, query_embeddings @ corpus.T,
+                              np.zeros(0, dtype=np.int64), np.zeros((0, n_articles), dtype=np.float32))
+    article_db = SimpleNamespace(article_embeddings=EmbeddingStore.from_vectors(corpus))
+    state_encoder = SimpleNamespace(get_state_dimension=lambda: dim)
+    return article_db, state_encoder, tables, queries
+
+
+def bench_vectorized(article_db, state_encoder, tables, queries, episodes: int, num_envs: int):
+    agent = DQNAgent(state_encoder.get_state_dimension(), len(article_db.article_embeddings), Config.model)
+    env = SimpleNamespace(article_db=article_db, state_encoder=state_encoder, similarity_tables=tables)
+    trainer = RLTrainer(env, agent, None, Config.environment)
+    trainer.training_queries = queries
+
+    start = time.perf_counter()
+    trainer.train_vectorized(episodes, num_envs=num_envs)
+    seconds = time.perf_counter() - start
+    # Один learn на шаг батча сред (первые шаги до заполнения батча не учитываются)
+    steps = agent.steps_done
+    return steps * num_envs / seconds, steps / seconds
+
+
+def bench_distributed(article_db, state_encoder, tables, queries, episodes: int, config):
+    agent = DQNAgent(state_encoder.get_state_dimension(), len(article_db.article_embeddings), Config.model)
+    trainer = DistributedTrainer(article_db, state_encoder, Config.environment, agent, queries, config,
+                                 similarity_tables=tables)
+    trainer.train(episodes)
+    stats = trainer.stats()
+    return stats['steps_per_second'], agent.steps_done / stats['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--actors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--envs-per-actor", type=int, default=Config.distributed.envs_per_actor)
+    parser.add_argument("--sync-interval", type=int, default=Config.distributed.sync_interval)
+    parser.add_argument("--learn-steps", type=int, default=Config.distributed.learn_steps)
+    args = parser.parse_args()
+
+    random.seed(0)
+    np.random.seed(0)
+    torch.set_num_threads(1)
+    setup = make_setup(args.articles, args.queries, args.dim)
+
+    print(f"articles={args.articles} episodes={args.episodes} envs_per_actor={args.envs_per_actor} "
+          f"sync_interval={args.sync_interval} learn_steps={args.learn_steps}")
+    print(f"{'mode':<22}{'env steps/s':>14}{'learn steps/s':>15}")
+    env_rate, learn_rate = bench_vectorized(*setup, args.episodes, args.envs_per_actor)
+    print(f"{'vectorized (1 proc)':<22}{env_rate:>14.0f}{learn_rate:>15.0f}")
+    for num_actors in args.actors:
+        config = dataclasses.replace(Config.distributed, num_actors=num_actors, envs_per_actor=args.envs_per_actor,
+                                     sync_interval=args.sync_interval, learn_steps=args.learn_steps)
+        env_rate, learn_rate = bench_distributed(*setup, args.episodes, config)
+        print(f"{f'{num_actors} actors + learner':<22}{env_rate:>14.0f}{learn_rate:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
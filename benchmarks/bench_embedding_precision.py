@@ -0,0 +1,75 @@
+# File: benchmarks/bench_embedding_precision.py
+"""Бенчмарк хранения эмбеддингов статей: float32 против float16 и int8
+(масштаб на строку) в EmbeddingStore.
+
+Для синтетического корпуса из нормализованных векторов сообщаются память
+хранилища, время точного скоринга батча запросов по компактной форме,
+совпадение top-1 и recall@k относительно float32, а также максимальная
+ошибка косинусной схожести.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_embedding_precision --size 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_vector_index import make_corpus, make_queries
+from database.embedding_store import EmbeddingStore
+from database.vector_index import top_k_indices
+
+
+def search(store: EmbeddingStore, queries: np.ndarray, top_k: int, batch_size: int):
+    """Точный top-k по батчам запросов: (ids, scores, секунд на батч)"""
+    ids, scores, seconds = [], [], 0.0
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start:start + batch_size]
+        began = time.perf_counter()
+        batch_scores = store.scores(batch)
+        batch_ids = top_k_indices(batch_scores, top_k)
+        seconds += time.perf_counter() - began
+        ids.append(batch_ids)
+        scores.append(np.take_along_axis(batch_scores, batch_ids, axis=1))
+    n_batches = (len(queries) + batch_size - 1) // batch_size
+    return np.concatenate(ids), np.concatenate(scores), seconds / n_batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size, args.dim, args.topics)
+    queries = make_queries(corpus, args.queries)
+    exact = EmbeddingStore.from_vectors(corpus, "float32")
+    truth_ids, truth_scores, _ = search(exact, queries, args.top_k, args.batch_size)
+
+    print(f"size={args.size} dim={args.dim} queries={args.queries} batch={args.batch_size} k={args.top_k}")
+    print(f"{'precision':<10}{'MiB':>10}{'ratio':>8}{'ms/batch':>10}{'top-1':>8}"
+          f"{f'recall@{args.top_k}':>11}{'max |dcos|':>12}")
+    for precision in ("float32", "float16", "int8"):
+        started = time.perf_counter()
+        store = exact if precision == "float32" else EmbeddingStore.from_vectors(corpus, precision)
+        build_seconds = time.perf_counter() - started
+        ids, _, seconds = search(store, queries, args.top_k, args.batch_size)
+
+        top1 = float((ids[:, 0] == truth_ids[:, 0]).mean())
+        recall = np.mean([len(np.intersect1d(found, truth)) / args.top_k
+                          for found, truth in zip(ids, truth_ids)])
+        # Ошибка косинуса на истинных top-k статьях
+        error = max(float(np.abs(store.scores(query, truth) - truth_score).max())
+                    for query, truth, truth_score in zip(queries, truth_ids, truth_scores))
+        print(f"{precision:<10}{store.nbytes / 2 ** 20:>10.1f}{exact.nbytes / store.nbytes:>8.2f}"
+              f"{seconds * 1000:>10.1f}{top1:>8.3f}{recall:>11.4f}{error:>12.5f}"
+              + (f"   (quantized in {build_seconds:.1f}s)" if precision != "float32" else ""))
+        del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# File: benchmarks/bench_hierarchical_policy.py
+"""Бенчмарк выбора действия: плоская Q-голова против иерархической (кластер -> статья).
+
+Для каждого размера корпуса измеряются латентность жадного выбора (batch=1)
+и память сети / вспомогательных структур.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_hierarchical_policy --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from agents.dqn_agent import SimpleDQN
+from agents.hierarchical_agent import ArticleClusters, HierarchicalDQN, greedy_hierarchical_actions
+from benchmarks.bench_vector_index import make_corpus, make_queries
+
+
+def parameters_bytes(network: torch.nn.Module) -> int:
+    return sum(p.numel() * p.element_size() for p in network.parameters())
+
+
+def mean_latency_ms(select_fn, states: torch.Tensor) -> float:
+    """Средняя латентность выбора действия для одного состояния, мс"""
+    select_fn(states[:1])  # прогрев
+    start = time.perf_counter()
+    for i in range(len(states)):
+        select_fn(states[i:i + 1])
+    return (time.perf_counter() - start) * 1000 / len(states)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--hidden", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    print(f"{'articles':>10} {'policy':<14}{'ms/select':>10}{'network MiB':>13}{'aux MiB':>10}{'build s':>9}")
+
+    for size in args.sizes:
+        embeddings = make_corpus(size, args.dim, n_topics=max(10, size // 100))
+        states = torch.from_numpy(make_queries(embeddings, args.queries))
+
+        with torch.no_grad():
+            flat = SimpleDQN(args.dim, size, args.hidden).eval()
+            flat_ms = mean_latency_ms(lambda s: flat(s).argmax(1), states)
+            print(f"{size:>10} {'flat':<14}{flat_ms:>10.3f}"
+                  f"{parameters_bytes(flat) / 2**20:>13.1f}{0.0:>10.1f}{0.0:>9.1f}")
+            del flat
+
+            start = time.perf_counter()
+            clusters = ArticleClusters.build(embeddings)
+            build_seconds = time.perf_counter() - start
+            hierarchical = HierarchicalDQN(args.dim, clusters.n_clusters, args.dim, args.hidden).eval()
+            hier_ms = mean_latency_ms(
+                lambda s: greedy_hierarchical_actions(hierarchical, clusters, embeddings, s), states
+            )
+            print(f"{size:>10} {'hierarchical':<14}{hier_ms:>10.3f}"
+                  f"{parameters_bytes(hierarchical) / 2**20:>13.1f}"
+                  f"{clusters.memory_bytes() / 2**20:>10.1f}{build_seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
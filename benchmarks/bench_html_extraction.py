@@ -0,0 +1,131 @@
+# File: benchmarks/bench_html_extraction.py
+"""Бенчмарк разбора страниц статей: BeautifulSoup html.parser (прежний
+ExcelArticleLoader) против lxml-извлечения html_extractor в одном процессе
+и в пуле процессов HTMLExtractor.
+
+Корпус — сохраненные HTML-файлы (*.html или тела *.body из HTTP-кэша
+ArticleFetcher) в --fixtures. Если каталог пуст, в него записываются
+синтетические страницы, похожие на Habr (скрипты, стили, навигация,
+комментарии) и на обычные сайты; при повторных запусках используются они.
+Кроме времени сообщается совпадение заголовков и тегов с прежним разбором.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_html_extraction --fixtures benchmarks/fixtures/html --workers 1 4
+"""
+import argparse
+import dataclasses
+import glob
+import os
+import random
+import time
+
+from config.settings import Config
+from database.html_extractor import HTMLExtractor, extract_article, extract_tags
+
+WORDS = ("python django docker kubernetes алгоритм сортировка база данных sql веб javascript "
+         "нейронные сети обучение модель сервер запрос ответ статья код функция класс").split()
+
+
+def make_page(rng: random.Random, i: int, habr: bool) -> str:
+    """Синтетическая страница ~100-300 КБ: основной текст тонет в разметке"""
+    text = lambda n: ' '.join(rng.choice(WORDS) for _ in range(n))
+    scripts = ''.join(f"<script>var data{k} = {{{', '.join(f'k{j}: {j}' for j in range(300))}}};</script>"
+                      for k in range(rng.randint(5, 15)))
+    styles = f"<style>{' '.join(f'.c{k} {{ margin: {k}px; }}' for k in range(500))}</style>"
+    nav = ''.join(f'<li><a href="/hub/{k}">{text(2)}</a></li>' for k in range(200))
+    paragraphs = ''.join(f"<p>{text(rng.randint(40, 120))}</p>" for _ in range(rng.randint(20, 60)))
+    comments = ''.join(f'<div class="comment"><span>{text(30)}</span></div>' for _ in range(rng.randint(20, 100)))
+    title = f"Статья {i}: {text(5)}"
+    body = (f'<div class="tm-article-body"><div class="article-formatted-body article-formatted-body_version-2">'
+            f'{paragraphs}</div></div>' if habr else f"<article>{paragraphs}</article>")
+    return (f'<!DOCTYPE html><html lang="ru"><head><meta charset="UTF-8"><title>{title} / Хабр</title>'
+            f'{styles}{scripts}</head><body><nav><ul>{nav}</ul></nav><h1>{title}</h1>{body}'
+            f'<section>{comments}</section>{scripts}</body></html>')
+
+
+def ensure_fixtures(directory: str, count: int):
+    """Файлы корпуса; синтетические страницы пишутся, только если их нет"""
+    paths = sorted(glob.glob(os.path.join(directory, "*.html")) + glob.glob(os.path.join(directory, "*.body")))
+    if paths:
+        return paths
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(0)
+    for i in range(count):
+        prefix = "habr" if i % 2 == 0 else "site"
+        with open(os.path.join(directory, f"{prefix}_{i:04d}.html"), 'w', encoding='utf-8') as f:
+            f.write(make_page(rng, i, habr=prefix == "habr"))
+    print(f"Wrote {count} synthetic fixtures to {directory}")
+    return ensure_fixtures(directory, count)
+
+
+def fixture_url(path: str) -> str:
+    """URL страницы: habr_* считаются страницами Habr"""
+    name = os.path.basename(path)
+    return f"https://habr.com/ru/articles/{name}/" if name.startswith("habr") else f"https://example.com/{name}"
+
+
+def extract_bs4(url: str, html: bytes):
+    """Прежний разбор ExcelArticleLoader (BeautifulSoup, html.parser)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    if 'habr.com' in url:
+        title_tag = soup.find('h1') or soup.find('title')
+        title = title_tag.get_text().strip() if title_tag else "Статья с Habr"
+        content_div = soup.find('div', {'class': 'article-formatted-body'})
+        content = content_div.get_text().strip() if content_div else "Содержание недоступно"
+    else:
+        for script in soup(["script", "style"]):
+            script.decompose()
+        title = soup.find('title')
+        title = title.get_text().strip() if title else None
+        content = soup.get_text()
+        lines = (line.strip() for line in content.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        content = ' '.join(chunk for chunk in chunks if chunk)
+        content = content[:2000] + "..." if len(content) > 2000 else content
+    return {'title': title, 'content': content, 'tags': extract_tags(content)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default="benchmarks/fixtures/html")
+    parser.add_argument("--count", type=int, default=200, help="сколько синтетических страниц создать")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--max-kb", type=int, default=Config.extraction.max_document_bytes // 1024)
+    args = parser.parse_args()
+
+    paths = ensure_fixtures(args.fixtures, args.count)
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append((fixture_url(path), f.read()))
+    total_mb = sum(len(html) for _, html in pages) / 2 ** 20
+    max_bytes = args.max_kb * 1024
+    print(f"pages={len(pages)} size={total_mb:.1f} MiB max_document={args.max_kb} KiB")
+    print(f"{'mode':<24}{'seconds':>9}{'pages/s':>9}{'MiB/s':>8}{'title ok':>10}{'tags ok':>9}")
+
+    start = time.perf_counter()
+    reference = [extract_bs4(url, html) for url, html in pages]
+    seconds = time.perf_counter() - start
+    print(f"{'bs4 html.parser':<24}{seconds:>9.2f}{len(pages) / seconds:>9.1f}{total_mb / seconds:>8.1f}"
+          f"{1.0:>10.3f}{1.0:>9.3f}")
+
+    def report(name, results, seconds):
+        titles = sum(r['title'] == ref['title'] for r, ref in zip(results, reference)) / len(pages)
+        tags = sum(r['tags'] == ref['tags'] for r, ref in zip(results, reference)) / len(pages)
+        print(f"{name:<24}{seconds:>9.2f}{len(pages) / seconds:>9.1f}{total_mb / seconds:>8.1f}"
+              f"{titles:>10.3f}{tags:>9.3f}")
+
+    start = time.perf_counter()
+    results = [extract_article(url, html, max_bytes) for url, html in pages]
+    report("lxml (in-process)", results, time.perf_counter() - start)
+
+    for workers in args.workers:
+        config = dataclasses.replace(Config.extraction, workers=workers, max_document_bytes=max_bytes)
+        start = time.perf_counter()
+        results = HTMLExtractor(config).extract_many(pages)
+        report(f"lxml pool ({workers} proc)", results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
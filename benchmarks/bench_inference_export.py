@@ -0,0 +1,97 @@
+# File: benchmarks/bench_inference_export.py
+"""Бенчмарк инференса политики: eager DQNAgent против TorchScript-артефакта
+(fp32 и int8 динамическое квантование).
+
+Сеть сначала коротко обучается регрессии к косинусной схожести запрос x статья
+на синтетическом корпусе, чтобы argmax был осмысленным. Измеряются латентность
+одного запроса (batch=1) и батча, совпадение argmax с eager-моделью и
+максимальная ошибка Q-значений.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_inference_export --articles 1000 --threads 1
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from agents.dqn_agent import DQNAgent
+from agents.inference_export import InferencePolicy, export_policy
+from benchmarks.bench_vector_index import make_corpus, make_queries
+from config.settings import Config
+
+
+def train_agent(corpus: np.ndarray, steps: int) -> DQNAgent:
+    """Q-голова, обученная предсказывать схожесть запроса со всеми статьями"""
+    agent = DQNAgent(corpus.shape[1], len(corpus), Config.model)
+    targets_for = torch.from_numpy(corpus.T)
+    for step in range(steps):
+        states = torch.from_numpy(make_queries(corpus, 64, seed=100 + step))
+        loss = torch.nn.functional.mse_loss(agent.policy_net(states), states @ targets_for)
+        agent.optimizer.zero_grad()
+        loss.backward()
+        agent.optimizer.step()
+    return agent
+
+
+def mean_latency_ms(select_fn, states: np.ndarray, batch_size: int) -> float:
+    """Средняя латентность одного вызова на батч batch_size, мс"""
+    batches = [states[i:i + batch_size] for i in range(0, len(states) - batch_size + 1, batch_size)]
+    select_fn(batches[0])  # прогрев
+    start = time.perf_counter()
+    for batch in batches:
+        select_fn(batch)
+    return (time.perf_counter() - start) * 1000 / len(batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=2048)
+    parser.add_argument("--train-steps", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    torch.set_num_threads(args.threads)
+    corpus = make_corpus(args.articles, args.dim, n_topics=max(1, args.articles // 20))
+    states = make_queries(corpus, args.queries, seed=1)
+    agent = train_agent(corpus, args.train_steps)
+    with torch.no_grad():
+        eager_q = agent.policy_net(torch.from_numpy(states)).numpy()
+    eager_actions = eager_q.argmax(1)
+
+    variants = [("eager select_action", lambda batch: [agent.select_action(s, training=False) for s in batch]),
+                ("eager select_actions", lambda batch: agent.select_actions(batch))]
+    with tempfile.TemporaryDirectory() as tmp:
+        policies = {}
+        for quantize in (False, True):
+            path = os.path.join(tmp, f"policy.{'int8' if quantize else 'fp32'}.ts")
+            export_policy(agent, path, quantize=quantize)
+            policies[quantize] = InferencePolicy(path, num_threads=args.threads, max_batch_size=args.batch_size)
+            print(f"{'int8' if quantize else 'fp32'} artifact: {os.path.getsize(path) / 2 ** 20:.2f} MiB")
+        variants += [("torchscript fp32", policies[False].select_actions),
+                     ("torchscript int8", policies[True].select_actions)]
+
+        print(f"articles={args.articles} threads={args.threads}")
+        print(f"{'mode':<22}{'ms @1':>8}{f'ms @{args.batch_size}':>9}{'argmax agree':>14}{'max |dQ|':>10}")
+        for name, select_fn in variants:
+            latency_one = mean_latency_ms(select_fn, states[:512], 1)
+            latency_batch = mean_latency_ms(select_fn, states, args.batch_size)
+            if name.startswith("torchscript"):
+                policy = policies[name.endswith("int8")]
+                q_values = policy.q_values(states)
+                agreement = float((q_values.argmax(1) == eager_actions).mean())
+                error = float(np.abs(q_values - eager_q).max())
+            else:
+                agreement, error = 1.0, 0.0
+            print(f"{name:<22}{latency_one:>8.3f}{latency_batch:>9.3f}{agreement:>14.4f}{error:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
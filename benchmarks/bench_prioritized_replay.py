@@ -0,0 +1,67 @@
+# File: benchmarks/bench_prioritized_replay.py
+"""Бенчмарк выборки из replay-памяти: равномерный ReplayBuffer против
+PrioritizedReplayBuffer (sum-tree) при разных емкостях.
+
+Для PER отдельно измеряется выборка вместе с батчевым обновлением
+приоритетов (как в DQNAgent.learn). По умолчанию state_dim мал, чтобы
+буфер на 1e6 переходов помещался в память; на стоимость дерева он не влияет.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_prioritized_replay --capacities 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from agents.experience_replay import PrioritizedReplayBuffer, ReplayBuffer
+
+
+def fill(buffer: ReplayBuffer, capacity: int, state_dim: int, chunk_size: int = 100000):
+    rng = np.random.default_rng(0)
+    for start in range(0, capacity, chunk_size):
+        count = min(chunk_size, capacity - start)
+        states = rng.standard_normal((count, state_dim), dtype=np.float32)
+        buffer.push_batch(states, rng.integers(0, 1000, count), rng.choice([1.0, -0.1, 0.3], count),
+                          states, rng.random(count) < 0.2)
+
+
+def samples_per_second(step_fn, batch_size: int, steps: int) -> float:
+    step_fn()  # прогрев
+    start = time.perf_counter()
+    for _ in range(steps):
+        step_fn()
+    return steps * batch_size / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacities", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--state-dim", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--steps", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'capacity':>10} {'mode':<22}{'samples/s':>12}{'us/batch':>10}")
+    for capacity in args.capacities:
+        uniform = ReplayBuffer(capacity, args.state_dim, seed=0)
+        fill(uniform, capacity, args.state_dim)
+        prioritized = PrioritizedReplayBuffer(capacity, args.state_dim, seed=0)
+        fill(prioritized, capacity, args.state_dim)
+        # Неравномерные приоритеты, как после обучения на редкой награде
+        prioritized.update_priorities(np.arange(capacity), np.random.default_rng(1).exponential(0.1, capacity))
+
+        def prioritized_learn_step():
+            batch = prioritized.sample(args.batch_size)
+            prioritized.update_priorities(batch['indices'], np.random.random(args.batch_size))
+
+        for mode, step_fn in (("uniform sample", lambda: uniform.sample(args.batch_size)),
+                              ("prioritized sample", lambda: prioritized.sample(args.batch_size)),
+                              ("prioritized + update", prioritized_learn_step)):
+            rate = samples_per_second(step_fn, args.batch_size, args.steps)
+            print(f"{capacity:>10} {mode:<22}{rate:>12.0f}{args.batch_size / rate * 1e6:>10.1f}")
+        del uniform, prioritized
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# File: benchmarks/bench_replay.py
+"""Бенчмарк replay-памяти: deque кортежей (прежний DQNAgent.memory) против ReplayBuffer.
+
+Измеряются шаги/с подготовки батча (выборка + конвертация в тензоры) и
+полного шага обучения (подготовка + forward/backward SimpleDQN).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_replay --capacity 100000 --batch-size 32
+"""
+import argparse
+import random
+import time
+from collections import deque
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from agents.dqn_agent import SimpleDQN
+from agents.experience_replay import ReplayBuffer
+
+
+def fill(capacity: int, state_dim: int, action_dim: int, seed: int = 0):
+    """Одинаковые переходы в deque и в ReplayBuffer"""
+    rng = np.random.default_rng(seed)
+    memory = deque(maxlen=capacity)
+    buffer = ReplayBuffer(capacity, state_dim, seed=seed)
+    for _ in range(capacity):
+        state = rng.standard_normal(state_dim, dtype=np.float32)
+        next_state = rng.standard_normal(state_dim, dtype=np.float32)
+        action = int(rng.integers(action_dim))
+        reward = float(rng.choice([1.0, -0.1, 0.3]))
+        done = bool(rng.random() < 0.2)
+        memory.append((state, action, reward, next_state, done))
+        buffer.push(state, action, reward, next_state, done)
+    return memory, buffer
+
+
+def deque_batch(memory: deque, batch_size: int):
+    """Прежний путь DQNAgent.learn: random.sample + zip + torch.FloatTensor(list)"""
+    batch = random.sample(memory, batch_size)
+    states, actions, rewards, next_states, dones = zip(*batch)
+    return (torch.FloatTensor(states), torch.LongTensor(actions).unsqueeze(1),
+            torch.FloatTensor(rewards).unsqueeze(1), torch.FloatTensor(next_states),
+            torch.BoolTensor(dones).unsqueeze(1))
+
+
+def buffer_batch(buffer: ReplayBuffer, batch_size: int):
+    return buffer.to_tensors(buffer.sample(batch_size), torch.device("cpu"))
+
+
+def steps_per_second(step_fn, steps: int) -> float:
+    step_fn()  # прогрев
+    start = time.perf_counter()
+    for _ in range(steps):
+        step_fn()
+    return steps / (time.perf_counter() - start)
+
+
+def make_train_step(batch_fn, network: nn.Module, optimizer, gamma: float = 0.99):
+    def step():
+        states, actions, rewards, next_states, dones = batch_fn()
+        current = network(states).gather(1, actions)
+        with torch.no_grad():
+            target = rewards + gamma * network(next_states).max(1)[0].unsqueeze(1) * ~dones
+        loss = nn.functional.mse_loss(current, target)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    return step
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=100000)
+    parser.add_argument("--state-dim", type=int, default=384)
+    parser.add_argument("--action-dim", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    memory, buffer = fill(args.capacity, args.state_dim, args.action_dim)
+    network = SimpleDQN(args.state_dim, args.action_dim)
+    optimizer = torch.optim.Adam(network.parameters(), lr=1e-3)
+
+    print(f"capacity={args.capacity} batch={args.batch_size} state_dim={args.state_dim}")
+    print(f"{'memory':<14}{'batch prep/s':>14}{'train steps/s':>15}")
+    for name, batch_fn in (("deque", lambda: deque_batch(memory, args.batch_size)),
+                           ("ReplayBuffer", lambda: buffer_batch(buffer, args.batch_size))):
+        prep = steps_per_second(batch_fn, args.steps)
+        train = steps_per_second(make_train_step(batch_fn, network, optimizer), args.steps // 4)
+        print(f"{name:<14}{prep:>14.0f}{train:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# File: benchmarks/bench_storage.py
+"""Бенчмарк хранилища сессий: JSON (снимок + журнал) против SQLite.
+
+Для синтетической базы из --users пользователей с --history взаимодействиями
+измеряются время старта, прирост Python-кучи при загрузке, латентность
+add_interaction и get_session_stats, размер файлов на диске. Открытие
+измеряется под tracemalloc, поэтому абсолютное время JSON-старта завышено;
+SQLite при открытии не читает данные вовсе.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_storage --users 100000 --history 10
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from database.session_journal import write_file_atomic
+from database.session_manager import SNAPSHOT_FORMAT, SessionManager
+from database.sqlite_store import SQLiteSessionManager
+
+
+def make_sessions(n_users: int, history: int, seed: int = 0) -> dict:
+    """Синтетические сессии в формате JSON-бэкенда"""
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    sessions = {}
+    for i in range(n_users):
+        items = [
+            {
+                'timestamp': now,
+                'user_query': f"question {rng.randrange(10000)} about topic {rng.randrange(100)}",
+                'recommended_article': {'id': rng.randrange(5000), 'title': f"Article {t}",
+                                        'url': f"https://example.com/articles/{t}"},
+                'reward': rng.choice([1.0, -0.1, 0.3])
+            }
+            for t in range(history)
+        ]
+        sessions[f"user-{i}"] = {
+            'created_at': now,
+            'updated_at': now,
+            'conversation_history': items,
+            'total_reward': sum(item['reward'] for item in items),
+            'interaction_count': history
+        }
+    return sessions
+
+
+def measure_open(factory):
+    """(менеджер, секунды на открытие, прирост Python-кучи в MiB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    manager = factory()
+    seconds = time.perf_counter() - start
+    heap = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    return manager, seconds, heap
+
+
+def measure_ops(manager, user_ids, n_ops: int):
+    """Средняя латентность add_interaction и get_session_stats, мкс"""
+    article = {'id': 1, 'title': "Article", 'url': "https://example.com/articles/1"}
+    targets = random.Random(1).choices(user_ids, k=n_ops)
+
+    start = time.perf_counter()
+    for user_id in targets:
+        manager.add_interaction(user_id, "benchmark question", article, 0.3)
+    add_us = (time.perf_counter() - start) * 1e6 / n_ops
+
+    start = time.perf_counter()
+    for user_id in targets:
+        manager.get_session_stats(user_id)
+    stats_us = (time.perf_counter() - start) * 1e6 / n_ops
+    return add_us, stats_us
+
+
+def files_size_mib(*paths) -> float:
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p)) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--history", type=int, default=10)
+    parser.add_argument("--ops", type=int, default=5000)
+    args = parser.parse_args()
+
+    sessions = make_sessions(args.users, args.history)
+    user_ids = list(sessions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "user_sessions.json")
+        db_path = os.path.join(tmp, "recommender.db")
+
+        start = time.perf_counter()
+        write_file_atomic(json_path, json.dumps(
+            {'format': SNAPSHOT_FORMAT, 'last_seq': 0, 'sessions': sessions}, ensure_ascii=False
+        ))
+        json_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        importer = SQLiteSessionManager(db_path)
+        importer.import_sessions(sessions)
+        importer.close()
+        sqlite_build = time.perf_counter() - start
+        del sessions
+
+        print(f"{args.users} users x {args.history} interactions, {args.ops} ops")
+        print(f"{'backend':<8}{'build s':>9}{'open s':>9}{'heap MiB':>10}"
+              f"{'add us':>9}{'stats us':>10}{'disk MiB':>10}")
+
+        manager, open_s, heap = measure_open(lambda: SessionManager(json_path))
+        add_us, stats_us = measure_ops(manager, user_ids, args.ops)
+        manager.journal.flush()
+        disk = files_size_mib(json_path, json_path + ".journal")
+        print(f"{'json':<8}{json_build:>9.2f}{open_s:>9.2f}{heap:>10.1f}{add_us:>9.1f}{stats_us:>10.1f}{disk:>10.1f}")
+        manager.close()
+        del manager
+
+        manager, open_s, heap = measure_open(lambda: SQLiteSessionManager(db_path))
+        add_us, stats_us = measure_ops(manager, user_ids, args.ops)
+        disk = files_size_mib(db_path, db_path + "-wal")
+        print(f"{'sqlite':<8}{sqlite_build:>9.2f}{open_s:>9.2f}{heap:>10.1f}{add_us:>9.1f}{stats_us:>10.1f}{disk:>10.1f}")
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# File: benchmarks/bench_vector_index.py
+"""Бенчмарк векторного индекса: recall@k и латентность IVF против точного поиска.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_vector_index --articles 200000 --queries 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from database.vector_index import ExactIndex, IVFIndex
+
+
+def make_corpus(n: int, dim: int, n_topics: int, seed: int = 0,
+                chunk_size: int = 100000) -> np.ndarray:
+    """Синтетический корпус: нормализованные векторы вокруг n_topics «тем».
+
+    Генерируется по чанкам, чтобы корпус в 1M статей помещался в память.
+    """
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    scale = np.float32(1.5 / np.sqrt(dim))
+
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        chunk[:] = topics[rng.integers(0, n_topics, len(chunk))]
+        chunk += scale * rng.standard_normal(chunk.shape, dtype=np.float32)
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(corpus: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    """Запросы — зашумленные векторы корпуса"""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((n, corpus.shape[1]), dtype=np.float32) / np.float32(np.sqrt(corpus.shape[1]))
+    queries = corpus[rng.integers(0, len(corpus), n)] + 0.3 * noise
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def time_per_query(search_fn, queries: np.ndarray) -> float:
+    """Средняя латентность одного запроса, мс"""
+    start = time.perf_counter()
+    for query in queries:
+        search_fn(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=0)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.articles, args.dim, args.topics)
+    queries = make_queries(corpus, args.queries)
+    print(f"Corpus: {args.articles} x {args.dim}, queries: {args.queries}, top_k: {args.top_k}")
+
+    # Исходная реализация: полный dot-product + полный argsort
+    def argsort_search(query):
+        return np.argsort(corpus @ query)[-args.top_k:][::-1]
+
+    exact = ExactIndex(args.dim)
+    exact.add(corpus)
+    truth, _ = exact.search_batch(queries, args.top_k)
+
+    print(f"{'backend':<24}{'ms/query':>10}{'recall@k':>10}")
+    print(f"{'argsort (baseline)':<24}{time_per_query(argsort_search, queries):>10.3f}{1.0:>10.3f}")
+    print(f"{'exact (argpartition)':<24}"
+          f"{time_per_query(lambda q: exact.search(q, args.top_k), queries):>10.3f}{1.0:>10.3f}")
+
+    start = time.perf_counter()
+    ivf = IVFIndex(args.dim, n_lists=args.n_lists)
+    ivf.add(corpus)
+    print(f"IVF build: {ivf.n_lists} lists in {time.perf_counter() - start:.1f}s")
+
+    for nprobe in args.nprobe:
+        if nprobe > ivf.n_lists:
+            break
+        found, _ = ivf.search_batch(queries, args.top_k, nprobe=nprobe)
+        latency = time_per_query(lambda q: ivf.search_batch(q.reshape(1, -1), args.top_k, nprobe=nprobe), queries)
+        print(f"{f'ivf nprobe={nprobe}':<24}{latency:>10.3f}{recall_at_k(found, truth):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
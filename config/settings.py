@@ -1,6 +1,7 @@
 # File: config/settings.py
 import os
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class ModelConfig:
@@ -13,6 +14,17 @@ class ModelConfig:
     epsilon_end: float = 0.01
     epsilon_decay: float = 0.995
     batch_size: int = 32
+    memory_size: int = 1000  # емкость replay-буфера
+    # "uniform" или "prioritized" (PER: выборка пропорционально |TD-ошибке|^alpha)
+    replay_type: str = "uniform"
+    per_alpha: float = 0.6
+    per_beta: float = 0.4  # растет до 1 на per_beta_increment за выборку
+    per_beta_increment: float = 0.001
+    # "flat" — Q-голова на все статьи, "candidates" — оценка top-K из векторного индекса,
+    # "hierarchical" — выбор кластера, затем статьи внутри него
+    action_mode: str = "flat"
+    candidate_k: int = 20
+    n_clusters: int = 0  # для "hierarchical", 0 — sqrt(N)
 
 @dataclass
 class EnvironmentConfig:
@@ -21,6 +33,107 @@ class EnvironmentConfig:
     reward_failure: float = -0.1
     reward_partial: float = 0.3
 
+@dataclass
+class EncoderConfig:
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    batch_size: int = 64
+    num_threads: int = 0  # 0 — оставить настройку torch по умолчанию
+    device: Optional[str] = None
+
+@dataclass
+class QueryCacheConfig:
+    max_size: int = 2048
+    ttl_seconds: Optional[float] = None  # None — без ограничения по времени
+
+@dataclass
+class IndexConfig:
+    backend: str = "exact"  # "exact" или "ivf"
+    n_lists: int = 0  # число списков IVF, 0 — sqrt(N)
+    nprobe: int = 8  # сколько списков сканировать (recall vs латентность)
+    kmeans_iters: int = 10
+    # Хранение нормализованных эмбеддингов статей: "float32", "float16" или "int8" (масштаб на строку)
+    precision: str = "float32"
+
+@dataclass
+class InferenceConfig:
+    max_batch_size: int = 32
+    max_wait_ms: float = 5.0  # сколько ждать добора батча после первого запроса
+    max_queue_size: int = 1024
+    # Checkpoint'ы плоского агента экспортируются в TorchScript для сервинга
+    # int8 динамическое квантование Linear-слоев: политика сервинга немного отличается
+    # от обученной (argmax совпадает не всегда), поэтому включается явно
+    quantize_policy: bool = False
+    policy_threads: int = 0  # потоки intra-op для политики, 0 — настройка torch по умолчанию
+
+@dataclass
+class ExecutionConfig:
+    inference_workers: int = 2
+    inference_queue_size: int = 64
+    hashing_workers: int = 2  # процессы для argon2
+    hashing_queue_size: int = 16
+    persistence_workers: int = 1  # один писатель — запись на диск упорядочена
+    persistence_queue_size: int = 256
+
+@dataclass
+class SessionStoreConfig:
+    # Групповая фиксация журнала: create_session/add_interaction возвращаются только
+    # после fsync своей записи, а все записи, пришедшие за окно, фиксируются одним fsync
+    commit_interval_ms: float = 50.0  # окно групповой фиксации журнала (один fsync на окно)
+    commit_timeout_s: float = 5.0  # сколько ждать fsync, прежде чем вернуть ошибку
+    compact_interval_s: float = 300.0
+    compact_after_records: int = 10000  # досрочная компакция при длинном журнале
+    history_window: int = 50  # ходов на пользователя в памяти; старые — в архиве
+    idle_ttl_s: float = 1800.0  # простаивающие сессии выгружаются из памяти при компакции
+
+@dataclass
+class BackgroundTrainingConfig:
+    # Обучение при старте без checkpoint'а: сервер отвечает поиском по схожести,
+    # пока в фоне обучается приватная копия политики
+    pretrain_epochs: int = 500  # батчевое предобучение с ранней остановкой
+    rl_episodes: int = 0  # 0 — только предобучение
+    num_envs: int = 16
+
+@dataclass
+class DistributedConfig:
+    # Обучение actor/learner: акторы-процессы шагают средами, learner учит агента
+    num_actors: int = 4
+    envs_per_actor: int = 8  # диалогов в VecRecommendationEnv актора (= переходов в слоте)
+    slots_per_actor: int = 4  # слотов разделяемой памяти на актора
+    sync_interval: int = 50  # шагов learner'а между публикациями весов акторам
+    learn_steps: int = 1  # шагов обучения на каждый полученный батч
+    batch_size: int = 32
+
+@dataclass
+class FetcherConfig:
+    # Загрузка страниц статей при импорте из Excel
+    max_workers: int = 16  # потоков (у каждого своя keep-alive Session)
+    per_host_concurrency: int = 4  # одновременных запросов к одному хосту
+    per_host_rate: float = 5.0  # запросов в секунду к одному хосту, 0 — без ограничения
+    timeout: float = 10.0
+    max_retries: int = 3  # повторы при сетевых ошибках, 429 и 5xx
+    backoff_base: float = 0.5  # пауза base * 2^attempt с jitter
+    backoff_max: float = 30.0
+    user_agent: str = "rl-article-recommender/1.0"
+
+@dataclass
+class ExtractionConfig:
+    # Разбор загруженных страниц (lxml) в пуле процессов
+    workers: int = 0  # 0 — по числу ядер
+    chunk_size: int = 16  # страниц на одну задачу процесса
+    max_document_bytes: int = 2 * 1024 * 1024  # более длинные документы обрезаются
+    content_chars: int = 2000  # длина контента статей не с Habr
+
+@dataclass
+class ReloadConfig:
+    # Горячая перезагрузка корпуса: новый снимок ArticleDatabase строится в фоне
+    # и подменяется вместе со средой и агентом без рестарта сервера
+    watch: bool = True  # следить за изменениями ARTICLES_PATH
+    poll_interval_s: float = 5.0
+    settle_s: float = 2.0  # сколько файл не должен меняться перед перезагрузкой
+    # Кому доступны /admin/reload; None — эндпоинты выключены (демо-пользователя
+    # admin с паролем admin для этого назначать нельзя)
+    admin_user: Optional[str] = None
+
 @dataclass
 class APIConfig:
     host: str = "0.0.0.0"
@@ -31,8 +144,33 @@ class Config:
     model = ModelConfig()
     environment = EnvironmentConfig()
     api = APIConfig()
+    encoder = EncoderConfig()
+    query_cache = QueryCacheConfig()
+    index = IndexConfig()
+    inference = InferenceConfig()
+    execution = ExecutionConfig()
+    session_store = SessionStoreConfig()
+    background_training = BackgroundTrainingConfig()
+    distributed = DistributedConfig()
+    fetcher = FetcherConfig()
+    extraction = ExtractionConfig()
+    reload = ReloadConfig()
     
     # Пути к данным
     ARTICLES_PATH = "data/articles.json"
     EXCEL_PATH = "data/articles.xlsx"  # Новый путь к Excel файлу
-    SESSIONS_PATH = "data/user_sessions.json"
\ No newline at end of file
+    SESSIONS_PATH = "data/user_sessions.json"
+    USERS_PATH = "data/users.json"
+
+    # Хранилище пользователей и сессий: "json" (файлы + журнал) или "sqlite"
+    STORAGE_BACKEND = "json"
+    SQLITE_PATH = "data/recommender.db"
+
+    # Кэш эмбеддингов статей (по умолчанию — рядом с ARTICLES_PATH)
+    EMBEDDINGS_CACHE_DIR = "data"
+
+    # HTTP-кэш страниц статей (ETag/Last-Modified) для повторного импорта из Excel
+    HTTP_CACHE_DIR = "data/http_cache"
+
+    # Версионированные checkpoint'ы политики (python -m training.cli)
+    CHECKPOINT_DIR = "checkpoints"
\ No newline at end of file
@@ -5,23 +5,42 @@ from typing import List, Dict, Optional
 import os
 import logging
 from .excel_loader import ExcelArticleLoader
+from .embedding_cache import EmbeddingCache, corpus_fingerprint
+from .embedding_store import EmbeddingStore
+from .vector_index import create_index, load_index
+from config.settings import Config
+from models.encoder_registry import get_encoder
 
 logger = logging.getLogger(__name__)
 
 class ArticleDatabase:
-    def __init__(self, articles_path: str, excel_path: Optional[str] = None):
+    def __init__(self, articles_path: str, excel_path: Optional[str] = None,
+                 cache_dir: Optional[str] = None, encoder=None, index_config=None):
         self.articles_path = articles_path
         self.excel_path = excel_path
+        self.cache_dir = cache_dir or os.path.dirname(articles_path) or "."
+        self.index_config = index_config or Config.index
         self.articles = self._load_articles()
+        self.encoder = None
+        self.embedding_cache = None
+        self.corpus_hash = None
+        self.article_embeddings = np.array([])
+        self.index = None
         
-        # Инициализируем энкодер только если есть статьи
+        # Инициализируем энкодер только если есть статьи.
+        # Энкодер общий для процесса и загружается лениво: при попадании
+        # в кэш эмбеддингов веса модели не читаются до первого запроса.
         if self.articles:
-            from sentence_transformers import SentenceTransformer
-            self.encoder = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-            self.article_embeddings = self._encode_articles()
-        else:
-            self.encoder = None
-            self.article_embeddings = np.array([])
+            self._init_search(encoder)
+    
+    def _init_search(self, encoder=None):
+        """Энкодер, эмбеддинги и векторный индекс для текущих статей"""
+        self.encoder = encoder or self.encoder or get_encoder()
+        # Кэш эмбеддингов хранится рядом с articles.json
+        self.embedding_cache = EmbeddingCache(self.cache_dir, self.encoder.model_name)
+        self.corpus_hash = corpus_fingerprint(self.encoder.model_name, self.articles)
+        self.article_embeddings = self._encode_articles()
+        self.index = self._build_index()
     
     def _load_articles(self) -> List[Dict]:
         """Загрузка статей из JSON или Excel"""
@@ -99,20 +118,99 @@ class ArticleDatabase:
         except Exception as e:
             logger.error(f"Error saving articles: {e}")
     
-    def _encode_articles(self) -> np.ndarray:
-        """Создание эмбеддингов для всех статей"""
+    def _encode_articles(self):
+        """Создание эмбеддингов для всех статей (с дисковым кэшем).
+        
+        Эмбеддинги нормализуются один раз при построении кэша и хранятся
+        в EmbeddingStore с точностью IndexConfig.precision; то же хранилище
+        использует векторный индекс.
+        """
         if not self.articles:
             return np.array([])
             
         try:
-            texts = [f"{article['title']} {article['content'][:500]}" for article in self.articles]
-            embeddings = self.encoder.encode(texts)
-            logger.info(f"Encoded {len(embeddings)} article embeddings")
-            return embeddings
+            embeddings = self.embedding_cache.load_or_encode(self.articles, self.encoder.encode)
+            store = EmbeddingStore.from_vectors(embeddings, self.index_config.precision)
+            logger.info(f"Encoded {len(store)} article embeddings "
+                        f"({store.precision}, {store.nbytes / 2 ** 20:.1f} MiB)")
+            return store
         except Exception as e:
             logger.error(f"Error encoding articles: {e}")
             return np.array([])
     
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "article_index.npz")
+    
+    def _build_index(self):
+        """Построение (или загрузка с диска) векторного индекса статей"""
+        if len(self.article_embeddings) == 0:
+            return None
+        
+        index_path = self._index_path()
+        backend = self.index_config.backend
+        
+        # Точный индекс строится мгновенно поверх матрицы эмбеддингов,
+        # сохранять имеет смысл только ANN-структуры
+        if backend != "exact":
+            index = load_index(index_path, vectors=self.article_embeddings)
+            if index is not None and index.kind == backend and index.fingerprint == self.corpus_hash:
+                logger.info(f"Loaded {backend} index for {len(index)} articles")
+                return index
+        
+        try:
+            index = create_index(self.index_config, self.article_embeddings.shape[1])
+            index.add(self.article_embeddings)
+            index.fingerprint = self.corpus_hash
+            if backend != "exact":
+                index.save(index_path, include_vectors=False)
+            logger.info(f"Built {backend} index for {len(index)} articles")
+            return index
+        except Exception as e:
+            logger.error(f"Error building vector index: {e}")
+            return None
+    
+    def upsert_articles(self, updated: Dict[int, Dict], added: List[Dict]) -> np.ndarray:
+        """Инкрементальное изменение корпуса без смены id.
+        
+        updated — новые версии существующих статей по id, added — новые
+        статьи (получают id в конце списка). Кодируются только измененные и
+        новые статьи (content-addressed кэш эмбеддингов); их векторы
+        перезаписываются и дописываются в общее хранилище через индекс.
+        Возвращает id добавленных статей.
+        """
+        first_new = len(self.articles)
+        for article_id, article in updated.items():
+            self.articles[article_id] = dict(article, id=article_id)
+        self.articles.extend(dict(article, id=first_new + i) for i, article in enumerate(added))
+        new_ids = np.arange(first_new, len(self.articles))
+        changed_ids = np.array(sorted(updated), dtype=np.int64)
+        
+        if self.embedding_cache is None or self.index is None:
+            # Индекса еще нет (пустой корпус или ошибка построения) — строим с нуля
+            self._init_search()
+            self._save_articles(self.articles)
+            return new_ids
+        
+        embeddings = self.embedding_cache.load_or_encode(self.articles, self.encoder.encode)
+        self.corpus_hash = corpus_fingerprint(self.encoder.model_name, self.articles)
+        shared = self.index.store is self.article_embeddings
+        self.index.update(changed_ids, embeddings[changed_ids])
+        if len(new_ids):
+            self.index.add(embeddings[new_ids])
+        if not shared:
+            self.article_embeddings.update(changed_ids, embeddings[changed_ids])
+            if len(new_ids):
+                self.article_embeddings.append(embeddings[new_ids])
+        
+        self.index.fingerprint = self.corpus_hash
+        if self.index.kind != "exact":
+            self.index.save(self._index_path(), include_vectors=False)
+        # articles.json пишется последним: сервер перезагружает корпус по его изменению
+        self._save_articles(self.articles)
+        logger.info(f"Corpus updated: {len(changed_ids)} changed, {len(new_ids)} added, "
+                    f"{len(self.articles)} articles total")
+        return new_ids
+    
     def get_article(self, article_id: int) -> Optional[Dict]:
         """Получить статью по ID"""
         if 0 <= article_id < len(self.articles):
@@ -121,7 +219,7 @@ class ArticleDatabase:
         return None
     
     def get_article_embedding(self, article_id: int) -> Optional[np.ndarray]:
-        """Получить эмбеддинг статьи"""
+        """Получить эмбеддинг статьи (L2-нормализован, float32)"""
         if (0 <= article_id < len(self.article_embeddings) and 
             len(self.article_embeddings) > 0):
             return self.article_embeddings[article_id]
@@ -137,11 +235,10 @@ class ArticleDatabase:
             return []
             
         try:
-            query_embedding = self.encoder.encode([query])
-            similarities = np.dot(self.article_embeddings, query_embedding.T).flatten()
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            query_embedding = self.encoder.encode([query])[0]
+            top_indices, _ = self.index.search(query_embedding, top_k)
             
-            results = [self.articles[i] for i in top_indices]
+            results = [self.articles[i] for i in top_indices if i >= 0]
             logger.debug(f"Semantic search found {len(results)} articles for query: {query}")
             return results
         except Exception as e:
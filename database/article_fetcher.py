@@ -0,0 +1,264 @@
+# File: database/article_fetcher.py
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Ответы, после которых запрос повторяется с backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPCache:
+    """Дисковый HTTP-кэш страниц статей.
+
+    На каждый URL — два файла: <sha1(url)>.body с телом ответа и
+    <sha1(url)>.json с валидаторами (ETag, Last-Modified). Метаданные
+    записываются атомарно после тела, поэтому запись без пары не читается.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Метаданные и тело закэшированного ответа (None — промах)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('url') != url:
+                return None
+            with open(body_path, 'rb') as f:
+                entry['content'] = f.read()
+            return entry
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, url: str, response: requests.Response):
+        """Сохранить успешный ответ вместе с его валидаторами"""
+        meta_path, body_path = self._paths(url)
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        }
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(body_path + suffix, 'wb') as f:
+                f.write(response.content)
+            os.replace(body_path + suffix, body_path)
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as e:
+            logger.warning(f"Error writing HTTP cache entry for {url}: {e}")
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Заголовки условного запроса по валидаторам записи"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+
+class HostLimiter:
+    """Ограничение одного хоста: не больше max_concurrency запросов
+    одновременно и не чаще rate запросов в секунду (равномерно)"""
+
+    def __init__(self, max_concurrency: int, rate: float):
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait_turn(self):
+        """Зарезервировать ближайший слот по частоте и дождаться его"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ArticleFetcher:
+    """Конкурентная загрузка страниц статей.
+
+    Запросы выполняются пулом потоков; у каждого потока своя
+    requests.Session с keep-alive пулом соединений. Для каждого хоста
+    действуют лимиты одновременных запросов и частоты (HostLimiter).
+    Сетевые ошибки, 429 и 5xx повторяются с экспоненциальным backoff и
+    jitter (Retry-After учитывается). Успешные ответы кладутся в HTTPCache,
+    повторная загрузка идет условным запросом: 304 отдает тело из кэша.
+    """
+
+    def __init__(self, config=None, cache_dir: Optional[str] = None):
+        self.config = config or Config.fetcher
+        self.cache = HTTPCache(cache_dir) if cache_dir else None
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+        self.stats = {'fetched': 0, 'not_modified': 0, 'retries': 0, 'errors': 0}
+
+    def _session(self) -> requests.Session:
+        """Session текущего потока (создается при первом запросе)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.config.max_workers,
+                                  pool_maxsize=self.config.per_host_concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = self.config.user_agent
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _limiter(self, url: str) -> HostLimiter:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = HostLimiter(self.config.per_host_concurrency, self.config.per_host_rate)
+                self._limiters[host] = limiter
+            return limiter
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Пауза перед повтором: Retry-After сервера или base * 2^attempt с jitter"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = 0.0
+            return min(max(delay, 0.0), self.config.backoff_max)
+        delay = min(self.config.backoff_max, self.config.backoff_base * 2 ** attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def fetch(self, url: str) -> Dict:
+        """Загрузить одну страницу.
+
+        Возвращает словарь: url, status (None — сеть недоступна), content
+        (bytes тела при 200/304, иначе None), from_cache, error.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        result = self._fetch(url, entry, HTTPCache.conditional_headers(entry))
+        if result['status'] == 304 and result['content'] is None:
+            # 304, а тела в кэше нет (запись пропала или не читается) — один
+            # безусловный запрос в обход промежуточных кэшей
+            logger.debug(f"Got 304 for {url} without a cached body, refetching")
+            result = self._fetch(url, None, {'Cache-Control': 'no-cache'})
+            if result['status'] == 304 and result['content'] is None:
+                self._count('errors')
+        return result
+
+    def _fetch(self, url: str, entry: Optional[Dict], headers: Dict[str, str]) -> Dict:
+        """Запрос с повторами; 304 без записи кэша возвращается без тела"""
+        limiter = self._limiter(url)
+        error = None
+
+        for attempt in range(self.config.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            response = None
+            with limiter.semaphore:
+                limiter.wait_turn()
+                try:
+                    response = self._session().get(url, headers=headers, timeout=self.config.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = str(e)
+                except requests.RequestException as e:
+                    # Некорректный URL и т.п. — повтор не поможет
+                    self._count('errors')
+                    return {'url': url, 'status': None, 'content': None, 'from_cache': False, 'error': str(e)}
+
+            if response is not None:
+                if response.status_code == 304:
+                    if entry is None:
+                        return {'url': url, 'status': 304, 'content': None, 'from_cache': False, 'error': "HTTP 304"}
+                    self._count('not_modified')
+                    return {'url': url, 'status': 304, 'content': entry['content'], 'from_cache': True, 'error': None}
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code == 200:
+                        self._count('fetched')
+                        if self.cache:
+                            self.cache.put(url, response)
+                        return {'url': url, 'status': 200, 'content': response.content,
+                                'from_cache': False, 'error': None}
+                    self._count('errors')
+                    return {'url': url, 'status': response.status_code, 'content': None,
+                            'from_cache': False, 'error': f"HTTP {response.status_code}"}
+                error = f"HTTP {response.status_code}"
+                # Вернуть keep-alive соединение в пул до паузы перед повтором
+                response.close()
+
+            if attempt < self.config.max_retries:
+                delay = self._backoff(attempt, response)
+                logger.debug(f"Retrying {url} in {delay:.2f}s after {error}")
+                time.sleep(delay)
+
+        logger.warning(f"Giving up on {url} after {self.config.max_retries + 1} attempts: {error}")
+        self._count('errors')
+        status = response.status_code if response is not None else None
+        return {'url': url, 'status': status, 'content': None, 'from_cache': False, 'error': error}
+
+    def fetch_many(self, urls: List[str]) -> List[Dict]:
+        """Загрузить страницы конкурентно; результаты в порядке urls
+        (повторяющиеся URL загружаются один раз)"""
+        unique = list(dict.fromkeys(urls))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.max_workers,
+                                thread_name_prefix="article-fetch") as pool:
+            results = dict(zip(unique, pool.map(self.fetch, unique)))
+        logger.info(f"Fetched {len(unique)} pages in {time.perf_counter() - start:.1f}s: "
+                    f"{self.stats['fetched']} downloaded, {self.stats['not_modified']} not modified, "
+                    f"{self.stats['retries']} retries, {self.stats['errors']} errors")
+        return [results[url] for url in urls]
+
+    def close(self):
+        """Закрыть соединения всех потоковых Session"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,161 @@
+# File: database/embedding_cache.py
+import hashlib
+import json
+import os
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .embedding_store import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Сколько символов контента участвует в эмбеддинге статьи
+CONTENT_SLICE = 500
+
+
+def article_text(article: Dict) -> str:
+    """Текст статьи, который подается в энкодер"""
+    return f"{article['title']} {article['content'][:CONTENT_SLICE]}"
+
+
+def article_key(model_name: str, article: Dict) -> str:
+    """Content-addressed ключ эмбеддинга: хэш (модель, заголовок, срез контента)"""
+    payload = "\x00".join([model_name, article['title'], article['content'][:CONTENT_SLICE]])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def corpus_fingerprint(model_name: str, articles: List[Dict]) -> str:
+    """Отпечаток корпуса: хэш от ключей всех статей в порядке их id"""
+    digest = hashlib.sha1()
+    for article in articles:
+        digest.update(article_key(model_name, article).encode('ascii'))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """Персистентный кэш эмбеддингов статей.
+
+    На диске лежат два файла:
+      - <name>.<generation>.npy — матрица L2-нормализованных эмбеддингов (float32),
+        читается через memmap;
+      - <name>.keys.json — ключи строк матрицы и имя актуального файла матрицы.
+    Файл ключей заменяется атомарно (temp-файл + rename) уже после записи матрицы,
+    поэтому после сбоя всегда остается согласованная пара.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, name: str = "article_embeddings"):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.name = name
+        self.keys_path = os.path.join(cache_dir, f"{name}.keys.json")
+
+    def _load_index(self) -> Optional[Dict]:
+        """Чтение файла ключей"""
+        if not os.path.exists(self.keys_path):
+            return None
+        try:
+            with open(self.keys_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('model_name') != self.model_name:
+                logger.info("Embedding cache was built with another model, ignoring it")
+                return None
+            return index
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Error loading embedding cache index: {e}")
+            return None
+
+    def _load_matrix(self, index: Dict) -> Optional[np.ndarray]:
+        """Открытие матрицы эмбеддингов через memory-mapping (без копирования)"""
+        matrix_path = os.path.join(self.cache_dir, index['matrix_file'])
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error loading embedding cache matrix: {e}")
+            return None
+        if matrix.ndim != 2 or matrix.shape[0] != len(index['keys']):
+            logger.warning("Embedding cache matrix does not match its index, ignoring it")
+            return None
+        return matrix
+
+    def load_or_encode(self, articles: List[Dict],
+                       encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Получить эмбеддинги статей, перекодируя только новые или измененные"""
+        keys = [article_key(self.model_name, article) for article in articles]
+
+        cached_rows: Dict[str, int] = {}
+        matrix = None
+        index = self._load_index()
+        if index is not None:
+            matrix = self._load_matrix(index)
+            if matrix is not None:
+                cached_rows = {key: row for row, key in enumerate(index['keys'])}
+
+        # Быстрый путь: корпус не изменился — отдаем memmap как есть
+        # (кэш старого формата без нормализации перезаписывается ниже)
+        if matrix is not None and index['keys'] == keys and index.get('normalized'):
+            logger.info(f"Loaded {len(keys)} article embeddings from cache")
+            return matrix
+
+        missing = [i for i, key in enumerate(keys) if key not in cached_rows]
+        logger.info(f"Embedding cache: {len(keys) - len(missing)} hits, {len(missing)} to encode")
+
+        new_embeddings = None
+        if missing:
+            new_embeddings = np.asarray(
+                encode_fn([article_text(articles[i]) for i in missing]), dtype=np.float32
+            )
+
+        if matrix is not None:
+            dim = matrix.shape[1]
+        else:
+            dim = new_embeddings.shape[1]
+        embeddings = np.empty((len(articles), dim), dtype=np.float32)
+
+        if new_embeddings is not None:
+            embeddings[missing] = normalize_rows(new_embeddings)
+        hit_positions = [i for i, key in enumerate(keys) if key in cached_rows]
+        if hit_positions:
+            hits = matrix[[cached_rows[keys[i]] for i in hit_positions]]
+            embeddings[hit_positions] = hits if index.get('normalized') else normalize_rows(hits)
+
+        self._save(keys, embeddings, index)
+        return embeddings
+
+    def _save(self, keys: List[str], embeddings: np.ndarray, old_index: Optional[Dict]):
+        """Атомарная запись матрицы и ключей"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            matrix_file = f"{self.name}.{uuid.uuid4().hex[:12]}.npy"
+            with open(os.path.join(self.cache_dir, matrix_file), 'wb') as f:
+                np.save(f, embeddings)
+                f.flush()
+                os.fsync(f.fileno())
+
+            tmp_path = f"{self.keys_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'model_name': self.model_name,
+                    'dim': int(embeddings.shape[1]),
+                    'normalized': True,
+                    'matrix_file': matrix_file,
+                    'keys': keys
+                }, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.keys_path)
+            logger.info(f"Saved {len(keys)} article embeddings to cache")
+        except OSError as e:
+            logger.error(f"Error saving embedding cache: {e}")
+            return
+
+        # Старая матрица больше не нужна
+        if old_index and old_index.get('matrix_file') != matrix_file:
+            old_path = os.path.join(self.cache_dir, old_index['matrix_file'])
+            try:
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+            except OSError as e:
+                logger.warning(f"Could not remove stale embedding matrix {old_path}: {e}")
@@ -0,0 +1,205 @@
+# File: database/embedding_store.py
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Точность хранения -> dtype кодов
+PRECISIONS = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Размер блока строк для квантования и распаковки матрицы целиком
+SCORE_CHUNK_SIZE = 65536
+# Блок строк при скоринге: распакованный блок (~3 MiB при dim=384) остается в кэше CPU
+SCORE_BLOCK_ROWS = 2048
+
+
+def normalize_rows(vectors: np.ndarray, chunk_size: int = SCORE_CHUNK_SIZE) -> np.ndarray:
+    """L2-нормализация строк (новый float32-массив; нулевые строки остаются нулевыми)"""
+    vectors = np.asarray(vectors)
+    result = np.empty(vectors.shape, dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+        result[start:start + chunk_size] = chunk / np.maximum(norms, 1e-12)
+    return result
+
+
+def quantize_rows(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Коды и масштабы строк для заданной точности.
+
+    int8 — симметричное квантование с масштабом на строку: x ~ code * scale,
+    scale = max|x| / 127. Для float16/float32 масштабы не нужны (None).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision == "float32":
+        return vectors, None
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    if precision == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.empty(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales
+    raise ValueError(f"Unknown embedding precision: {precision}")
+
+
+class EmbeddingStore:
+    """Матрица нормализованных эмбеддингов в компактной форме.
+
+    Строки хранятся как float32, float16 или int8 с масштабом на строку.
+    Индексация ([i], [ids], срезы) и np.asarray возвращают распакованные
+    float32-строки, поэтому хранилище подставляется вместо numpy-матрицы.
+    scores считает скалярные произведения запросов со всеми (или с
+    выбранными) строками прямо по кодам, распаковывая их блоками.
+    """
+
+    def __init__(self, dim: int, precision: str = "float32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision: {precision}")
+        self.dim = dim
+        self.precision = precision
+        self._codes = np.empty((0, dim), dtype=PRECISIONS[precision])
+        self._scales = np.empty(0, dtype=np.float32) if precision == "int8" else None
+        self._size = 0
+
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray, precision: str = "float32") -> "EmbeddingStore":
+        """Хранилище из float32-матрицы (для float32 — без копирования, в том числе memmap)"""
+        vectors = np.asarray(vectors) if precision == "float32" else vectors
+        store = cls(vectors.shape[1], precision)
+        store.append(vectors)
+        return store
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, scales: Optional[np.ndarray], precision: str) -> "EmbeddingStore":
+        """Хранилище поверх готовых кодов (например, загруженных с диска)"""
+        store = cls(codes.shape[1], precision)
+        store._codes = codes
+        store._scales = scales if precision == "int8" else None
+        store._size = len(codes)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self._size, self.dim)
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._size]
+
+    @property
+    def scales(self) -> Optional[np.ndarray]:
+        return None if self._scales is None else self._scales[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Байт на заполненную часть хранилища (коды + масштабы)"""
+        scales = self.scales
+        return self.codes.nbytes + (scales.nbytes if scales is not None else 0)
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Добавить строки (квантуются при записи); возвращает их id.
+
+        Емкость удваивается; первый добавленный float32-массив при точности
+        float32 используется без копирования.
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        needed = self._size + len(vectors)
+        if self._size == 0 and self.precision == "float32" and vectors.dtype == np.float32 \
+                and vectors.flags.c_contiguous:
+            self._codes = vectors
+            self._size = needed
+            return np.arange(needed)
+
+        if needed > len(self._codes):
+            capacity = max(needed, 2 * len(self._codes), 16)
+            grown = np.empty((capacity, self.dim), dtype=PRECISIONS[self.precision])
+            grown[:self._size] = self._codes[:self._size]
+            self._codes = grown
+            if self._scales is not None:
+                scales = np.empty(capacity, dtype=np.float32)
+                scales[:self._size] = self._scales[:self._size]
+                self._scales = scales
+
+        ids = np.arange(self._size, needed)
+        for start in range(0, len(vectors), SCORE_CHUNK_SIZE):
+            chunk_ids = ids[start:start + SCORE_CHUNK_SIZE]
+            codes, scales = quantize_rows(vectors[start:start + SCORE_CHUNK_SIZE], self.precision)
+            self._codes[chunk_ids] = codes
+            if scales is not None:
+                self._scales[chunk_ids] = scales
+        self._size = needed
+        return ids
+
+    def update(self, ids: np.ndarray, vectors: np.ndarray):
+        """Перезаписать строки ids новыми векторами (id не меняются).
+
+        Хранилище только для чтения (memmap из кэша эмбеддингов) сначала
+        копируется в память.
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) == 0:
+            return
+        if not 0 <= ids.min() <= ids.max() < self._size:
+            raise IndexError(f"Embedding ids out of range for store of size {self._size}")
+        if not self._codes.flags.writeable:
+            self._codes = np.array(self._codes)
+        codes, scales = quantize_rows(np.asarray(vectors).reshape(len(ids), self.dim), self.precision)
+        self._codes[ids] = codes
+        if scales is not None:
+            self._scales[ids] = scales
+
+    def _decode(self, codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        decoded = np.asarray(codes, dtype=np.float32)
+        if scales is not None:
+            decoded = decoded * np.asarray(scales, dtype=np.float32)[..., None]
+        return decoded
+
+    def __getitem__(self, index) -> np.ndarray:
+        """Распакованные float32-строки по индексу, массиву id или срезу"""
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(self._size))
+        elif np.isscalar(index) and not 0 <= int(index) < self._size:
+            raise IndexError(f"Embedding index {index} out of range")
+        scales = None if self._scales is None else self._scales[index]
+        return self._decode(self._codes[index], scales)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if self.precision == "float32":
+            matrix = self.codes
+        else:
+            matrix = np.empty(self.shape, dtype=np.float32)
+            for start in range(0, self._size, SCORE_CHUNK_SIZE):
+                matrix[start:start + SCORE_CHUNK_SIZE] = self[start:start + SCORE_CHUNK_SIZE]
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
+
+    def scores(self, queries: np.ndarray, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Скалярные произведения (B, N) запросов со всеми строками или с ids.
+
+        Коды распаковываются блоками по SCORE_BLOCK_ROWS строк, масштаб int8
+        применяется к готовым произведениям: (q . c_i) * s_i.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        codes = self.codes if ids is None else self._codes[ids]
+        scales = self.scales if ids is None else (None if self._scales is None else self._scales[ids])
+        if self.precision == "float32":
+            return queries @ codes.T
+
+        result = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = slice(start, start + SCORE_BLOCK_ROWS)
+            result[:, block] = queries @ codes[block].astype(np.float32).T
+            if scales is not None:
+                result[:, block] *= scales[block]
+        return result
@@ -0,0 +1,130 @@
+# File: database/html_extractor.py
+import os
+import re
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+from config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+# Ключевые слова для тегов
+TAG_KEYWORDS = {
+    'python': ['python', 'питон', 'django', 'flask'],
+    'ml': ['машинное обучение', 'machine learning', 'нейронные', 'ai'],
+    'web': ['веб', 'web', 'html', 'css', 'javascript'],
+    'devops': ['devops', 'docker', 'kubernetes', 'ci/cd'],
+    'database': ['база данных', 'sql', 'postgresql', 'mysql'],
+    'algorithms': ['алгоритм', 'структура данных', 'сортировка']
+}
+MAX_TAGS = 3
+
+# Кодировка из <meta charset=...> или http-equiv Content-Type в начале документа
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?\s*([a-zA-Z0-9_-]+)', re.IGNORECASE)
+# Декларация <?xml ... encoding=...?> (lxml не принимает ее в str)
+_XML_DECL_RE = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+# Тело статьи Habr
+_HABR_BODY_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' article-formatted-body ')]"
+
+
+def extract_tags(content: str) -> List[str]:
+    """Теги по ключевым словам контента (не больше MAX_TAGS)"""
+    if not content:
+        return []
+    content_lower = content.lower()
+    tags = [tag for tag, keywords in TAG_KEYWORDS.items()
+            if any(keyword in content_lower for keyword in keywords)]
+    return tags[:MAX_TAGS]
+
+
+def _decode(html: bytes) -> str:
+    """Текст документа: кодировка из meta, иначе UTF-8 (битые байты заменяются)"""
+    match = _CHARSET_RE.search(html[:4096])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return html.decode(encoding, errors='replace')
+    except LookupError:
+        return html.decode('utf-8', errors='replace')
+
+
+def _text(element) -> str:
+    """Текст элемента без скриптов и стилей, пробелы схлопнуты"""
+    etree.strip_elements(element, 'script', 'style', 'noscript', with_tail=False)
+    return ' '.join(element.text_content().split())
+
+
+def extract_article(url: str, html: Optional[bytes], max_bytes: int = 0,
+                    content_chars: int = 2000) -> Dict:
+    """Заголовок, контент и теги страницы статьи за один разбор lxml.
+
+    Документ обрезается до max_bytes (0 — без ограничения). Для Habr
+    заголовок берется из <h1> (или <title>), контент — из
+    div.article-formatted-body; для остальных сайтов — <title> и весь текст
+    страницы, обрезанный до content_chars символов. title/content равны None,
+    если страницы нет или ее не удалось разобрать.
+    """
+    result = {'title': None, 'content': None, 'tags': [], 'truncated': False}
+    if not html:
+        return result
+    if max_bytes and len(html) > max_bytes:
+        html = html[:max_bytes]
+        result['truncated'] = True
+
+    try:
+        root = lxml.html.document_fromstring(_XML_DECL_RE.sub('', _decode(html), count=1))
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Error parsing HTML from {url}: {e}")
+        return result
+
+    title_tag = root.find('.//title')
+    if 'habr.com' in url:
+        heading = root.find('.//h1')
+        heading = heading if heading is not None else title_tag
+        title = heading.text_content().strip() if heading is not None else "Статья с Habr"
+        bodies = root.xpath(_HABR_BODY_XPATH)
+        content = _text(bodies[0]) if bodies else "Содержание недоступно"
+    else:
+        title = title_tag.text_content().strip() if title_tag is not None else None
+        content = _text(root)
+        content = content[:content_chars] + "..." if len(content) > content_chars else content
+
+    result.update(title=title or None, content=content, tags=extract_tags(content))
+    return result
+
+
+def _extract_packed(item: Tuple[str, Optional[bytes], int, int]) -> Dict:
+    return extract_article(*item)
+
+
+class HTMLExtractor:
+    """Разбор загруженных страниц в пуле процессов.
+
+    Разбор HTML упирается в CPU и GIL, поэтому идет отдельно от загрузки:
+    страницы отдаются процессам пачками по chunk_size. Для небольших
+    объемов (или workers=1) разбор выполняется в текущем процессе.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or Config.extraction
+        self.workers = self.config.workers or os.cpu_count() or 1
+
+    def extract_many(self, pages: List[Tuple[str, Optional[bytes]]]) -> List[Dict]:
+        """Результаты extract_article для пар (url, тело) в порядке pages"""
+        items = [(url, html, self.config.max_document_bytes, self.config.content_chars)
+                 for url, html in pages]
+        start = time.perf_counter()
+        if self.workers <= 1 or len(items) < 2 * self.config.chunk_size:
+            results = [_extract_packed(item) for item in items]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_extract_packed, items, chunksize=self.config.chunk_size))
+        truncated = sum(result['truncated'] for result in results)
+        logger.info(f"Extracted {len(items)} pages in {time.perf_counter() - start:.2f}s "
+                    f"({self.workers} workers, {truncated} truncated)")
+        return results
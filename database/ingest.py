@@ -0,0 +1,164 @@
+# File: database/ingest.py
+"""Инкрементальный импорт статей из Excel в существующий корпус.
+
+Таблица сравнивается с текущими статьями по URL: новые URL загружаются и
+дописываются в конец корпуса, существующие перепроверяются условным
+HTTP-запросом (ETag/Last-Modified) и обновляются, только если изменился
+хэш заголовка и контента. Кодируются лишь новые и измененные статьи; они
+дописываются (или перезаписываются) в хранилище эмбеддингов и векторный
+индекс. Id статей не меняются, статьи, пропавшие из таблицы, остаются в
+корпусе. Совместимый checkpoint политики переносится на новый корпус.
+
+Запуск из корня проекта:
+    python -m database.ingest --excel data/articles.xlsx
+    python -m database.ingest --excel data/new_links.xlsx --skip-existing
+    python -m database.ingest --dry-run
+"""
+import argparse
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import Config
+from .article_db import ArticleDatabase
+from .excel_loader import ExcelArticleLoader
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(article: Dict) -> str:
+    """Хэш заголовка и контента статьи (признак изменения страницы)"""
+    payload = "\x00".join([article.get('title') or "", article.get('content') or ""])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class IncrementalIngestor:
+    """Дифф таблицы с корпусом ArticleDatabase и применение изменений"""
+
+    def __init__(self, article_db: ArticleDatabase, loader: ExcelArticleLoader):
+        self.article_db = article_db
+        self.loader = loader
+
+    def plan(self, rows: List[Tuple[int, str]]) -> Dict:
+        """Разбор строк таблицы по URL: new — новые URL, existing — {URL: id},
+        missing — id статей, которых нет в таблице"""
+        ids_by_url = {}
+        for article_id, article in enumerate(self.article_db.get_all_articles()):
+            ids_by_url.setdefault((article.get('url') or "").strip(), article_id)
+
+        new, existing = [], {}
+        for _, url in rows:
+            if url in ids_by_url:
+                existing[url] = ids_by_url[url]
+            elif url not in new:
+                new.append(url)
+        listed = set(existing.values())
+        missing = [article_id for article_id in ids_by_url.values() if article_id not in listed]
+        return {'new': new, 'existing': existing, 'missing': missing}
+
+    def run(self, refresh_existing: bool = True, dry_run: bool = False) -> Dict:
+        """Импортировать изменения таблицы; статистика импорта"""
+        start = time.perf_counter()
+        rows = self.loader.read_rows()
+        plan = self.plan(rows)
+        stats = {'rows': len(rows), 'new': len(plan['new']), 'existing': len(plan['existing']),
+                 'missing': len(plan['missing']), 'changed': 0, 'not_modified': 0, 'failed': 0}
+        if dry_run:
+            return stats
+
+        existing_urls = list(plan['existing']) if refresh_existing else []
+        urls = plan['new'] + existing_urls
+        responses = self.loader.fetcher.fetch_many(urls)
+        self.loader.fetcher.close()
+
+        # Страницы, не изменившиеся с прошлой загрузки (304), не разбираются
+        to_extract = []
+        for url, response in zip(urls, responses):
+            if url in plan['existing'] and response['from_cache']:
+                stats['not_modified'] += 1
+            elif url in plan['existing'] and response['content'] is None:
+                # Существующая статья остается прежней, если страница недоступна
+                stats['failed'] += 1
+            else:
+                to_extract.append((url, response['content']))
+        pages = dict(zip([url for url, _ in to_extract], self.loader.extractor.extract_many(to_extract)))
+
+        articles = self.article_db.get_all_articles()
+        first_new = len(articles)
+        added = [self.loader.build_article(url, first_new + i, pages[url]) for i, url in enumerate(plan['new'])]
+        updated = {}
+        for url in existing_urls:
+            if url not in pages:
+                continue
+            if pages[url]['content'] is None:
+                stats['failed'] += 1
+                continue
+            article_id = plan['existing'][url]
+            article = self.loader.build_article(url, article_id, pages[url])
+            if content_hash(article) != content_hash(articles[article_id]):
+                updated[article_id] = article
+        stats['changed'] = len(updated)
+        stats['failed'] += sum(pages[url]['content'] is None for url in plan['new'])
+
+        if updated or added:
+            stats['added_ids'] = self.article_db.upsert_articles(updated, added)
+        else:
+            stats['added_ids'] = np.empty(0, dtype=np.int64)
+        stats['seconds'] = round(time.perf_counter() - start, 2)
+        return stats
+
+
+def carry_over_checkpoint(article_db: ArticleDatabase, config: Config, old_corpus_hash: str,
+                          old_action_dim: int, added_ids: np.ndarray, store=None) -> Optional[Dict]:
+    """Перенести новейший checkpoint прежнего корпуса на обновленный корпус"""
+    from agents.factory import create_agent
+    from models.state_encoder import StateEncoder
+    from training.checkpoints import CheckpointStore, checkpoint_metadata
+
+    state_dim = StateEncoder(article_db).get_state_dimension()
+    agent = create_agent(config.model, state_dim, old_action_dim, article_db)
+    old_metadata = dict(checkpoint_metadata(agent, article_db), corpus_hash=old_corpus_hash,
+                        action_dim=old_action_dim)
+    metadata = dict(old_metadata, corpus_hash=article_db.corpus_hash,
+                    action_dim=len(article_db.get_all_articles()))
+    store = store or CheckpointStore(config.CHECKPOINT_DIR, quantize_export=config.inference.quantize_policy)
+    embeddings = np.asarray(article_db.article_embeddings[added_ids], dtype=np.float32)
+    return store.carry_over(agent, old_metadata, metadata, added_ids, embeddings,
+                            metrics={'stage': 'ingest', 'added_articles': len(added_ids)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--excel", default=Config.EXCEL_PATH)
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="не перепроверять страницы уже импортированных URL")
+    parser.add_argument("--dry-run", action="store_true", help="только показать дифф таблицы и корпуса")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="не переносить checkpoint политики на новый корпус")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = Config()
+    article_db = ArticleDatabase(config.ARTICLES_PATH, cache_dir=config.EMBEDDINGS_CACHE_DIR)
+    old_corpus_hash, old_action_dim = article_db.corpus_hash, len(article_db.get_all_articles())
+
+    ingestor = IncrementalIngestor(article_db, ExcelArticleLoader(args.excel))
+    stats = ingestor.run(refresh_existing=not args.skip_existing, dry_run=args.dry_run)
+    added_ids = stats.pop('added_ids', np.empty(0, dtype=np.int64))
+    logger.info(f"Ingest {'plan' if args.dry_run else 'done'}: {stats}")
+
+    if args.dry_run or args.no_checkpoint or article_db.corpus_hash == old_corpus_hash or old_corpus_hash is None:
+        return
+    entry = carry_over_checkpoint(article_db, config, old_corpus_hash, old_action_dim, added_ids)
+    if entry is not None:
+        logger.info(f"Checkpoint v{entry['metrics']['carried_from']} carried over as v{entry['version']} "
+                    f"({old_action_dim} -> {entry['action_dim']} actions)")
+    else:
+        logger.info("No compatible checkpoint to carry over, the policy will be trained on next start")
+
+
+if __name__ == "__main__":
+    main()
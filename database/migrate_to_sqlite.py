@@ -0,0 +1,97 @@
+# File: database/migrate_to_sqlite.py
+"""Миграция пользователей и сессий из JSON-бэкенда (снимок + журнал + архив) в SQLite.
+
+Запуск из корня проекта:
+    python -m database.migrate_to_sqlite --sessions data/user_sessions.json \\
+        --users data/users.json --db data/recommender.db
+Файлы JSON-бэкенда только читаются: снимок, хвост журнала после него и
+архив вытесненных ходов собираются в памяти без компакции.
+После миграции задайте Config.STORAGE_BACKEND = "sqlite".
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from config.settings import Config
+from .session_journal import read_journal
+from .session_manager import apply_interaction, load_snapshot, session_from_create
+from .sqlite_store import HistoryArchive, SQLiteConnections, SQLiteSessionManager
+
+logger = logging.getLogger(__name__)
+
+def load_sessions(sessions_path: str, archive: Optional[HistoryArchive]) -> Tuple[Dict[str, Dict], Set[str]]:
+    """Сессии JSON-бэкенда: снимок + записи журнала после него (replay теми же
+    функциями, что и SessionManager, но без окна и записи на диск).
+    Возвращает сессии и id сессий, пересозданных в журнале, — их архивная
+    история больше не действует"""
+    sessions, last_seq = load_snapshot(sessions_path)
+    recreated = set()
+    for record in read_journal(f"{sessions_path}.journal", after_seq=last_seq):
+        user_id = record['user_id']
+        if record['op'] == 'create':
+            sessions[user_id] = session_from_create(record)
+            recreated.add(user_id)
+        elif record['op'] == 'interaction':
+            session = sessions.get(user_id)
+            if session is None and archive is not None:
+                # Сессия выгружена в архив: нужны только ее агрегаты, ходы перенесет import_archive
+                session = archive.load_session(user_id, 0)
+                if session is not None:
+                    sessions[user_id] = session
+            if session is None:
+                logger.warning(f"Skipping journal record {record['seq']} for unknown session {user_id}")
+                continue
+            apply_interaction(session, record['interaction'])
+    return sessions, recreated
+
+def migrate(sessions_path: str, users_path: str, db_path: str):
+    """Перенос данных; возвращает (число пользователей, число сессий)"""
+    from auth.sqlite_user_db import SQLiteUserDatabase
+
+    users = {}
+    if os.path.exists(users_path):
+        with open(users_path, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+
+    archive_path = f"{sessions_path}.archive.db"
+    archive = HistoryArchive(archive_path) if os.path.exists(archive_path) else None
+    try:
+        sessions, recreated = load_sessions(sessions_path, archive)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    connections = SQLiteConnections(db_path)
+    try:
+        SQLiteUserDatabase(db_path, connections).import_users(users)
+        session_manager = SQLiteSessionManager(db_path, connections)
+        if archive is not None:
+            session_manager.import_archive(archive_path)
+        if recreated:
+            with connections.transaction() as conn:
+                conn.executemany("DELETE FROM interactions WHERE user_id = ?", ((u,) for u in recreated))
+        # Сессии из снимка и журнала новее архивных строк — они перезаписывают их
+        session_manager.import_sessions(sessions)
+        n_sessions = session_manager.session_count()
+    finally:
+        connections.close()
+    return len(users), n_sessions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default=Config.SESSIONS_PATH)
+    parser.add_argument("--users", default=Config.USERS_PATH)
+    parser.add_argument("--db", default=Config.SQLITE_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    n_users, n_sessions = migrate(args.sessions, args.users, args.db)
+    logger.info(f"Migrated {n_users} users and {n_sessions} sessions to {args.db} "
+                f"in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# File: database/session_journal.py
+import json
+import os
+import threading
+import logging
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def write_file_atomic(path: str, data: str):
+    """Crash-safe запись файла: temp-файл + fsync + rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_journal(path: str, after_seq: int = 0) -> Iterator[Dict]:
+    """Чтение записей журнала с seq > after_seq (оборванная строка пропускается)"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping torn journal record at {path}:{line_number}")
+                continue
+            if record.get('seq', 0) > after_seq:
+                yield record
+
+class SessionJournal:
+    """Append-only JSONL журнал (write-ahead log) с групповой фиксацией.
+
+    append() только ставит запись в буфер и сразу возвращает ее номер (seq);
+    фоновый поток раз в commit_interval_ms пишет накопившиеся записи одним
+    write и одним fsync. wait_for(seq) ждет долговечности записи: писатели,
+    пришедшие в одно окно, ждут один общий fsync.
+    """
+
+    def __init__(self, path: str, commit_interval_ms: float = 50.0):
+        self.path = path
+        self.commit_interval = commit_interval_ms / 1000.0
+        self.last_seq = 0
+        self.committed_seq = 0
+
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._committed = threading.Condition(self._lock)
+        self._closed = False
+        self._stop = threading.Event()  # прерывает окно фиксации при close()
+
+        for record in self.replay():
+            self.last_seq = max(self.last_seq, record['seq'])
+        self.committed_seq = self.last_seq
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict]:
+        """Записи журнала с seq > after_seq"""
+        return read_journal(self.path, after_seq)
+
+    def append(self, record: Dict) -> int:
+        """Добавить запись; возвращает присвоенный ей seq"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Journal is closed")
+            self.last_seq += 1
+            record['seq'] = self.last_seq
+            self._pending.append(record)
+            self._has_pending.notify()
+            return self.last_seq
+
+    def wait_for(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Дождаться, пока запись seq будет записана на диск с fsync"""
+        with self._lock:
+            return self._committed.wait_for(lambda: self.committed_seq >= seq, timeout)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._has_pending.wait_for(lambda: self._pending or self._closed)
+                if self._closed and not self._pending:
+                    return
+            # Копим записи в течение окна групповой фиксации
+            self._stop.wait(self.commit_interval)
+            with self._lock:
+                self._commit_locked()
+
+    def _commit_locked(self):
+        """Записать буфер одним write + fsync (под self._lock)"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self._file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.committed_seq = batch[-1]['seq']
+            self._committed.notify_all()
+        except OSError as e:
+            logger.error(f"Error writing session journal: {e}")
+            # Возвращаем записи в буфер — повторим при следующей фиксации
+            self._pending = batch + self._pending
+
+    def flush(self):
+        """Немедленно зафиксировать буфер"""
+        with self._lock:
+            self._commit_locked()
+
+    def truncate_through(self, seq: int):
+        """Удалить из журнала записи с seq <= seq (они уже вошли в снимок)"""
+        with self._lock:
+            self._commit_locked()
+            self._file.close()
+            tail = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in self.replay(after_seq=seq))
+            write_file_atomic(self.path, tail)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        """Зафиксировать остаток и остановить фоновый поток"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._stop.set()
+            self._has_pending.notify()
+        self._thread.join()
+        with self._lock:
+            self._commit_locked()
+            self._file.close()
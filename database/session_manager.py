@@ -1,97 +1,318 @@
 # File: database/session_manager.py
 import json
+import time
 import uuid
+import threading
+import logging
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 import os
 
+from .session_journal import SessionJournal, write_file_atomic
+from .sqlite_store import HistoryArchive, interaction_row, next_history_cursor
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+
+def load_snapshot(sessions_path: str) -> Tuple[Dict[str, Dict], int]:
+    """Загрузка снимка сессий из файла с обработкой ошибок; возвращает (сессии, last_seq)"""
+    try:
+        # Проверяем существует ли файл и не пустой ли он
+        if not os.path.exists(sessions_path) or os.path.getsize(sessions_path) == 0:
+            return {}, 0
+
+        with open(sessions_path, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+            if not content:  # Если файл пустой
+                return {}, 0
+
+            data = json.loads(content)
+            # Снимок с номером последней вошедшей в него записи журнала
+            if data.get('format') == SNAPSHOT_FORMAT and 'sessions' in data:
+                return data['sessions'], data.get('last_seq', 0)
+            # Старый формат: просто словарь сессий
+            return data, 0
+
+    except (json.JSONDecodeError, Exception) as e:
+        logger.error(f"Error loading sessions: {e}. Starting with empty sessions.")
+        return {}, 0
+
+def session_from_create(record: Dict) -> Dict:
+    """Пустая сессия из записи журнала create"""
+    return {
+        'created_at': record['timestamp'],
+        'updated_at': record['timestamp'],
+        'conversation_history': [],
+        'total_reward': 0.0,
+        'interaction_count': 0
+    }
+
+def apply_interaction(session: Dict, interaction: Dict):
+    """Добавить ход из записи журнала interaction в историю и агрегаты сессии"""
+    session['conversation_history'].append(interaction)
+    session['total_reward'] += interaction['reward']
+    session['interaction_count'] += 1
+    session['updated_at'] = interaction['timestamp']
+
 class SessionManager:
-    def __init__(self, sessions_path: str):
+    """Сессии пользователей: снимок в sessions_path + журнал изменений.
+
+    Каждое изменение пишется в append-only журнал (<sessions_path>.journal)
+    одной строкой; фоновая компакция периодически сохраняет снимок и обрезает
+    журнал. При старте загружается снимок и проигрывается хвост журнала с
+    seq > last_seq снимка.
+
+    В памяти у сессии хранится только окно последних history_window ходов
+    (deque); более старые ходы и сессии, простаивающие дольше idle_ttl_s,
+    уходят в SQLite-архив (<sessions_path>.archive.db) и подгружаются
+    из него по требованию.
+    """
+    def __init__(self, sessions_path: str, config=None):
+        if config is None:
+            from config.settings import SessionStoreConfig
+            config = SessionStoreConfig()
         self.sessions_path = sessions_path
-        self.sessions = self._load_sessions()
-    
-    def _load_sessions(self) -> Dict[str, Dict]:
-        """Загрузка сессий из файла с обработкой ошибок"""
+        self.config = config
+        self.history_window = config.history_window
+        self._lock = threading.RLock()
+
         # Создаем директорию если не существует
-        os.makedirs(os.path.dirname(self.sessions_path), exist_ok=True)
-        
-        try:
-            # Проверяем существует ли файл и не пустой ли он
-            if not os.path.exists(self.sessions_path) or os.path.getsize(self.sessions_path) == 0:
-                return {}
-            
-            with open(self.sessions_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:  # Если файл пустой
-                    return {}
-                
-                return json.loads(content)
-                
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Error loading sessions: {e}. Starting with empty sessions.")
-            return {}
-    
-    def _save_sessions(self):
-        """Сохранение сессий в файл"""
-        try:
-            with open(self.sessions_path, 'w', encoding='utf-8') as f:
-                json.dump(self.sessions, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving sessions: {e}")
-    
+        os.makedirs(os.path.dirname(sessions_path) or '.', exist_ok=True)
+        self.archive = HistoryArchive(f"{sessions_path}.archive.db")
+        # Ходы, вытесненные из окна, но еще не записанные в архив
+        self._archive_pending: List[tuple] = []
+        # Сессии в памяти, у которых есть строка в архиве
+        self._in_archive: Set[str] = set()
+        self._last_access: Dict[str, float] = {}
+
+        self.sessions: Dict[str, Dict] = {}
+        snapshot, self.snapshot_seq = load_snapshot(sessions_path)
+        for user_id, session in snapshot.items():
+            self._install(user_id, session)
+
+        self.journal = SessionJournal(f"{sessions_path}.journal", config.commit_interval_ms)
+        replayed = 0
+        for record in self.journal.replay(after_seq=self.snapshot_seq):
+            self._apply(record)
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} session journal records")
+        self.journal.last_seq = max(self.journal.last_seq, self.snapshot_seq)
+
+        self._stop = threading.Event()
+        self._compactor = threading.Thread(target=self._run_compaction, name="session-compactor", daemon=True)
+        self._compactor.start()
+
+    def _install(self, user_id: str, session: Dict):
+        """Поместить сессию в память, обрезав историю до окна"""
+        history = session['conversation_history']
+        first_turn = max(0, session['interaction_count'] - len(history))
+        overflow = max(0, len(history) - self.history_window)
+        for offset in range(overflow):
+            self._archive_pending.append(interaction_row(user_id, first_turn + offset, history[offset]))
+        session['conversation_history'] = deque(history[overflow:], maxlen=self.history_window)
+        self.sessions[user_id] = session
+        self._last_access[user_id] = time.monotonic()
+
+    def _get_session(self, user_id: str) -> Optional[Dict]:
+        """Сессия из памяти или, если она выгружена, из архива"""
+        with self._lock:
+            session = self.sessions.get(user_id)
+            if session is None:
+                session = self.archive.load_session(user_id, self.history_window)
+                if session is None:
+                    return None
+                self._install(user_id, session)
+                self._in_archive.add(user_id)
+            self._last_access[user_id] = time.monotonic()
+            return session
+
+    def _apply(self, record: Dict):
+        """Применение записи журнала к сессиям в памяти (и при работе, и при replay)"""
+        user_id = record['user_id']
+        if record['op'] == 'create':
+            # Новая сессия заменяет прежнюю вместе с ее архивом
+            if user_id in self._in_archive or self.archive.has_session(user_id):
+                self.archive.delete_session(user_id)
+            self._archive_pending = [row for row in self._archive_pending if row[0] != user_id]
+            self._in_archive.discard(user_id)
+            self._install(user_id, session_from_create(record))
+        elif record['op'] == 'interaction':
+            session = self._get_session(user_id)
+            history = session['conversation_history']
+            if len(history) == history.maxlen:
+                # Ход, вытесняемый из окна, уходит в архив
+                oldest_turn = session['interaction_count'] - len(history)
+                self._archive_pending.append(interaction_row(user_id, oldest_turn, history[0]))
+            apply_interaction(session, record['interaction'])
+        else:
+            logger.warning(f"Unknown session journal op: {record['op']}")
+
+    def _record(self, record: Dict) -> int:
+        """Применить изменение и дописать его в журнал (в одном порядке); seq записи"""
+        with self._lock:
+            self._apply(record)
+            return self.journal.append(record)
+
+    def _wait_durable(self, seq: int):
+        """Дождаться fsync записи журнала (вне self._lock — иначе писатели
+        не попадут в одно окно групповой фиксации)"""
+        if not self.journal.wait_for(seq, self.config.commit_timeout_s):
+            raise RuntimeError(f"Session journal record {seq} was not committed "
+                               f"within {self.config.commit_timeout_s}s")
+
+    def _create_record(self, user_id: str) -> int:
+        return self._record({
+            'op': 'create',
+            'user_id': user_id,
+            'timestamp': datetime.now().isoformat()
+        })
+
     def create_session(self, user_id: Optional[str] = None) -> str:
-        """Создание новой сессии"""
+        """Создание новой сессии (возвращается после fsync записи журнала)"""
         if user_id is None:
             user_id = str(uuid.uuid4())
-        
-        self.sessions[user_id] = {
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
-            'conversation_history': [],
-            'total_reward': 0.0,
-            'interaction_count': 0
-        }
-        
-        self._save_sessions()
+
+        self._wait_durable(self._create_record(user_id))
         return user_id
-    
-    def add_interaction(self, user_id: str, user_query: str, 
-                       recommended_article: Dict, reward: float):
-        """Добавление взаимодействия в историю сессии"""
-        if user_id not in self.sessions:
-            self.create_session(user_id)
-        
-        interaction = {
-            'timestamp': datetime.now().isoformat(),
-            'user_query': user_query,
-            'recommended_article': {
-                'id': recommended_article['id'],
-                'title': recommended_article['title'],
-                'url': recommended_article['url']
-            },
-            'reward': reward
-        }
-        
-        self.sessions[user_id]['conversation_history'].append(interaction)
-        self.sessions[user_id]['total_reward'] += reward
-        self.sessions[user_id]['interaction_count'] += 1
-        self.sessions[user_id]['updated_at'] = datetime.now().isoformat()
-        
-        self._save_sessions()
-    
+
+    def add_interaction(self, user_id: str, user_query: str,
+                       recommended_article: Dict, reward: float) -> bool:
+        """Добавление взаимодействия в историю сессии (возвращается после fsync записи журнала).
+
+        Недостающая сессия создается под той же блокировкой; True, если она создана.
+        """
+        with self._lock:
+            created = self._get_session(user_id) is None
+            if created:
+                self._create_record(user_id)
+
+            interaction = {
+                'timestamp': datetime.now().isoformat(),
+                'user_query': user_query,
+                'recommended_article': {
+                    'id': recommended_article['id'],
+                    'title': recommended_article['title'],
+                    'url': recommended_article['url']
+                },
+                'reward': reward
+            }
+
+            seq = self._record({'op': 'interaction', 'user_id': user_id, 'interaction': interaction})
+        # Запись create (если была) идет раньше в том же журнале — ждать последнюю достаточно
+        self._wait_durable(seq)
+        return created
+
+    def _flush_archive(self, evict: Optional[List[str]] = None):
+        """Записать вытесненные ходы (и выгружаемые сессии целиком) в архив (под self._lock)"""
+        evict = evict or []
+        turn_rows = list(self._archive_pending)
+        session_rows = []
+        for user_id in evict:
+            session = self.sessions[user_id]
+            history = session['conversation_history']
+            first_turn = session['interaction_count'] - len(history)
+            turn_rows.extend(interaction_row(user_id, first_turn + offset, item)
+                             for offset, item in enumerate(history))
+            session_rows.append((user_id, session['created_at'], session['updated_at'],
+                                 session['total_reward'], session['interaction_count']))
+
+        self.archive.write(turn_rows, session_rows)
+        self._archive_pending = []
+        for user_id in evict:
+            del self.sessions[user_id]
+            del self._last_access[user_id]
+            self._in_archive.discard(user_id)
+
+    def compact(self):
+        """Архивировать вытесненное, выгрузить простаивающие сессии,
+        сохранить снимок (temp + fsync + rename) и обрезать журнал"""
+        try:
+            with self._lock:
+                now = time.monotonic()
+                idle = [user_id for user_id, accessed in self._last_access.items()
+                        if now - accessed > self.config.idle_ttl_s]
+                last_seq = self.journal.last_seq
+                if not idle and not self._archive_pending and last_seq == self.snapshot_seq:
+                    return
+                # Архив пишется до снимка: снимок не должен ссылаться на то, чего нет на диске
+                self._flush_archive(evict=idle)
+                data = json.dumps({
+                    'format': SNAPSHOT_FORMAT,
+                    'last_seq': last_seq,
+                    'sessions': self.sessions
+                }, ensure_ascii=False, default=list)
+
+            write_file_atomic(self.sessions_path, data)
+            self.snapshot_seq = last_seq
+            # Журнал обрезается только после того, как снимок на диске
+            self.journal.truncate_through(last_seq)
+            logger.info(f"Compacted sessions snapshot through seq {last_seq}, evicted {len(idle)} idle sessions")
+        except Exception as e:
+            logger.error(f"Error compacting sessions: {e}")
+
+    def _run_compaction(self):
+        last_compaction = time.monotonic()
+        while not self._stop.wait(1.0):
+            pending = self.journal.last_seq - self.snapshot_seq
+            elapsed = time.monotonic() - last_compaction
+            if pending >= self.config.compact_after_records or elapsed >= self.config.compact_interval_s:
+                self.compact()
+                last_compaction = time.monotonic()
+
+    def close(self):
+        """Остановка компакции, финальный снимок и закрытие журнала"""
+        self._stop.set()
+        self._compactor.join()
+        self.compact()
+        self.journal.close()
+        self.archive.close()
+
+    def has_session(self, user_id: str) -> bool:
+        return self._get_session(user_id) is not None
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self.sessions) + self.archive.count_sessions() - len(self._in_archive)
+
     def get_session_history(self, user_id: str) -> List[Dict]:
-        """Получение истории сессии"""
-        if user_id in self.sessions:
-            return self.sessions[user_id]['conversation_history']
+        """Получение окна последних ходов сессии (полная история — get_history_page)"""
+        session = self._get_session(user_id)
+        if session is not None:
+            return list(session['conversation_history'])
         return []
-    
+
+    def get_history_page(self, user_id: str, cursor: Optional[int] = None, limit: int = 20) -> Dict:
+        """Страница истории от новых к старым; cursor — turn, с которого продолжить"""
+        with self._lock:
+            session = self._get_session(user_id)
+            if session is None:
+                return {'items': [], 'next_cursor': None}
+
+            history = session['conversation_history']
+            first_hot = session['interaction_count'] - len(history)
+            turn = session['interaction_count'] if cursor is None else min(cursor, session['interaction_count'])
+
+            items = []
+            while turn > first_hot and len(items) < limit:
+                turn -= 1
+                items.append(dict(history[turn - first_hot], turn=turn))
+            if len(items) < limit and turn > 0:
+                # Старые ходы — из архива; недописанные туда сначала сбрасываются
+                self._flush_archive()
+                items.extend(self.archive.get_page(user_id, turn, limit - len(items)))
+
+        return {'items': items, 'next_cursor': next_history_cursor(items)}
+
     def get_session_stats(self, user_id: str) -> Optional[Dict]:
         """Получение статистики сессии"""
-        if user_id in self.sessions:
-            session = self.sessions[user_id]
-            avg_reward = (session['total_reward'] / session['interaction_count'] 
+        session = self._get_session(user_id)
+        if session is not None:
+            avg_reward = (session['total_reward'] / session['interaction_count']
                          if session['interaction_count'] > 0 else 0)
-            
+
             return {
                 'user_id': user_id,
                 'created_at': session['created_at'],
@@ -0,0 +1,284 @@
+# File: database/sqlite_store.py
+import sqlite3
+import threading
+import uuid
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import os
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    hashed_password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    total_reward REAL NOT NULL DEFAULT 0,
+    interaction_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    user_query TEXT NOT NULL,
+    article_id INTEGER,
+    article_title TEXT,
+    article_url TEXT,
+    reward REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_user_turn ON interactions(user_id, turn);
+"""
+
+# Запросы — константные строки: sqlite3 кэширует подготовленные выражения по тексту
+_INSERT_SESSION = "INSERT OR REPLACE INTO sessions (user_id, created_at, updated_at) VALUES (?, ?, ?)"
+_DELETE_INTERACTIONS = "DELETE FROM interactions WHERE user_id = ?"
+_SELECT_SESSION = ("SELECT created_at, updated_at, total_reward, interaction_count "
+                   "FROM sessions WHERE user_id = ?")
+_SELECT_TURN = "SELECT interaction_count FROM sessions WHERE user_id = ?"
+_INSERT_INTERACTION = ("INSERT INTO interactions (user_id, turn, timestamp, user_query, "
+                       "article_id, article_title, article_url, reward) VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+_UPDATE_AGGREGATES = ("UPDATE sessions SET total_reward = total_reward + ?, "
+                      "interaction_count = interaction_count + 1, updated_at = ? WHERE user_id = ?")
+_SELECT_HISTORY = ("SELECT timestamp, user_query, article_id, article_title, article_url, reward "
+                   "FROM interactions WHERE user_id = ? ORDER BY turn")
+_SELECT_PAGE = ("SELECT turn, timestamp, user_query, article_id, article_title, article_url, reward "
+                "FROM interactions WHERE user_id = ? AND turn < ? ORDER BY turn DESC LIMIT ?")
+_SELECT_LAST_TURNS = ("SELECT timestamp, user_query, article_id, article_title, article_url, reward "
+                      "FROM interactions WHERE user_id = ? ORDER BY turn DESC LIMIT ?")
+_ARCHIVE_INTERACTION = _INSERT_INTERACTION.replace("INSERT INTO", "INSERT OR IGNORE INTO")
+_UPSERT_SESSION = "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)"
+_SESSION_EXISTS = "SELECT 1 FROM sessions WHERE user_id = ?"
+_COUNT_SESSIONS = "SELECT COUNT(*) FROM sessions"
+
+def interaction_row(user_id: str, turn: int, item: Dict) -> tuple:
+    """Строка таблицы interactions из взаимодействия в формате JSON-бэкенда"""
+    article = item['recommended_article']
+    return (user_id, turn, item['timestamp'], item['user_query'],
+            article['id'], article['title'], article['url'], item['reward'])
+
+def _interaction_from_row(timestamp, user_query, article_id, title, url, reward) -> Dict:
+    return {
+        'timestamp': timestamp,
+        'user_query': user_query,
+        'recommended_article': {'id': article_id, 'title': title, 'url': url},
+        'reward': reward
+    }
+
+def fetch_history_page(conn: sqlite3.Connection, user_id: str, before_turn: int, limit: int) -> List[Dict]:
+    """Взаимодействия с turn < before_turn, от новых к старым (по индексу (user_id, turn))"""
+    return [
+        dict(_interaction_from_row(*row[1:]), turn=row[0])
+        for row in conn.execute(_SELECT_PAGE, (user_id, before_turn, limit))
+    ]
+
+def next_history_cursor(items: List[Dict]) -> Optional[int]:
+    """Курсор следующей страницы: turn последнего элемента (None — история закончилась)"""
+    if items and items[-1]['turn'] > 0:
+        return items[-1]['turn']
+    return None
+
+class SQLiteConnections:
+    """Соединения с SQLite по одному на поток (WAL: читатели не блокируют писателя)"""
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.get().executescript(SCHEMA)
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: транзакции открываются явно (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(self.db_path, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    def transaction(self) -> "_Transaction":
+        return _Transaction(self.get())
+
+    def close(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._local = threading.local()
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT / ROLLBACK"""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+class SQLiteSessionManager:
+    """SessionManager поверх SQLite: те же методы, история в таблице interactions,
+    статистика сессии — в агрегатных столбцах sessions (без пересчета истории)."""
+    def __init__(self, db_path: str, connections: Optional[SQLiteConnections] = None):
+        self.db_path = db_path
+        self.connections = connections or SQLiteConnections(db_path)
+
+    def create_session(self, user_id: Optional[str] = None) -> str:
+        """Создание новой сессии"""
+        if user_id is None:
+            user_id = str(uuid.uuid4())
+
+        now = datetime.now().isoformat()
+        with self.connections.transaction() as conn:
+            conn.execute(_DELETE_INTERACTIONS, (user_id,))
+            conn.execute(_INSERT_SESSION, (user_id, now, now))
+        return user_id
+
+    def add_interaction(self, user_id: str, user_query: str,
+                        recommended_article: Dict, reward: float) -> bool:
+        """Добавление взаимодействия в историю сессии; недостающая сессия
+        создается в той же транзакции, True — если она создана"""
+        now = datetime.now().isoformat()
+        with self.connections.transaction() as conn:
+            row = conn.execute(_SELECT_TURN, (user_id,)).fetchone()
+            created = row is None
+            if created:
+                conn.execute(_INSERT_SESSION, (user_id, now, now))
+                turn = 0
+            else:
+                turn = row[0]
+            conn.execute(_INSERT_INTERACTION, (
+                user_id, turn, now, user_query, recommended_article['id'],
+                recommended_article['title'], recommended_article['url'], reward
+            ))
+            conn.execute(_UPDATE_AGGREGATES, (reward, now, user_id))
+        return created
+
+    def import_sessions(self, sessions: Dict[str, Dict]):
+        """Массовая загрузка сессий в формате JSON-бэкенда (одна транзакция)"""
+        with self.connections.transaction() as conn:
+            conn.executemany(
+                _UPSERT_SESSION,
+                ((user_id, s['created_at'], s['updated_at'], s['total_reward'], s['interaction_count'])
+                 for user_id, s in sessions.items())
+            )
+            conn.executemany(_ARCHIVE_INTERACTION, self._interaction_rows(sessions))
+
+    def import_archive(self, archive_path: str):
+        """Перенос архива JSON-бэкенда (HistoryArchive); он уже в формате этой БД"""
+        conn = self.connections.get()
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        try:
+            with self.connections.transaction():
+                conn.execute("INSERT OR IGNORE INTO main.sessions SELECT * FROM archive.sessions")
+                conn.execute(
+                    "INSERT OR IGNORE INTO main.interactions (user_id, turn, timestamp, user_query, "
+                    "article_id, article_title, article_url, reward) SELECT user_id, turn, timestamp, "
+                    "user_query, article_id, article_title, article_url, reward FROM archive.interactions"
+                )
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+    @staticmethod
+    def _interaction_rows(sessions: Dict[str, Dict]) -> Iterable[tuple]:
+        for user_id, session in sessions.items():
+            # В JSON-бэкенде в памяти может быть только окно последних ходов
+            history = session['conversation_history']
+            first_turn = max(0, session['interaction_count'] - len(history))
+            for offset, item in enumerate(history):
+                yield interaction_row(user_id, first_turn + offset, item)
+
+    def has_session(self, user_id: str) -> bool:
+        return self.connections.get().execute(_SESSION_EXISTS, (user_id,)).fetchone() is not None
+
+    def session_count(self) -> int:
+        return self.connections.get().execute(_COUNT_SESSIONS).fetchone()[0]
+
+    def get_session_history(self, user_id: str) -> List[Dict]:
+        """Получение истории сессии"""
+        rows = self.connections.get().execute(_SELECT_HISTORY, (user_id,)).fetchall()
+        return [_interaction_from_row(*row) for row in rows]
+
+    def get_history_page(self, user_id: str, cursor: Optional[int] = None, limit: int = 20) -> Dict:
+        """Страница истории от новых к старым; cursor — turn, с которого продолжить"""
+        before_turn = cursor if cursor is not None else 2 ** 62
+        items = fetch_history_page(self.connections.get(), user_id, before_turn, limit)
+        return {'items': items, 'next_cursor': next_history_cursor(items)}
+
+    def get_session_stats(self, user_id: str) -> Optional[Dict]:
+        """Получение статистики сессии (из агрегатных столбцов)"""
+        row = self.connections.get().execute(_SELECT_SESSION, (user_id,)).fetchone()
+        if row is None:
+            return None
+        created_at, _, total_reward, interaction_count = row
+        return {
+            'user_id': user_id,
+            'created_at': created_at,
+            'interaction_count': interaction_count,
+            'total_reward': total_reward,
+            'avg_reward': total_reward / interaction_count if interaction_count > 0 else 0
+        }
+
+    def close(self):
+        self.connections.close()
+
+class HistoryArchive:
+    """Холодный архив JSON-бэкенда в формате SQLite-бэкенда: ходы, вытесненные
+    из окна в памяти, и сессии, выгруженные из памяти по простою."""
+    def __init__(self, db_path: str, connections: Optional[SQLiteConnections] = None):
+        self.db_path = db_path
+        self.connections = connections or SQLiteConnections(db_path)
+
+    def write(self, turn_rows: List[tuple], session_rows: List[tuple]):
+        """Одна транзакция: ходы (идемпотентно по (user_id, turn)) и строки сессий"""
+        if not turn_rows and not session_rows:
+            return
+        with self.connections.transaction() as conn:
+            conn.executemany(_ARCHIVE_INTERACTION, turn_rows)
+            conn.executemany(_UPSERT_SESSION, session_rows)
+
+    def delete_session(self, user_id: str):
+        with self.connections.transaction() as conn:
+            conn.execute(_DELETE_INTERACTIONS, (user_id,))
+            conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def has_session(self, user_id: str) -> bool:
+        return self.connections.get().execute(_SESSION_EXISTS, (user_id,)).fetchone() is not None
+
+    def load_session(self, user_id: str, window: int) -> Optional[Dict]:
+        """Сессия в формате JSON-бэкенда с последними window ходами"""
+        conn = self.connections.get()
+        row = conn.execute(_SELECT_SESSION, (user_id,)).fetchone()
+        if row is None:
+            return None
+        created_at, updated_at, total_reward, interaction_count = row
+        turns = conn.execute(_SELECT_LAST_TURNS, (user_id, window)).fetchall()
+        return {
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'conversation_history': [_interaction_from_row(*turn) for turn in reversed(turns)],
+            'total_reward': total_reward,
+            'interaction_count': interaction_count
+        }
+
+    def get_page(self, user_id: str, before_turn: int, limit: int) -> List[Dict]:
+        return fetch_history_page(self.connections.get(), user_id, before_turn, limit)
+
+    def count_sessions(self) -> int:
+        return self.connections.get().execute(_COUNT_SESSIONS).fetchone()[0]
+
+    def close(self):
+        self.connections.close()
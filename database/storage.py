@@ -0,0 +1,26 @@
+# File: database/storage.py
+import logging
+
+from .session_manager import SessionManager
+from .sqlite_store import SQLiteConnections, SQLiteSessionManager
+
+logger = logging.getLogger(__name__)
+
+def create_storage(config):
+    """Создание (user_db, session_manager) для выбранного Config.STORAGE_BACKEND"""
+    from auth.user_db import UserDatabase
+    from auth.sqlite_user_db import SQLiteUserDatabase
+
+    if config.STORAGE_BACKEND == "sqlite":
+        # Пользователи и сессии в одном файле БД с общим пулом соединений
+        connections = SQLiteConnections(config.SQLITE_PATH)
+        user_db = SQLiteUserDatabase(config.SQLITE_PATH, connections)
+        session_manager = SQLiteSessionManager(config.SQLITE_PATH, connections)
+    elif config.STORAGE_BACKEND == "json":
+        user_db = UserDatabase(config.USERS_PATH)
+        session_manager = SessionManager(config.SESSIONS_PATH, config.session_store)
+    else:
+        raise ValueError(f"Unknown storage backend: {config.STORAGE_BACKEND}")
+
+    logger.info(f"Storage backend: {config.STORAGE_BACKEND}")
+    return user_db, session_manager
@@ -0,0 +1,323 @@
+# File: database/vector_index.py
+import os
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .embedding_store import EmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Индексы top-k максимальных значений по последней оси (по убыванию).
+
+    argpartition выбирает k лучших за O(N), сортируются только они.
+    """
+    n = scores.shape[-1]
+    top_k = min(top_k, n)
+    if top_k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if top_k < n:
+        part = np.argpartition(-scores, top_k - 1, axis=-1)[..., :top_k]
+    else:
+        part = np.broadcast_to(np.arange(n), scores.shape).copy()
+    part_scores = np.take_along_axis(scores, part, axis=-1)
+    order = np.argsort(-part_scores, axis=-1, kind='stable')
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iters: int = 10,
+           seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Сферический k-means (по скалярному произведению).
+
+    Возвращает центроиды (n_clusters, dim) и номер кластера для каждого вектора.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    n_clusters = max(1, min(n_clusters, n))
+    centroids = vectors[rng.choice(n, n_clusters, replace=False)].astype(np.float32)
+
+    assignments = np.zeros(n, dtype=np.int64)
+    for _ in range(iters):
+        assignments = assign_to_centroids(vectors, centroids)
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+
+        # Пустые кластеры переинициализируем случайными точками
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(n, int(empty.sum()), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, 1e-12)
+
+    return centroids, assign_to_centroids(vectors, centroids)
+
+
+def train_centroids(vectors: np.ndarray, n_clusters: int, iters: int = 10,
+                    seed: int = 0, points_per_cluster: int = 256) -> np.ndarray:
+    """Центроиды k-means по подвыборке (~points_per_cluster точек на кластер)"""
+    max_points = points_per_cluster * n_clusters
+    if len(vectors) > max_points:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[np.sort(rng.choice(len(vectors), max_points, replace=False))]
+    centroids, _ = kmeans(np.asarray(vectors, dtype=np.float32), n_clusters, iters, seed)
+    return centroids
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray,
+                        chunk_size: int = 65536) -> np.ndarray:
+    """Ближайший центроид для каждого вектора (по чанкам, чтобы не раздувать память)"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class VectorIndex:
+    """Базовый интерфейс индекса: поиск по скалярному произведению.
+
+    Векторы лежат в EmbeddingStore заданной точности (float32/float16/int8);
+    скоринг идет по компактной форме.
+    """
+
+    kind = "base"
+
+    def __init__(self, dim: int, precision: str = "float32"):
+        self.dim = dim
+        # Отпечаток корпуса, по которому построен индекс (проверяется при загрузке)
+        self.fingerprint: Optional[str] = None
+        self.store = EmbeddingStore(dim, precision)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def precision(self) -> str:
+        return self.store.precision
+
+    def _append_vectors(self, vectors) -> np.ndarray:
+        """Добавление векторов в хранилище.
+
+        Пустой индекс принимает EmbeddingStore той же точности без копирования
+        (общее хранилище с ArticleDatabase), а первый float32-массив (в том числе
+        memmap из кэша эмбеддингов) — без копирования при точности float32.
+        """
+        if isinstance(vectors, EmbeddingStore) and len(self.store) == 0 \
+                and vectors.precision == self.precision:
+            self.store = vectors
+            return np.arange(len(vectors))
+        if not isinstance(vectors, EmbeddingStore):
+            vectors = np.asarray(vectors).reshape(-1, self.dim)
+        return self.store.append(vectors)
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Добавить векторы; id — порядковые номера в индексе"""
+        raise NotImplementedError
+
+    def update(self, ids: np.ndarray, vectors: np.ndarray):
+        """Заменить векторы существующих id (например, после изменения статей)"""
+        self.store.update(ids, vectors)
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Поиск top-k для одного запроса: (ids, scores)"""
+        ids, scores = self.search_batch(np.asarray(query).reshape(1, -1), top_k)
+        return ids[0], scores[0]
+
+    def search_batch(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Поиск top-k для батча запросов: (ids (B, k), scores (B, k))"""
+        raise NotImplementedError
+
+    def _state(self) -> dict:
+        return {}
+
+    def save(self, path: str, include_vectors: bool = True):
+        """Атомарное сохранение индекса в .npz.
+
+        include_vectors=False — сохранить только структуру индекса, если сами векторы
+        уже хранятся отдельно (кэш эмбеддингов) и передаются в load_index.
+        """
+        tmp_path = f"{path}.tmp"
+        scales = self.store.scales
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                kind=self.kind,
+                dim=self.dim,
+                size=len(self),
+                fingerprint=self.fingerprint or "",
+                precision=self.precision,
+                vectors=self.store.codes if include_vectors else np.empty((0, self.dim), dtype=np.float32),
+                scales=scales if include_vectors and scales is not None else np.empty(0, dtype=np.float32),
+                **self._state()
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {self.kind} index with {len(self)} vectors to {path}")
+
+
+class ExactIndex(VectorIndex):
+    """Точный поиск: один матричный dot-product и argpartition top-k"""
+
+    kind = "exact"
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        return self._append_vectors(vectors)
+
+    def search_batch(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.store.scores(queries)
+        ids = top_k_indices(scores, top_k)
+        return ids, np.take_along_axis(scores, ids, axis=1)
+
+
+class IVFIndex(VectorIndex):
+    """Приближенный поиск IVF (inverted file) на чистом NumPy.
+
+    Векторы разбиваются на n_lists кластеров k-means; запрос сканирует только
+    nprobe ближайших кластеров. Больше nprobe — выше recall и латентность.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int, n_lists: int = 0, nprobe: int = 8,
+                 kmeans_iters: int = 10, seed: int = 0, precision: str = "float32"):
+        super().__init__(dim, precision)
+        self.n_lists = n_lists  # 0 — подобрать как sqrt(N) при обучении
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int64)
+        self._lists = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray):
+        """Обучение грубого квантизатора (центроидов)"""
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        self.centroids = train_centroids(vectors, n_lists, self.kmeans_iters, self.seed)
+        self.n_lists = len(self.centroids)
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(self.n_lists)]
+        logger.info(f"IVF index trained: {self.n_lists} lists on {len(vectors)} vectors")
+
+    def add(self, vectors) -> np.ndarray:
+        """Инкрементальная вставка: новые векторы попадают в ближайшие списки"""
+        if not isinstance(vectors, EmbeddingStore):
+            vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not self.is_trained:
+            self.train(vectors)
+        ids = self._append_vectors(vectors)
+        assignments = assign_to_centroids(vectors, self.centroids)
+        self._assignments = np.concatenate([self._assignments, assignments])
+
+        # Дописываем id только в затронутые списки
+        for list_id in np.unique(assignments):
+            self._lists[list_id] = np.concatenate([self._lists[list_id], ids[assignments == list_id]])
+        return ids
+
+    def update(self, ids: np.ndarray, vectors: np.ndarray):
+        """Замена векторов: измененные id переносятся в ближайшие списки"""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if len(ids) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        super().update(ids, vectors)
+        self._assignments = np.array(self._assignments)
+        self._assignments[ids] = assign_to_centroids(vectors, self.centroids)
+        self._rebuild_lists(self._assignments)
+
+    def _rebuild_lists(self, assignments: np.ndarray):
+        """Инвертированные списки: id векторов для каждого центроида"""
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(self.n_lists + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.n_lists)]
+
+    def search_batch(self, queries: np.ndarray, top_k: int,
+                     nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+
+        result_ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+        result_scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        if len(self) == 0:
+            return result_ids, result_scores
+
+        probes = top_k_indices(queries @ self.centroids.T, nprobe)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self._lists[i] for i in lists])
+            if len(candidates) == 0:
+                continue
+            scores = self.store.scores(query, candidates)[0]
+            best = top_k_indices(scores, top_k)
+            result_ids[row, :len(best)] = candidates[best]
+            result_scores[row, :len(best)] = scores[best]
+        return result_ids, result_scores
+
+    def _state(self) -> dict:
+        return {
+            'centroids': self.centroids if self.is_trained else np.empty((0, self.dim), dtype=np.float32),
+            'assignments': self._assignments,
+            'params': np.array([self.n_lists, self.nprobe, self.kmeans_iters, self.seed])
+        }
+
+
+def create_index(config, dim: int) -> VectorIndex:
+    """Создание индекса по конфигурации (IndexConfig)"""
+    if config.backend == "exact":
+        return ExactIndex(dim, precision=config.precision)
+    if config.backend == "ivf":
+        return IVFIndex(dim, n_lists=config.n_lists, nprobe=config.nprobe,
+                        kmeans_iters=config.kmeans_iters, precision=config.precision)
+    raise ValueError(f"Unknown index backend: {config.backend}")
+
+
+def load_index(path: str, vectors=None) -> Optional[VectorIndex]:
+    """Загрузка индекса, сохраненного через VectorIndex.save.
+
+    vectors — внешнее хранилище векторов (EmbeddingStore или float32-матрица),
+    если индекс сохранен без них.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            kind = str(data['kind'])
+            dim = int(data['dim'])
+            precision = str(data['precision']) if 'precision' in data else "float32"
+            if isinstance(vectors, EmbeddingStore):
+                precision = vectors.precision
+            if kind == "exact":
+                index = ExactIndex(dim, precision=precision)
+            elif kind == "ivf":
+                n_lists, nprobe, kmeans_iters, seed = (int(v) for v in data['params'])
+                index = IVFIndex(dim, n_lists=n_lists, nprobe=nprobe,
+                                 kmeans_iters=kmeans_iters, seed=seed, precision=precision)
+                if len(data['centroids']) > 0:
+                    index.centroids = data['centroids']
+                index._assignments = data['assignments']
+                index._rebuild_lists(index._assignments)
+            else:
+                logger.warning(f"Unknown index kind in {path}: {kind}")
+                return None
+            if len(data['vectors']) > 0:
+                scales = data['scales'] if 'scales' in data and len(data['scales']) > 0 else None
+                stored = EmbeddingStore.from_codes(data['vectors'], scales, precision)
+            else:
+                stored = vectors
+            if stored is None or len(stored) != int(data['size']):
+                logger.warning(f"Vector index {path} does not match the provided vectors")
+                return None
+            index._append_vectors(stored)
+            index.fingerprint = str(data['fingerprint']) or None
+        return index
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Error loading vector index from {path}: {e}")
+        return None
@@ -6,10 +6,9 @@ import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from auth.user_db import UserDatabase
 from config.settings import Config
 from database.article_db import ArticleDatabase
-from database.session_manager import SessionManager
+from database.storage import create_storage
 
 logging.basicConfig(
     level=logging.INFO,
@@ -26,12 +25,14 @@ def initialize_system():
         logger.info("Configuration loaded")
         
         # Инициализация базы данных с поддержкой Excel
-        article_db = ArticleDatabase(config.ARTICLES_PATH, config.EXCEL_PATH)
+        article_db = ArticleDatabase(
+            config.ARTICLES_PATH, config.EXCEL_PATH, cache_dir=config.EMBEDDINGS_CACHE_DIR
+        )
         articles = article_db.get_all_articles()
         logger.info(f"Loaded {len(articles)} articles")
 
-        # Инициализация базы пользователей
-        user_db = UserDatabase()
+        # Инициализация базы пользователей и хранилища сессий
+        user_db, session_manager = create_storage(config)
         if not user_db.get_user("admin"):
             user_db.create_user("admin", "admin")  # демо-пользователь
         logger.info("User database initialized")
@@ -40,16 +41,16 @@ def initialize_system():
             logger.error("No articles available. System cannot start.")
             return None
         
-        # Инициализация менеджера сессий
-        session_manager = SessionManager(config.SESSIONS_PATH)
-        logger.info(f"Loaded {len(session_manager.sessions)} existing sessions")
+        logger.info(f"Loaded {session_manager.session_count()} existing sessions")
         
         # Инициализация остальных компонентов
         from models.state_encoder import StateEncoder
         from rl_environment.env import RecommendationEnv
-        from agents.dqn_agent import DQNAgent
+        from agents.factory import create_agent
+        from training.checkpoints import CheckpointStore, checkpoint_metadata
         from models.response_generator import ResponseGenerator
         from api.app import RecommendationAPI
+        from api.corpus_reload import CorpusReloader, CorpusSnapshot
         
         # Инициализация кодировщика состояний
         state_encoder = StateEncoder(article_db)
@@ -66,24 +67,50 @@ def initialize_system():
         config.model.state_dim = state_dim
         
         # Инициализация RL агента
-        agent = DQNAgent(state_dim, action_dim, config.model)
-        logger.info("DQN Agent initialized")
-        
-        # ПРЕДВАРИТЕЛЬНОЕ ОБУЧЕНИЕ (если используется)
+        agent = create_agent(config.model, state_dim, action_dim, article_db)
+        logger.info(f"DQN Agent initialized (action mode: {config.model.action_mode})")
+        
+        # Политика из новейшего совместимого checkpoint'а (python -m training.cli)
+        checkpoints = CheckpointStore(config.CHECKPOINT_DIR, quantize_export=config.inference.quantize_policy)
+        metadata = checkpoint_metadata(agent, article_db)
+        background_trainer = None
+        serving_agent = None
+        # Полный агент загружается всегда: от него CorpusReloader расширяет политику
         try:
-            from training.pretrain import Pretrainer
-            logger.info("Starting pretraining...")
-            pretrainer = Pretrainer(env, agent, article_db)
-            pretrainer.pretrain_with_supervised(episodes=500)  # Уменьшил для скорости
-            eval_results = pretrainer.evaluate_pretraining()
-            logger.info(f"Pretraining completed! Accuracy: {eval_results['accuracy']:.3f}")
+            entry = checkpoints.load_latest(agent, metadata)
         except Exception as e:
-            logger.warning(f"Pretraining skipped: {e}")
+            # Checkpoint не загрузился (например, другая форма сети) — как будто его нет
+            logger.warning(f"Failed to load checkpoint, treating it as incompatible: {e}")
+            agent = create_agent(config.model, state_dim, action_dim, article_db)
+            entry = None
+        if entry is None:
+            # Совместимого checkpoint'а нет: сервер стартует сразу и отвечает поиском
+            # по схожести, а политика обучается в фоне и подменяется по готовности
+            from training.background import BackgroundTrainer
+            logger.warning("No compatible checkpoint found, training the policy in the background")
+            background_trainer = BackgroundTrainer(
+                agent, article_db, state_encoder, config,
+                checkpoints=checkpoints, metadata=metadata, cache_dir=config.EMBEDDINGS_CACHE_DIR
+            )
+        else:
+            # Для сервинга достаточно инференс-артефакта той же версии (TorchScript, без оптимизатора)
+            serving_agent = checkpoints.load_inference_policy(
+                metadata, config.inference.policy_threads, config.inference.max_batch_size
+            )
+            if serving_agent is not None:
+                logger.info("Serving with exported inference policy")
+        serving_agent = serving_agent or agent
         
         # Инициализация генератора ответов
         response_generator = ResponseGenerator(article_db)
         logger.info("Response generator initialized")
         
+        # Горячая перезагрузка корпуса: POST /admin/reload или изменение ARTICLES_PATH
+        corpus_reloader = CorpusReloader(
+            CorpusSnapshot(article_db, env, response_generator), agent, state_encoder, config,
+            checkpoints=checkpoints
+        )
+        
         return {
             'config': config,
             'article_db': article_db,
@@ -91,7 +118,9 @@ def initialize_system():
             'session_manager': session_manager,
             'state_encoder': state_encoder,
             'env': env,
-            'agent': agent,
+            'agent': serving_agent,
+            'background_trainer': background_trainer,
+            'corpus_reloader': corpus_reloader,
             'response_generator': response_generator,
             'api_class': RecommendationAPI
         }
@@ -115,9 +144,12 @@ def main():
         api = components['api_class'](
             article_db=components['article_db'],
             session_manager=components['session_manager'],
+            user_db=components['user_db'],
             env=components['env'],
             agent=components['agent'],
-            response_generator=components['response_generator']
+            response_generator=components['response_generator'],
+            background_trainer=components['background_trainer'],
+            corpus_reloader=components['corpus_reloader']
         )
         
         logger.info("Starting FastAPI server...")
@@ -0,0 +1,109 @@
+# File: models/encoder_registry.py
+import threading
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import Config, EncoderConfig
+
+logger = logging.getLogger(__name__)
+
+
+class SharedEncoder:
+    """Лениво загружаемый SentenceTransformer, общий для всего процесса"""
+
+    def __init__(self, config: EncoderConfig):
+        self.config = config
+        self.model_name = config.model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        """Модель загружается при первом обращении"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        """Загрузка весов модели"""
+        if self.config.num_threads > 0:
+            import torch
+            torch.set_num_threads(self.config.num_threads)
+
+        from sentence_transformers import SentenceTransformer
+        logger.info(f"Loading encoder {self.model_name}...")
+        model = SentenceTransformer(self.model_name, device=self.config.device)
+        logger.info(f"Encoder {self.model_name} loaded "
+                    f"({self.memory_usage(model)['total_bytes'] / 2**20:.1f} MiB)")
+        return model
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Батчевое кодирование текстов, результат — float32 матрица (len(texts), dim)"""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size or self.config.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def get_dimension(self) -> int:
+        """Размерность эмбеддингов"""
+        return self.model.get_sentence_embedding_dimension()
+
+    def memory_usage(self, model=None) -> Dict:
+        """Объем памяти, занимаемый весами и буферами загруженной модели"""
+        model = model if model is not None else self._model
+        if model is None:
+            return {'model_name': self.model_name, 'loaded': False,
+                    'parameters_bytes': 0, 'buffers_bytes': 0, 'total_bytes': 0}
+
+        parameters_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        buffers_bytes = sum(b.numel() * b.element_size() for b in model.buffers())
+        return {
+            'model_name': self.model_name,
+            'loaded': True,
+            'parameters_bytes': parameters_bytes,
+            'buffers_bytes': buffers_bytes,
+            'total_bytes': parameters_bytes + buffers_bytes
+        }
+
+
+_encoders: Dict[str, SharedEncoder] = {}
+_registry_lock = threading.Lock()
+
+
+def get_encoder(model_name: Optional[str] = None,
+                config: Optional[EncoderConfig] = None) -> SharedEncoder:
+    """Получить общий для процесса энкодер (один экземпляр на имя модели)"""
+    config = config or Config.encoder
+    model_name = model_name or config.model_name
+
+    with _registry_lock:
+        encoder = _encoders.get(model_name)
+        if encoder is None:
+            if model_name != config.model_name:
+                config = EncoderConfig(
+                    model_name=model_name,
+                    batch_size=config.batch_size,
+                    num_threads=config.num_threads,
+                    device=config.device
+                )
+            encoder = SharedEncoder(config)
+            _encoders[model_name] = encoder
+        return encoder
+
+
+def registry_memory_usage() -> List[Dict]:
+    """Потребление памяти всеми зарегистрированными энкодерами"""
+    with _registry_lock:
+        encoders = list(_encoders.values())
+    return [encoder.memory_usage() for encoder in encoders]
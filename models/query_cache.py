@@ -0,0 +1,99 @@
+# File: models/query_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class QueryEmbeddingCache:
+    """Ограниченный LRU-кэш нормализованных эмбеддингов запросов (с опциональным TTL)"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Счетчики для подбора размера кэша по реальному трафику
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Ключ кэша: регистр и лишние пробелы не влияют на эмбеддинг"""
+        return " ".join(query.lower().split())
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """Получить эмбеддинг из кэша или None"""
+        key = self.normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                embedding, stored_at = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding: np.ndarray):
+        """Положить эмбеддинг в кэш (массив становится read-only)"""
+        if self.max_size <= 0:
+            return
+        embedding.flags.writeable = False
+        key = self.normalize_query(query)
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_many(self, queries: List[str],
+                 compute_fn: Callable[[List[str]], np.ndarray]) -> List[np.ndarray]:
+        """Эмбеддинги для списка запросов; промахи считаются одним батчем"""
+        results: List[Optional[np.ndarray]] = [self.get(query) for query in queries]
+
+        # Дубликаты внутри батча кодируем один раз
+        missing: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(results):
+            if embedding is None:
+                missing.setdefault(self.normalize_query(queries[i]), []).append(i)
+
+        if missing:
+            first_positions = [positions[0] for positions in missing.values()]
+            computed = compute_fn([queries[i] for i in first_positions])
+            for positions, embedding in zip(missing.values(), computed):
+                embedding = np.array(embedding, dtype=np.float32)
+                self.put(queries[positions[0]], embedding)
+                for i in positions:
+                    results[i] = embedding
+
+        return results
+
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Статистика попаданий и промахов"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total > 0 else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -1,25 +1,43 @@
 # File: models/state_encoder.py
 import numpy as np
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+from config.settings import Config
+from models.encoder_registry import get_encoder
+from models.query_cache import QueryEmbeddingCache
 
 class StateEncoder:
-    def __init__(self, article_db):
+    def __init__(self, article_db, encoder=None, query_cache=None):
         self.article_db = article_db
-        self.text_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        # Тот же экземпляр модели, что и у ArticleDatabase
+        self.encoder = encoder or get_encoder()
+        # Кэш эмбеддингов запросов, общий для StateEncoder и среды
+        self.query_cache = query_cache or QueryEmbeddingCache(
+            max_size=Config.query_cache.max_size,
+            ttl_seconds=Config.query_cache.ttl_seconds
+        )
         # Фиксируем размерность - используем только эмбеддинг запроса
         self.state_dim = 384  # Размерность all-MiniLM-L6-v2
     
+    def encode_query(self, user_query: str) -> np.ndarray:
+        """Нормализованный эмбеддинг запроса (через кэш)"""
+        return self.encode_queries([user_query])[0]
+    
+    def encode_queries(self, user_queries: List[str]) -> List[np.ndarray]:
+        """Нормализованные эмбеддинги списка запросов; промахи кэша кодируются одним батчем"""
+        return self.query_cache.get_many(user_queries, self._encode_normalized)
+    
+    def _encode_normalized(self, user_queries: List[str]) -> np.ndarray:
+        """Кодирование и нормализация эмбеддингов запросов"""
+        embeddings = self.encoder.encode(user_queries)
+        
+        # Нормализуем эмбеддинги
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    
     def encode_state(self, user_query: str, conversation_history: List[Dict]) -> np.ndarray:
         """Кодирование состояния для RL-агента"""
         # Используем только эмбеддинг текущего запроса для простоты
-        query_embedding = self.text_model.encode([user_query])[0]
-        
-        # Нормализуем эмбеддинг
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        
-        return query_embedding
+        return self.encode_query(user_query)
     
     def get_state_dimension(self) -> int:
         """Получить размерность вектора состояния"""
-        return self.state_dim
\ No newline at end of file
+        return self.state_dim
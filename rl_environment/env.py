@@ -6,6 +6,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def episode_done(rewards: np.ndarray, lengths: np.ndarray, config) -> np.ndarray:
+    """Эпизод завершается при высокой награде или по достижении максимальной длины диалога"""
+    high_reward = rewards >= config.reward_success * 0.8
+    max_length_reached = lengths >= config.max_conversation_length
+    return high_reward | max_length_reached
+
+def similarity_to_reward(similarity: np.ndarray, config) -> np.ndarray:
+    """Преобразование косинусной схожести запрос-статья в reward (векторизовано)"""
+    return np.where(
+        similarity > 0.6, config.reward_success,  # Отличная рекомендация
+        np.where(similarity > 0.3, config.reward_partial,  # Удовлетворительная рекомендация
+                 config.reward_failure)  # Плохая рекомендация
+    )
+
 class RecommendationEnv:
     def __init__(self, article_db, state_encoder, config):
         self.article_db = article_db
@@ -19,6 +33,9 @@ class RecommendationEnv:
         # Обновляем размерность действий
         self.action_dim = len(self.available_actions)
         
+        # Предвычисленные таблицы схожести для обучающих запросов (training.similarity_tables)
+        self.similarity_tables = None
+        
         logger.info(f"Environment initialized with {self.action_dim} actions")
     
     def reset(self, user_query: str) -> np.ndarray:
@@ -32,7 +49,7 @@ class RecommendationEnv:
     
     def step(self, action: int) -> Tuple[np.ndarray, float, bool, Dict]:
         """Выполнение действия (рекомендация статьи)"""
-        if action not in self.available_actions:
+        if not 0 <= action < self.action_dim:
             logger.warning(f"Invalid action: {action}. Using random action.")
             action = random.choice(self.available_actions)
         
@@ -71,8 +88,16 @@ class RecommendationEnv:
         
         return next_state, reward, done, info
     
+    def use_similarity_tables(self, tables):
+        """Брать состояния и reward известных запросов из предвычисленных таблиц"""
+        self.similarity_tables = tables
+    
     def _get_state(self) -> np.ndarray:
         """Получить текущее состояние"""
+        if self.similarity_tables is not None:
+            state = self.similarity_tables.query_embedding(self.current_user_query)
+            if state is not None:
+                return state
         return self.state_encoder.encode_state(
             self.current_user_query, 
             self.conversation_history
@@ -80,26 +105,28 @@ class RecommendationEnv:
     
     def _calculate_reward(self, article: Dict) -> float:
         """Вычисление вознаграждения за рекомендацию"""
+        return self.calculate_reward_for_query(self.current_user_query, article)
+    
+    def calculate_reward_for_query(self, user_query: str, article: Dict) -> float:
+        """Вознаграждение за статью для произвольного запроса (не трогает состояние среды)"""
         try:
-            query_embedding = self.state_encoder.text_model.encode([self.current_user_query])[0]
+            if self.similarity_tables is not None:
+                similarity = self.similarity_tables.query_similarity(user_query, article['id'])
+                if similarity is not None:
+                    return float(similarity_to_reward(similarity, self.config))
+            
+            # Эмбеддинг запроса берется из общего кэша (уже нормализован)
+            query_embedding = self.state_encoder.encode_query(user_query)
             article_embedding = self.article_db.get_article_embedding(article['id'])
             
             if article_embedding is None:
                 return self.config.reward_failure
             
-            # Нормализуем векторы
-            query_embedding = query_embedding / np.linalg.norm(query_embedding)
-            article_embedding = article_embedding / np.linalg.norm(article_embedding)
-            
+            # Оба вектора уже нормализованы — скалярное произведение равно косинусу
             similarity = np.dot(query_embedding, article_embedding)
             
             # Преобразуем схожесть в reward
-            if similarity > 0.6:
-                return self.config.reward_success  # Отличная рекомендация
-            elif similarity > 0.3:
-                return self.config.reward_partial  # Удовлетворительная рекомендация
-            else:
-                return self.config.reward_failure  # Плохая рекомендация
+            return float(similarity_to_reward(similarity, self.config))
                 
         except Exception as e:
             logger.error(f"Error calculating reward: {e}")
@@ -107,10 +134,7 @@ class RecommendationEnv:
     
     def _is_episode_done(self, reward: float) -> bool:
         """Определить завершение эпизода"""
-        high_reward = reward >= self.config.reward_success * 0.8
-        max_length_reached = len(self.conversation_history) >= self.config.max_conversation_length
-        
-        return high_reward or max_length_reached
+        return bool(episode_done(np.asarray(reward), len(self.conversation_history), self.config))
     
     def get_action_space_size(self) -> int:
         """Получить размер пространства действий"""
@@ -0,0 +1,92 @@
+# File: rl_environment/vec_env.py
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from .env import episode_done, similarity_to_reward
+
+logger = logging.getLogger(__name__)
+
+class VecRecommendationEnv:
+    """B независимых диалогов RecommendationEnv, которые сбрасываются и шагают вместе.
+
+    При сбросе запросы кодируются одним батчем, а схожесть со всеми статьями
+    считается одним матричным произведением (B, D) x (D, N); шаг — это
+    выборка из этой матрицы и векторное вычисление reward/done. Завершенные
+    диалоги автоматически сбрасываются новым запросом из query_sampler.
+    """
+    def __init__(self, article_db, state_encoder, config, num_envs: int,
+                 query_sampler: Optional[Callable[[int], List[str]]] = None,
+                 similarity_tables=None):
+        self.article_db = article_db
+        self.state_encoder = state_encoder
+        self.config = config
+        self.num_envs = num_envs
+        self.query_sampler = query_sampler
+        self.similarity_tables = similarity_tables
+
+        # EmbeddingStore нормализованных эмбеддингов статей
+        self.articles = article_db.article_embeddings
+        self.action_dim = len(self.articles)
+
+        self.queries: List[Optional[str]] = [None] * num_envs
+        self.states = np.zeros((num_envs, state_encoder.get_state_dimension()), dtype=np.float32)
+        self.similarities = np.zeros((num_envs, self.action_dim), dtype=np.float32)
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+
+        logger.info(f"Vectorized environment initialized: {num_envs} envs x {self.action_dim} actions")
+
+    def reset(self, queries: Optional[List[str]] = None) -> np.ndarray:
+        """Сброс всех диалогов; возвращает состояния (B, state_dim)"""
+        if queries is None:
+            queries = self.query_sampler(self.num_envs)
+        self._reset_envs(np.arange(self.num_envs), queries)
+        return self.states.copy()
+
+    def _reset_envs(self, env_ids: np.ndarray, queries: List[str]):
+        """Батчевый encode новых запросов и одна матрица схожести для них
+        (для запросов из similarity_tables — просто строки таблиц)"""
+        tables = self.similarity_tables
+        if tables is not None and all(query in tables.query_index for query in queries):
+            rows = [tables.query_index[query] for query in queries]
+            self.states[env_ids] = tables.query_embeddings[rows]
+            self.similarities[env_ids] = tables.query_article[rows]
+        else:
+            embeddings = np.stack(self.state_encoder.encode_queries(queries)).astype(np.float32)
+            self.states[env_ids] = embeddings
+            self.similarities[env_ids] = self.articles.scores(embeddings)
+        self.lengths[env_ids] = 0
+        for env_id, query in zip(env_ids, queries):
+            self.queries[env_id] = query
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """Шаг всех диалогов.
+
+        Возвращает (next_states, rewards, dones, info). Для завершенных
+        диалогов next_states уже содержит состояние после автосброса,
+        а терминальные состояния лежат в info['terminal_states'].
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        valid = (actions >= 0) & (actions < self.action_dim)
+        if not valid.all():
+            logger.warning(f"Invalid actions: {actions[~valid].tolist()}")
+
+        env_ids = np.arange(self.num_envs)
+        similarity = self.similarities[env_ids, np.where(valid, actions, 0)]
+        rewards = np.where(valid, similarity_to_reward(similarity, self.config),
+                           self.config.reward_failure).astype(np.float32)
+        self.lengths += 1
+        dones = episode_done(rewards, self.lengths, self.config) | ~valid
+
+        # Состояние — эмбеддинг запроса, внутри диалога оно не меняется
+        terminal_states = self.states.copy()
+        info = {'terminal_states': terminal_states, 'lengths': self.lengths.copy()}
+
+        done_ids = np.flatnonzero(dones)
+        if len(done_ids) > 0 and self.query_sampler is not None:
+            self._reset_envs(done_ids, self.query_sampler(len(done_ids)))
+
+        return self.states.copy(), rewards, dones, info
+
+    def get_action_space_size(self) -> int:
+        return self.action_dim
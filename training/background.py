@@ -0,0 +1,114 @@
+# File: training/background.py
+import copy
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Фазы готовности политики (отдаются в /health)
+PHASE_PENDING = "pending"      # поток еще не запущен
+PHASE_TRAINING = "training"    # /ask отвечает поиском по схожести
+PHASE_READY = "ready"          # обученная политика подменена в сервинге
+PHASE_FAILED = "failed"        # обучение упало, сервинг остается на поиске
+
+class BackgroundTrainer:
+    """Обучение политики в фоновом потоке, пока сервер уже принимает запросы.
+
+    Pretrainer (и, если задано, RLTrainer) работает с приватной копией агента
+    и собственной средой, поэтому сервинг не видит полуобученных весов.
+    По завершении копия сохраняется в CheckpointStore и передается в on_ready
+    (из start) вместе с агентом для сервинга (инференс-артефактом, если он
+    есть) — тот атомарно подменяет ссылку на агента в сервинге.
+    """
+    def __init__(self, agent, article_db, state_encoder, config, checkpoints=None,
+                 metadata: Optional[Dict] = None, cache_dir: Optional[str] = None):
+        self.agent = agent
+        self.article_db = article_db
+        self.state_encoder = state_encoder
+        self.config = config
+        self.on_ready: Optional[Callable[[object, object], None]] = None
+        self.checkpoints = checkpoints
+        self.metadata = metadata
+        self.cache_dir = cache_dir
+
+        self.phase = PHASE_PENDING
+        self.error: Optional[str] = None
+        self.metrics: Dict = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, on_ready: Callable[[object, object], None]):
+        if self._thread is None:
+            self.on_ready = on_ready
+            self.phase = PHASE_TRAINING
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="background-trainer", daemon=True)
+            self._thread.start()
+            logger.info("Background training started, serving with similarity search fallback")
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _private_agent(self):
+        """Глубокая копия агента; база статей (и ее индекс) остается общей"""
+        return copy.deepcopy(self.agent, memo={id(self.article_db): self.article_db})
+
+    def _run(self):
+        from rl_environment.env import RecommendationEnv
+        from .pretrain import Pretrainer
+        from .trainer import RLTrainer
+
+        try:
+            agent = self._private_agent()
+            env = RecommendationEnv(self.article_db, self.state_encoder, self.config.environment)
+            settings = self.config.background_training
+
+            pretrainer = Pretrainer(env, agent, self.article_db)
+            pretrainer.build_similarity_tables(cache_dir=self.cache_dir)
+            results = pretrainer.pretrain_batched(epochs=settings.pretrain_epochs)
+            metrics = {'stage': 'pretrain', 'epochs': results['epochs'], 'accuracy': results['accuracy']}
+
+            if settings.rl_episodes > 0:
+                trainer = RLTrainer(env, agent, None, self.config.environment)
+                trainer.build_similarity_tables(cache_dir=self.cache_dir)
+                trainer.train_vectorized(settings.rl_episodes, num_envs=settings.num_envs)
+                metrics.update({'stage': 'train', 'rl_episodes': settings.rl_episodes,
+                                'success_rate': trainer.evaluate()['success_rate']})
+
+            metrics['seconds'] = round(time.time() - self.started_at, 2)
+            serving_agent = agent
+            if self.checkpoints is not None:
+                # Следующий старт загрузит этот checkpoint вместо обучения
+                try:
+                    self.checkpoints.save(agent, self.metadata, metrics)
+                    # Сервинг — через экспортированный артефакт, как после рестарта
+                    serving_agent = self.checkpoints.load_inference_policy(
+                        self.metadata, self.config.inference.policy_threads,
+                        self.config.inference.max_batch_size
+                    ) or agent
+                except Exception as e:
+                    logger.warning(f"Failed to save background checkpoint: {e}")
+
+            self.on_ready(serving_agent, agent)
+            self.metrics = metrics
+            self.phase = PHASE_READY
+            logger.info(f"Background training finished, policy swapped in: {metrics}")
+        except Exception as e:
+            self.error = str(e)
+            self.phase = PHASE_FAILED
+            logger.error(f"Background training failed, keeping similarity search fallback: {e}")
+        finally:
+            self.finished_at = time.time()
+
+    def status(self) -> Dict:
+        return {
+            'phase': self.phase,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'metrics': self.metrics
+        }
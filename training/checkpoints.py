@@ -0,0 +1,133 @@
+# File: training/checkpoints.py
+import json
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from agents.inference_export import InferencePolicy, export_policy, supports_export
+from database.session_journal import write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые должны совпасть, чтобы checkpoint подходил к текущей системе
+# (в том числе форма сети: иначе load_state_dict падает на несовпадении размеров)
+COMPATIBILITY_KEYS = ('corpus_hash', 'action_dim', 'state_dim', 'encoder', 'agent_type',
+                      'hidden_dim', 'candidate_k', 'n_clusters')
+
+def checkpoint_metadata(agent, article_db) -> Dict:
+    """Метаданные совместимости для агента и корпуса"""
+    metadata = {
+        'corpus_hash': article_db.corpus_hash,
+        'action_dim': agent.action_dim,
+        'state_dim': agent.state_dim,
+        'encoder': article_db.encoder.model_name if article_db.encoder is not None else None,
+        'agent_type': type(agent).__name__,
+        'hidden_dim': agent.config.hidden_dim
+    }
+    if hasattr(agent, 'candidate_k'):
+        metadata['candidate_k'] = agent.candidate_k
+    if hasattr(agent, 'clusters'):
+        # Настройка из конфига (0 — sqrt(N)), а не фактическое число кластеров
+        metadata['n_clusters'] = agent.config.n_clusters
+    return metadata
+
+class CheckpointStore:
+    """Версионированные checkpoint'ы политики: policy.vNNNN.pt + manifest.json.
+
+    Manifest хранит для каждой версии метаданные совместимости (хэш корпуса,
+    action_dim, state_dim, модель эмбеддингов, тип агента и форму сети) и метрики; сервер
+    загружает новейшую совместимую версию вместо обучения при старте.
+    Для плоского агента рядом пишется policy.vNNNN.ts — TorchScript-артефакт
+    только для инференса (без оптимизатора), которым сервер отвечает на /ask.
+    """
+    def __init__(self, directory: str, quantize_export: bool = False):
+        self.directory = directory
+        self.quantize_export = quantize_export
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        os.makedirs(directory, exist_ok=True)
+
+    def entries(self) -> List[Dict]:
+        """Записи manifest от старых к новым"""
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['checkpoints']
+
+    def save(self, agent, metadata: Dict, metrics: Optional[Dict] = None) -> Dict:
+        """Записать новую версию (файл весов и manifest — атомарно)"""
+        entries = self.entries()
+        version = entries[-1]['version'] + 1 if entries else 1
+        filename = f"policy.v{version:04d}.pt"
+        path = os.path.join(self.directory, filename)
+
+        tmp_path = f"{path}.tmp"
+        torch.save(agent._checkpoint(), tmp_path)
+        os.replace(tmp_path, path)
+
+        entry = dict(metadata, version=version, file=filename,
+                     created_at=datetime.now().isoformat(), metrics=metrics or {})
+        if supports_export(agent):
+            inference_file = f"policy.v{version:04d}.ts"
+            export_policy(agent, os.path.join(self.directory, inference_file),
+                          quantize=self.quantize_export, metadata=metadata)
+            entry.update(inference_file=inference_file, quantized=self.quantize_export)
+        entries.append(entry)
+        write_file_atomic(self.manifest_path, json.dumps({'checkpoints': entries}, ensure_ascii=False, indent=2))
+        logger.info(f"Saved checkpoint v{version} to {path}")
+        return entry
+
+    def find_compatible(self, metadata: Dict) -> Optional[Dict]:
+        """Новейшая версия, совпадающая по всем COMPATIBILITY_KEYS"""
+        for entry in reversed(self.entries()):
+            if all(entry.get(key) == metadata.get(key) for key in COMPATIBILITY_KEYS):
+                if os.path.exists(os.path.join(self.directory, entry['file'])):
+                    return entry
+        return None
+
+    def load_latest(self, agent, metadata: Dict) -> Optional[Dict]:
+        """Загрузить в агента новейший совместимый checkpoint; None, если такого нет"""
+        entry = self.find_compatible(metadata)
+        if entry is None:
+            return None
+        start = time.perf_counter()
+        agent.load(os.path.join(self.directory, entry['file']))
+        logger.info(f"Loaded checkpoint v{entry['version']} ({entry['file']}) "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return entry
+
+    def carry_over(self, agent, old_metadata: Dict, metadata: Dict, article_ids: np.ndarray,
+                   embeddings: np.ndarray, metrics: Optional[Dict] = None) -> Optional[Dict]:
+        """Перенести новейший checkpoint прежнего корпуса на дополненный.
+
+        Id статей при инкрементальном импорте не меняются, поэтому политика
+        остается верной для старых статей: checkpoint загружается в agent,
+        агент расширяется под новые статьи (add_articles) и сохраняется
+        новой версией с метаданными нового корпуса. None, если переносить нечего.
+        """
+        entry = self.load_latest(agent, old_metadata)
+        if entry is None:
+            return None
+        if len(article_ids):
+            agent.add_articles(article_ids, embeddings)
+        return self.save(agent, metadata, dict(metrics or {}, carried_from=entry['version']))
+
+    def load_inference_policy(self, metadata: Dict, num_threads: int = 0,
+                              max_batch_size: int = 64) -> Optional[InferencePolicy]:
+        """Политика для сервинга из новейшего совместимого checkpoint'а,
+        если у него есть инференс-артефакт; иначе None"""
+        entry = self.find_compatible(metadata)
+        if entry is None or not entry.get('inference_file'):
+            return None
+        path = os.path.join(self.directory, entry['inference_file'])
+        if not os.path.exists(path):
+            return None
+        start = time.perf_counter()
+        policy = InferencePolicy(path, num_threads=num_threads, max_batch_size=max_batch_size)
+        logger.info(f"Loaded inference policy v{entry['version']} ({entry['inference_file']}) "
+                    f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return policy
@@ -0,0 +1,106 @@
+# File: training/cli.py
+"""Офлайн-обучение политики с записью версионированного checkpoint'а.
+
+Запуск из корня проекта:
+    python -m training.cli pretrain --epochs 500
+    python -m training.cli pretrain --episodic --episodes 500
+    python -m training.cli train --episodes 1000 --vectorized --num-envs 16
+    python -m training.cli train --episodes 5000 --distributed --num-actors 8 --sync-interval 50
+Сервер (main.py) при старте загружает новейший совместимый checkpoint
+из Config.CHECKPOINT_DIR.
+"""
+import argparse
+import dataclasses
+import logging
+import time
+
+from config.settings import Config
+from database.article_db import ArticleDatabase
+from .checkpoints import CheckpointStore, checkpoint_metadata
+
+logger = logging.getLogger(__name__)
+
+def build_training_system(config: Config):
+    """База статей, кодировщик, среда и агент — как в main.initialize_system"""
+    from agents.factory import create_agent
+    from models.state_encoder import StateEncoder
+    from rl_environment.env import RecommendationEnv
+
+    article_db = ArticleDatabase(config.ARTICLES_PATH, config.EXCEL_PATH, cache_dir=config.EMBEDDINGS_CACHE_DIR)
+    state_encoder = StateEncoder(article_db)
+    env = RecommendationEnv(article_db, state_encoder, config.environment)
+    config.model.action_dim = env.get_action_space_size()
+    config.model.state_dim = state_encoder.get_state_dimension()
+    agent = create_agent(config.model, config.model.state_dim, config.model.action_dim, article_db)
+    return article_db, env, agent
+
+def run_pretrain(env, agent, article_db, args) -> dict:
+    from .pretrain import Pretrainer
+
+    pretrainer = Pretrainer(env, agent, article_db)
+    pretrainer.build_similarity_tables(cache_dir=args.cache_dir)
+    if args.episodic:
+        pretrainer.pretrain_with_supervised(episodes=args.episodes)
+        results = pretrainer.evaluate_pretraining()
+        return {'stage': 'pretrain', 'episodes': args.episodes,
+                'accuracy': results['accuracy'], 'avg_reward': results['avg_reward']}
+    results = pretrainer.pretrain_batched(epochs=args.epochs, patience=args.patience)
+    return {'stage': 'pretrain', 'epochs': results['epochs'], 'accuracy': results['accuracy']}
+
+def run_train(env, agent, article_db, args) -> dict:
+    from .trainer import RLTrainer
+
+    trainer = RLTrainer(env, agent, None, env.config)
+    trainer.build_similarity_tables(cache_dir=args.cache_dir)
+    if args.distributed:
+        distributed = dataclasses.replace(Config.distributed, num_actors=args.num_actors,
+                                          sync_interval=args.sync_interval)
+        rewards = trainer.train_distributed(args.episodes, distributed)
+    elif args.vectorized:
+        rewards = trainer.train_vectorized(args.episodes, num_envs=args.num_envs)
+    else:
+        rewards = trainer.train(args.episodes)
+    results = trainer.evaluate()
+    return {'stage': 'train', 'episodes': args.episodes,
+            'success_rate': results['success_rate'],
+            'avg_episode_reward': float(sum(rewards[-100:]) / max(1, len(rewards[-100:])))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["pretrain", "train"])
+    parser.add_argument("--episodes", type=int, default=None)
+    parser.add_argument("--epochs", type=int, default=500, help="pretrain: эпохи батчевого режима")
+    parser.add_argument("--patience", type=int, default=50, help="pretrain: эпох без улучшения до остановки")
+    parser.add_argument("--episodic", action="store_true",
+                        help="pretrain: прежний режим одношаговых эпизодов (--episodes)")
+    parser.add_argument("--vectorized", action="store_true", help="train: VecRecommendationEnv")
+    parser.add_argument("--num-envs", type=int, default=16)
+    parser.add_argument("--distributed", action="store_true", help="train: процессы-акторы + learner")
+    parser.add_argument("--num-actors", type=int, default=Config.distributed.num_actors)
+    parser.add_argument("--sync-interval", type=int, default=Config.distributed.sync_interval)
+    parser.add_argument("--checkpoint-dir", default=Config.CHECKPOINT_DIR)
+    parser.add_argument("--cache-dir", default=Config.EMBEDDINGS_CACHE_DIR)
+    parser.add_argument("--fresh", action="store_true",
+                        help="не продолжать с последнего совместимого checkpoint'а")
+    args = parser.parse_args()
+    if args.episodes is None:
+        args.episodes = 500 if args.command == "pretrain" else 1000
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = Config()
+    article_db, env, agent = build_training_system(config)
+    store = CheckpointStore(args.checkpoint_dir, quantize_export=config.inference.quantize_policy)
+    metadata = checkpoint_metadata(agent, article_db)
+    if not args.fresh:
+        store.load_latest(agent, metadata)
+
+    start = time.perf_counter()
+    run = run_pretrain if args.command == "pretrain" else run_train
+    metrics = run(env, agent, article_db, args)
+    metrics['seconds'] = round(time.perf_counter() - start, 2)
+
+    entry = store.save(agent, metadata, metrics)
+    logger.info(f"Checkpoint v{entry['version']} written: {metrics}")
+
+if __name__ == "__main__":
+    main()
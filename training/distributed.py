@@ -0,0 +1,227 @@
+# File: training/distributed.py
+import copy
+import queue
+import random
+import time
+import logging
+import multiprocessing as mp
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+def _shared_array(ctx, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    """numpy-массив поверх разделяемой памяти (наследуется дочерними процессами при fork)"""
+    dtype = np.dtype(dtype)
+    raw = ctx.RawArray('b', int(np.prod(shape)) * dtype.itemsize)
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+class TransitionSlots:
+    """Пул слотов в разделяемой памяти для передачи батчей переходов от акторов learner'у.
+
+    Актор берет номер свободного слота из free, пишет в него батч и кладет
+    номер в ready; по очередям идут только номера слотов и награды завершенных
+    эпизодов, сами переходы не сериализуются.
+    """
+    def __init__(self, ctx, num_slots: int, slot_size: int, state_dim: int):
+        self.states = _shared_array(ctx, (num_slots, slot_size, state_dim), np.float32)
+        self.actions = _shared_array(ctx, (num_slots, slot_size), np.int64)
+        self.rewards = _shared_array(ctx, (num_slots, slot_size), np.float32)
+        self.next_states = _shared_array(ctx, (num_slots, slot_size, state_dim), np.float32)
+        self.dones = _shared_array(ctx, (num_slots, slot_size), np.bool_)
+        self.free = ctx.Queue()
+        self.ready = ctx.Queue()
+        for slot in range(num_slots):
+            self.free.put(slot)
+
+    def write(self, slot: int, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+              next_states: np.ndarray, dones: np.ndarray):
+        self.states[slot] = states
+        self.actions[slot] = actions
+        self.rewards[slot] = rewards
+        self.next_states[slot] = next_states
+        self.dones[slot] = dones
+
+    def read(self, slot: int) -> Tuple[np.ndarray, ...]:
+        """Представления слота (ReplayBuffer.push_batch копирует их в себя)"""
+        return (self.states[slot], self.actions[slot], self.rewards[slot],
+                self.next_states[slot], self.dones[slot])
+
+class SharedPolicy:
+    """Копия весов политики в разделяемой памяти с номером версии.
+
+    Learner публикует веса под блокировкой и увеличивает версию; акторы
+    перечитывают веса, только когда версия изменилась.
+    """
+    def __init__(self, ctx, policy_net: torch.nn.Module, epsilon: float):
+        self.network = copy.deepcopy(policy_net).cpu().share_memory()
+        self.version = ctx.Value('l', 0, lock=False)
+        self.epsilon = ctx.Value('d', epsilon, lock=False)
+        self.lock = ctx.Lock()
+
+    def publish(self, policy_net: torch.nn.Module, epsilon: float):
+        with self.lock:
+            self.network.load_state_dict(policy_net.state_dict())
+            self.epsilon.value = epsilon
+            self.version.value += 1
+
+    def pull(self, policy_net: torch.nn.Module) -> Tuple[int, float]:
+        with self.lock:
+            policy_net.load_state_dict(self.network.state_dict())
+            return self.version.value, self.epsilon.value
+
+class DistributedTrainer:
+    """Обучение actor/learner на нескольких ядрах.
+
+    num_actors процессов гоняют собственные VecRecommendationEnv по
+    envs_per_actor диалогов с локальной копией политики и отправляют батчи
+    переходов через TransitionSlots. Learner (вызывающий процесс) владеет
+    replay-буфером и оптимизатором агента: кладет батчи в memory, делает
+    learn_steps шагов обучения на батч и каждые sync_interval шагов публикует
+    веса в SharedPolicy.
+
+    Процессы создаются через fork: среда, агент, база статей и таблицы
+    схожести достаются акторам без сериализации (copy-on-write).
+    """
+    def __init__(self, article_db, state_encoder, env_config, agent, queries: Sequence[str],
+                 config, similarity_tables=None):
+        self.article_db = article_db
+        self.state_encoder = state_encoder
+        self.env_config = env_config
+        self.agent = agent
+        self.queries = list(queries)
+        self.config = config
+        self.similarity_tables = similarity_tables
+        self.env_steps = 0
+        self.seconds = 0.0
+
+    def _actor_main(self, actor_id: int, slots: TransitionSlots, policy: SharedPolicy, stop_event):
+        """Цикл актора: синхронизация политики, батчевый шаг среды, запись слота"""
+        from rl_environment.vec_env import VecRecommendationEnv
+
+        torch.set_num_threads(1)
+        seed = (int(time.time() * 1000) + actor_id) % (2 ** 31)
+        random.seed(seed)
+        np.random.seed(seed)
+
+        # Актор выбирает действия на CPU: CUDA после fork недоступна
+        agent = self.agent
+        agent.device = torch.device("cpu")
+        agent.policy_net = copy.deepcopy(policy.network)
+        vec_env = VecRecommendationEnv(
+            self.article_db, self.state_encoder, self.env_config, self.config.envs_per_actor,
+            query_sampler=lambda n: random.choices(self.queries, k=n),
+            similarity_tables=self.similarity_tables
+        )
+        local_version, agent.epsilon = policy.pull(agent.policy_net)
+        running_rewards = np.zeros(vec_env.num_envs, dtype=np.float32)
+        states = vec_env.reset()
+
+        while not stop_event.is_set():
+            if policy.version.value != local_version:
+                local_version, agent.epsilon = policy.pull(agent.policy_net)
+
+            actions = agent.select_actions(states, training=True)
+            next_states, rewards, dones, info = vec_env.step(actions)
+            running_rewards += rewards
+            finished = [float(running_rewards[env_id]) for env_id in np.flatnonzero(dones)]
+            running_rewards[dones] = 0.0
+
+            slot = None
+            while slot is None and not stop_event.is_set():
+                try:
+                    slot = slots.free.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if slot is None:
+                break
+            # В memory попадают терминальные состояния, а не состояния после автосброса
+            slots.write(slot, states, actions, rewards, info['terminal_states'], dones)
+            slots.ready.put((slot, actor_id, finished))
+            states = next_states
+
+    def train(self, episodes: int = 1000) -> List[float]:
+        """Обучение до episodes завершенных эпизодов (суммарно по всем акторам)"""
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("Distributed training requires the 'fork' start method")
+        ctx = mp.get_context("fork")
+        cfg = self.config
+        agent = self.agent
+        state_dim = self.state_encoder.get_state_dimension()
+
+        slots = TransitionSlots(ctx, cfg.num_actors * cfg.slots_per_actor, cfg.envs_per_actor, state_dim)
+        policy = SharedPolicy(ctx, agent.policy_net, agent.epsilon)
+        stop_event = ctx.Event()
+        actors = [
+            ctx.Process(target=self._actor_main, args=(actor_id, slots, policy, stop_event),
+                        name=f"rl-actor-{actor_id}", daemon=True)
+            for actor_id in range(cfg.num_actors)
+        ]
+        logger.info(f"Starting distributed training for {episodes} episodes: {cfg.num_actors} actors x "
+                    f"{cfg.envs_per_actor} envs, sync every {cfg.sync_interval} learner steps")
+        for actor in actors:
+            actor.start()
+
+        episode_rewards: List[float] = []
+        self.env_steps = 0
+        learner_steps = 0
+        start = time.perf_counter()
+        try:
+            while len(episode_rewards) < episodes:
+                try:
+                    slot, actor_id, finished = slots.ready.get(timeout=1.0)
+                except queue.Empty:
+                    if not any(actor.is_alive() for actor in actors):
+                        raise RuntimeError("All actor processes exited")
+                    continue
+
+                agent.store_transitions(*slots.read(slot))
+                slots.free.put(slot)
+                self.env_steps += cfg.envs_per_actor
+
+                for _ in range(cfg.learn_steps):
+                    agent.learn(batch_size=cfg.batch_size)
+                    learner_steps += 1
+                    if learner_steps % cfg.sync_interval == 0:
+                        policy.publish(agent.policy_net, agent.epsilon)
+
+                for reward in finished:
+                    episode_rewards.append(reward)
+                    if len(episode_rewards) % 100 == 0:
+                        avg_reward = np.mean(episode_rewards[-100:])
+                        logger.info(f"Episode {len(episode_rewards)}, Average Reward: {avg_reward:.3f}, "
+                                    f"Epsilon: {agent.epsilon:.3f}")
+        finally:
+            self._shutdown(actors, slots, stop_event)
+
+        self.seconds = time.perf_counter() - start
+        logger.info(f"Distributed training completed: {self.env_steps} env steps in {self.seconds:.2f}s "
+                    f"({self.env_steps / self.seconds:.0f} steps/s), {learner_steps} learner steps")
+        return episode_rewards[:episodes]
+
+    def _shutdown(self, actors: List, slots: TransitionSlots, stop_event):
+        """Остановка акторов; очередь ready вычитывается, иначе join может зависнуть"""
+        stop_event.set()
+        deadline = time.monotonic() + 5.0
+        while any(actor.is_alive() for actor in actors) and time.monotonic() < deadline:
+            try:
+                while True:
+                    slots.ready.get_nowait()
+            except queue.Empty:
+                pass
+            for actor in actors:
+                actor.join(timeout=0.05)
+        for actor in actors:
+            if actor.is_alive():
+                logger.warning(f"Actor {actor.name} did not stop, terminating")
+                actor.terminate()
+                actor.join()
+
+    def stats(self) -> Dict:
+        return {
+            'env_steps': self.env_steps,
+            'seconds': self.seconds,
+            'steps_per_second': self.env_steps / self.seconds if self.seconds > 0 else 0.0
+        }
@@ -1,7 +1,8 @@
 # File: training/pretrain.py
 import numpy as np
+import torch
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import time
 
 logging.basicConfig(level=logging.INFO)
@@ -67,6 +68,35 @@ class Pretrainer:
             }
         ]
     
+    def build_similarity_tables(self, cache_dir: Optional[str] = None):
+        """Предвычислить эмбеддинги вопросов, схожесть вопрос x статья и
+        правильная статья x статья и подключить таблицы к среде"""
+        from training.similarity_tables import SimilarityTables
+        
+        tables = SimilarityTables.load_or_build(
+            self.article_db, self.env.state_encoder,
+            [example["question"] for example in self.training_data],
+            anchor_ids=[example["correct_article_id"] for example in self.training_data],
+            cache_dir=cache_dir
+        )
+        self.env.use_similarity_tables(tables)
+        return tables
+    
+    def _article_similarity(self, correct_action: int, action: int) -> Optional[float]:
+        """Косинусная схожесть правильной и выбранной статей (из таблицы, если есть)"""
+        tables = self.env.similarity_tables
+        if tables is not None:
+            similarity = tables.article_similarity(correct_action, action)
+            if similarity is not None:
+                return similarity
+        
+        correct_embedding = self.article_db.get_article_embedding(correct_action)
+        chosen_embedding = self.article_db.get_article_embedding(action)
+        if correct_embedding is None or chosen_embedding is None:
+            return None
+        # Эмбеддинги статей нормализованы при построении
+        return float(np.dot(correct_embedding, chosen_embedding))
+    
     def pretrain_with_supervised(self, episodes: int = 500):
         """Предварительное обучение с учителем"""
         logger.info("Starting supervised pretraining...")
@@ -93,13 +123,9 @@ class Pretrainer:
                 
                 if correct_article and chosen_article:
                     # Вычисляем схожесть между выбранной и правильной статьей
-                    correct_embedding = self.article_db.get_article_embedding(correct_action)
-                    chosen_embedding = self.article_db.get_article_embedding(action)
+                    similarity = self._article_similarity(correct_action, action)
                     
-                    if correct_embedding is not None and chosen_embedding is not None:
-                        similarity = np.dot(correct_embedding, chosen_embedding) / (
-                            np.linalg.norm(correct_embedding) * np.linalg.norm(chosen_embedding)
-                        )
+                    if similarity is not None:
                         reward = max(0.1, similarity)  # Минимальный reward 0.1
                     else:
                         reward = 0.1
@@ -116,37 +142,143 @@ class Pretrainer:
             if (episode + 1) % 100 == 0:
                 logger.info(f"Pretraining episode {episode + 1}, reward: {reward:.3f}")
     
-    def evaluate_pretraining(self) -> Dict:
-        """Оценка качества после предварительного обучения"""
-        logger.info("Evaluating pretraining performance...")
+    def _valid_examples(self) -> List[Dict]:
+        """Примеры, правильная статья которых есть в корпусе (в небольшом корпусе
+        части id из training_data может не быть)"""
+        n_articles = len(self.article_db.get_all_articles())
+        return [example for example in self.training_data
+                if 0 <= example["correct_article_id"] < n_articles]
+    
+    def _encode_questions(self) -> np.ndarray:
+        """Состояния размеченных вопросов (_valid_examples) одним батчем (или из таблиц схожести)"""
+        questions = [example["question"] for example in self._valid_examples()]
+        tables = self.env.similarity_tables
+        if tables is not None and all(question in tables.query_index for question in questions):
+            return np.asarray(tables.query_embeddings[[tables.query_index[q] for q in questions]],
+                              dtype=np.float32)
+        return np.stack(self.env.state_encoder.encode_queries(questions)).astype(np.float32)
+    
+    def _reward_matrix(self, correct_ids: np.ndarray) -> np.ndarray:
+        """Reward каждого действия для каждого примера, форма (E, N):
+        1.0 за правильную статью, иначе max(0.1, схожесть с правильной) —
+        те же значения, что дает эпизод pretrain_with_supervised"""
+        tables = self.env.similarity_tables
+        if tables is not None and all(int(c) in tables.anchor_index for c in correct_ids):
+            similarities = tables.article_article[[tables.anchor_index[int(c)] for c in correct_ids]]
+        else:
+            articles = self.article_db.article_embeddings
+            similarities = articles.scores(articles[correct_ids])
         
-        correct_predictions = 0
-        total_reward = 0
+        rewards = np.maximum(0.1, similarities).astype(np.float32)
+        rewards[np.arange(len(correct_ids)), correct_ids] = 1.0
+        return rewards
+    
+    def pretrain_batched(self, epochs: int = 500, batch_size: int = 32, negatives: Optional[int] = 255,
+                         patience: int = 50, target_accuracy: float = 1.0) -> Dict:
+        """Быстрое предобучение с учителем: вопросы кодируются один раз, Q-голова
+        регрессирует к reward всех действий мини-батчами.
         
-        for example in self.training_data:
-            question = example["question"]
-            correct_action = example["correct_article_id"]
-            
-            state = self.env.reset(question)
-            action = self.agent.select_action(state, training=False)
-            
-            if action == correct_action:
-                correct_predictions += 1
-                reward = 1.0
-            else:
-                reward = 0.0
+        Эпизод предобучения одношаговый (done=True), поэтому цель Q(s, a) — просто
+        reward(a), и ее можно посчитать сразу для всех статей. negatives — сколько
+        случайных статей брать на пример в каждом батче
+        (при небольшом корпусе и при None — все статьи).
+        После каждой эпохи считается accuracy evaluate_pretraining; обучение
+        останавливается при target_accuracy или без улучшения patience эпох,
+        в агенте остаются лучшие веса.
+        """
+        logger.info("Starting batched supervised pretraining...")
+        start = time.perf_counter()
+        agent = self.agent
+        
+        examples = self._valid_examples()
+        if not examples:
+            logger.warning("No pretraining examples match articles in the corpus, skipping pretraining")
+            return {"epochs": 0, "best_epoch": 0, "accuracy": 0.0, "loss": 0.0,
+                    "seconds": time.perf_counter() - start}
+        if len(examples) < len(self.training_data):
+            logger.warning(f"Pretraining on {len(examples)} of {len(self.training_data)} examples: "
+                           f"the rest point to articles missing from the corpus")
+        states = self._encode_questions()
+        correct_ids = np.array([example["correct_article_id"] for example in examples], dtype=np.int64)
+        rewards = self._reward_matrix(correct_ids)
+        n_examples, n_actions = rewards.shape
+        
+        best_accuracy, best_epoch, best_state = -1.0, 0, None
+        epoch, loss_value = 0, 0.0
+        for epoch in range(1, epochs + 1):
+            for batch in np.array_split(np.random.permutation(n_examples), max(1, n_examples // batch_size)):
+                if negatives is None or negatives + 1 >= n_actions:
+                    actions = np.broadcast_to(np.arange(n_actions), (len(batch), n_actions))
+                else:
+                    sampled = np.random.randint(0, n_actions, (len(batch), negatives))
+                    actions = np.concatenate([correct_ids[batch, None], sampled], axis=1)
+                targets = rewards[batch[:, None], actions]
+                
+                # Пары (состояние, действие) разворачиваются в батч — так работает
+                # _current_q_values любого агента (плоского, кандидатного, иерархического)
+                batch_states = torch.from_numpy(np.repeat(states[batch], actions.shape[1], axis=0)).to(agent.device)
+                batch_actions = torch.from_numpy(np.ascontiguousarray(actions).reshape(-1, 1)).to(agent.device)
+                batch_targets = torch.from_numpy(targets.reshape(-1, 1)).to(agent.device)
+                
+                current_q_values = agent._current_q_values(batch_states, batch_actions)
+                loss = torch.nn.functional.mse_loss(current_q_values, batch_targets.expand_as(current_q_values))
+                agent.optimizer.zero_grad()
+                loss.backward()
+                torch.nn.utils.clip_grad_norm_(agent.policy_net.parameters(), 1.0)
+                agent.optimizer.step()
+                agent.epsilon = max(agent.config.epsilon_end, agent.epsilon * agent.config.epsilon_decay)
+                agent.steps_done += 1
+                loss_value = loss.item()
             
-            total_reward += reward
+            accuracy = self.evaluate_pretraining(states, verbose=False)["accuracy"]
+            if accuracy > best_accuracy:
+                best_accuracy, best_epoch = accuracy, epoch
+                best_state = {k: v.detach().clone() for k, v in agent.policy_net.state_dict().items()}
+            if epoch % 10 == 0:
+                logger.info(f"Pretraining epoch {epoch}, loss: {loss_value:.4f}, accuracy: {accuracy:.3f}")
+            if best_accuracy >= target_accuracy or epoch - best_epoch >= patience:
+                break
+        
+        if best_state is not None:
+            agent.policy_net.load_state_dict(best_state)
+        agent.target_net.load_state_dict(agent.policy_net.state_dict())
+        
+        seconds = time.perf_counter() - start
+        logger.info(f"Batched pretraining finished: {epoch} epochs, best accuracy {best_accuracy:.3f} "
+                    f"(epoch {best_epoch}), {seconds:.2f}s")
+        return {
+            "epochs": epoch,
+            "best_epoch": best_epoch,
+            "accuracy": best_accuracy,
+            "loss": loss_value,
+            "seconds": seconds
+        }
+    
+    def evaluate_pretraining(self, states: Optional[np.ndarray] = None, verbose: bool = True) -> Dict:
+        """Оценка качества после предварительного обучения (один батчевый выбор действий)"""
+        if verbose:
+            logger.info("Evaluating pretraining performance...")
+        
+        examples = self._valid_examples()
+        if not examples:
+            return {"accuracy": 0.0, "avg_reward": 0.0, "correct_predictions": 0, "total_examples": 0}
+        if states is None:
+            states = self._encode_questions()
+        correct_ids = np.array([example["correct_article_id"] for example in examples])
+        actions = np.asarray(self.agent.select_actions(states, training=False))
         
-        accuracy = correct_predictions / len(self.training_data)
-        avg_reward = total_reward / len(self.training_data)
+        correct_predictions = int((actions == correct_ids).sum())
+        accuracy = correct_predictions / len(examples)
+        # Reward 1.0 за правильный ответ, 0.0 за остальные
+        avg_reward = accuracy
         
-        logger.info(f"Pretraining accuracy: {accuracy:.3f}")
-        logger.info(f"Average reward: {avg_reward:.3f}")
+        if verbose:
+            logger.info(f"Pretraining accuracy: {accuracy:.3f}")
+            logger.info(f"Average reward: {avg_reward:.3f}")
         
         return {
             "accuracy": accuracy,
             "avg_reward": avg_reward,
             "correct_predictions": correct_predictions,
-            "total_examples": len(self.training_data)
-        }
\ No newline at end of file
+            "total_examples": len(examples)
+        }
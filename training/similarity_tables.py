@@ -0,0 +1,106 @@
+# File: training/similarity_tables.py
+import hashlib
+import json
+import os
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SimilarityTables:
+    """Предвычисленные таблицы для обучения на фиксированном наборе запросов.
+
+    - query_embeddings (Q, D) — нормализованные эмбеддинги запросов (состояния);
+    - query_article (Q, N) — косинусная схожесть запрос x статья (reward среды);
+    - article_article (K, N) — схожесть статей-якорей со всеми статьями
+      (reward предобучения за неправильный ответ); anchor_ids — их id.
+    """
+    def __init__(self, queries: List[str], query_embeddings: np.ndarray, query_article: np.ndarray,
+                 anchor_ids: np.ndarray, article_article: np.ndarray):
+        self.queries = list(queries)
+        self.query_index: Dict[str, int] = {query: i for i, query in enumerate(self.queries)}
+        self.query_embeddings = query_embeddings
+        self.query_article = query_article
+        self.anchor_ids = np.asarray(anchor_ids, dtype=np.int64)
+        self.anchor_index: Dict[int, int] = {int(a): i for i, a in enumerate(self.anchor_ids)}
+        self.article_article = article_article
+
+    @classmethod
+    def build(cls, article_db, state_encoder, queries: Sequence[str],
+              anchor_ids: Optional[Sequence[int]] = None) -> "SimilarityTables":
+        """Один батчевый encode запросов и два матричных произведения"""
+        queries = list(dict.fromkeys(queries))
+        # EmbeddingStore нормализованных эмбеддингов: скоринг по компактной форме
+        articles = article_db.article_embeddings
+        if anchor_ids is None:
+            anchor_ids = np.arange(len(articles))
+        anchor_ids = np.asarray([a for a in anchor_ids if 0 <= a < len(articles)], dtype=np.int64)
+
+        query_embeddings = np.stack(state_encoder.encode_queries(queries)).astype(np.float32)
+        anchors = articles[anchor_ids] if len(anchor_ids) else np.empty((0, articles.shape[1]), dtype=np.float32)
+        return cls(queries, query_embeddings, articles.scores(query_embeddings),
+                   anchor_ids, articles.scores(anchors))
+
+    @staticmethod
+    def cache_key(corpus_hash: str, queries: Sequence[str], anchor_ids: Optional[Sequence[int]]) -> str:
+        """Ключ кэша: корпус (и модель эмбеддингов), набор запросов и якорей"""
+        payload = json.dumps({
+            'corpus': corpus_hash,
+            'queries': list(dict.fromkeys(queries)),
+            'anchors': None if anchor_ids is None else sorted(int(a) for a in anchor_ids)
+        }, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def load_or_build(cls, article_db, state_encoder, queries: Sequence[str],
+                      anchor_ids: Optional[Sequence[int]] = None,
+                      cache_dir: Optional[str] = None) -> "SimilarityTables":
+        """Таблицы из кэша <cache_dir>/similarity_tables.<key>.npz или построение и сохранение"""
+        if cache_dir is None or article_db.corpus_hash is None:
+            return cls.build(article_db, state_encoder, queries, anchor_ids)
+
+        key = cls.cache_key(article_db.corpus_hash, queries, anchor_ids)
+        path = os.path.join(cache_dir, f"similarity_tables.{key}.npz")
+        if os.path.exists(path):
+            try:
+                tables = cls.load(path)
+                logger.info(f"Loaded similarity tables from {path}")
+                return tables
+            except Exception as e:
+                logger.warning(f"Failed to load similarity tables from {path}: {e}")
+
+        tables = cls.build(article_db, state_encoder, queries, anchor_ids)
+        tables.save(path)
+        return tables
+
+    def save(self, path: str):
+        """Атомарное сохранение в .npz"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, queries=np.array(self.queries), query_embeddings=self.query_embeddings,
+                 query_article=self.query_article, anchor_ids=self.anchor_ids,
+                 article_article=self.article_article)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved similarity tables ({len(self.queries)} queries x "
+                    f"{self.query_article.shape[1]} articles) to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityTables":
+        with np.load(path) as data:
+            return cls([str(q) for q in data['queries']], data['query_embeddings'], data['query_article'],
+                       data['anchor_ids'], data['article_article'])
+
+    def query_embedding(self, query: str) -> Optional[np.ndarray]:
+        index = self.query_index.get(query)
+        return None if index is None else self.query_embeddings[index]
+
+    def query_similarity(self, query: str, article_id: int) -> Optional[float]:
+        """Схожесть запрос x статья или None, если запроса нет в таблице"""
+        index = self.query_index.get(query)
+        return None if index is None else float(self.query_article[index, article_id])
+
+    def article_similarity(self, anchor_id: int, article_id: int) -> Optional[float]:
+        """Схожесть статьи-якоря с другой статьей или None, если якоря нет в таблице"""
+        index = self.anchor_index.get(anchor_id)
+        return None if index is None else float(self.article_article[index, article_id])
@@ -1,7 +1,7 @@
 # File: training/trainer.py
 import numpy as np
 import logging
-from typing import List
+from typing import List, Dict, Optional
 import random
 
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +28,17 @@ class RLTrainer:
             "Что такое коллаборативная фильтрация?"
         ]
     
+    def build_similarity_tables(self, cache_dir: Optional[str] = None):
+        """Предвычислить таблицы схожести для training_queries и подключить их к среде"""
+        from training.similarity_tables import SimilarityTables
+        
+        tables = SimilarityTables.load_or_build(
+            self.env.article_db, self.env.state_encoder, self.training_queries,
+            anchor_ids=[], cache_dir=cache_dir
+        )
+        self.env.use_similarity_tables(tables)
+        return tables
+    
     def train(self, episodes: int = 1000):
         """Основной цикл обучения"""
         logger.info(f"Starting training for {episodes} episodes")
@@ -80,6 +91,59 @@ class RLTrainer:
         logger.info("Training completed")
         return episode_rewards
     
+    def train_vectorized(self, episodes: int = 1000, num_envs: int = 16, learn_steps: int = 1):
+        """Обучение на VecRecommendationEnv: num_envs диалогов шагают вместе.
+
+        На каждом шаге — один батчевый выбор действий, одна запись батча
+        переходов в memory и learn_steps шагов обучения.
+        """
+        from rl_environment.vec_env import VecRecommendationEnv
+        
+        logger.info(f"Starting vectorized training for {episodes} episodes ({num_envs} envs)")
+        vec_env = VecRecommendationEnv(
+            self.env.article_db, self.env.state_encoder, self.config, num_envs,
+            query_sampler=lambda n: random.choices(self.training_queries, k=n),
+            similarity_tables=self.env.similarity_tables
+        )
+        
+        episode_rewards = []
+        running_rewards = np.zeros(num_envs, dtype=np.float32)
+        states = vec_env.reset()
+        
+        while len(episode_rewards) < episodes:
+            actions = self.agent.select_actions(states, training=True)
+            next_states, rewards, dones, info = vec_env.step(actions)
+            
+            # В memory попадают терминальные состояния, а не состояния после автосброса
+            self.agent.store_transitions(states, actions, rewards, info['terminal_states'], dones)
+            for _ in range(learn_steps):
+                self.agent.learn(batch_size=32)
+            
+            running_rewards += rewards
+            for env_id in np.flatnonzero(dones):
+                episode_rewards.append(float(running_rewards[env_id]))
+                running_rewards[env_id] = 0.0
+                if len(episode_rewards) % 100 == 0:
+                    avg_reward = np.mean(episode_rewards[-100:])
+                    logger.info(f"Episode {len(episode_rewards)}, Average Reward: {avg_reward:.3f}, Epsilon: {self.agent.epsilon:.3f}")
+            states = next_states
+        
+        logger.info("Vectorized training completed")
+        return episode_rewards[:episodes]
+    
+    def train_distributed(self, episodes: int = 1000, config=None) -> List[float]:
+        """Обучение actor/learner в нескольких процессах (см. training.distributed);
+        config — DistributedConfig, по умолчанию Config.distributed"""
+        from config.settings import Config
+        from training.distributed import DistributedTrainer
+        
+        trainer = DistributedTrainer(
+            self.env.article_db, self.env.state_encoder, self.config, self.agent,
+            self.training_queries, config or Config.distributed,
+            similarity_tables=self.env.similarity_tables
+        )
+        return trainer.train(episodes)
+    
     def evaluate(self, test_queries: List[str] = None) -> Dict:
         """Оценка обученного агента"""
         if test_queries is None: